@@ -4,6 +4,10 @@ from django.urls import reverse
 from django.http import HttpResponseRedirect
 from django.contrib import messages
 from .models import Service, Therapist, Customer, Booking, BusinessHours, BookingSettings, Schedule, GapBlock
+from .utils.availability import invalidate_availability
+from .utils.bulk_actions import bulk_change_booking_status, bulk_update_dated
+from .utils.customer_stats import REPEAT_MIN_BOOKINGS, VIP_MIN_BOOKINGS, filter_segment, with_active_booking_count
+from .utils.search import search_bookings, search_customers
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
@@ -78,17 +82,40 @@ class TherapistAdmin(admin.ModelAdmin):
             'description': '施術者の写真をアップロードできます。'
         }),
     )
+
+
+class CustomerSegmentFilter(admin.SimpleListFilter):
+    """予約回数（確定・完了）による顧客区分"""
+    title = '顧客区分'
+    parameter_name = 'segment'
+    
+    def lookups(self, request, model_admin):
+        return [
+            ('repeat', f'リピーター（{REPEAT_MIN_BOOKINGS}回以上）'),
+            ('vip', f'常連客（{VIP_MIN_BOOKINGS}回以上）'),
+        ]
+    
+    def queryset(self, request, queryset):
+        return filter_segment(queryset, self.value())
+
+
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
     # ★ 修正: list_displayに性別アイコンを追加
     list_display = ['name', 'gender_display', 'email', 'phone', 'is_first_visit_display', 'booking_count_display', 'created_at']
     
     # ★ 追加: フィルター機能に性別と初回利用を追加
-    list_filter = ['gender', 'is_first_visit', 'created_at']
+    list_filter = ['gender', 'is_first_visit', CustomerSegmentFilter, 'created_at']
     
     search_fields = ['name', 'email', 'phone']
-    readonly_fields = ['created_at', 'updated_at', 'booking_count_display', 'last_booking_date']
+    readonly_fields = [
+        'created_at', 'updated_at', 'booking_count_display',
+        'first_booking_date', 'last_booking_date', 'lifetime_revenue_display',
+    ]
     ordering = ['-created_at']
+    # 件数が多いため、1ページの件数を抑え、絞り込み前の総件数（COUNT）は数えない
+    list_per_page = 50
+    show_full_result_count = False
     
     # ★ 新規追加: fieldsets で編集画面を整理
     fieldsets = (
@@ -104,7 +131,10 @@ class CustomerAdmin(admin.ModelAdmin):
             'description': '顧客に関する永続的な備考やメモを記録できます。'
         }),
         ('システム情報', {
-            'fields': ('booking_count_display', 'last_booking_date', 'created_at', 'updated_at'),
+            'fields': (
+                'booking_count_display', 'first_booking_date', 'last_booking_date', 'lifetime_revenue_display',
+                'created_at', 'updated_at'
+            ),
             'classes': ('collapse',),
             'description': '読み取り専用の統計情報です。'
         }),
@@ -132,14 +162,27 @@ class CustomerAdmin(admin.ModelAdmin):
     is_first_visit_display.short_description = '利用状況'
     is_first_visit_display.admin_order_field = 'is_first_visit'  # ソート可能にする
     
-    # 既存のメソッド（変更なし）
+    def get_queryset(self, request):
+        # 予約回数は保持している実績の列から求める（予約を数えない。並び替えは関数インデックスを使う）
+        return with_active_booking_count(super().get_queryset(request))
+    
+    def get_search_results(self, request, queryset, search_term):
+        # 名前・メールアドレス・電話番号の検索は全文検索インデックスを使う（search_fields の LIKE を使わない）
+        return search_customers(queryset, search_term), False
+    
     def booking_count_display(self, obj):
-        count = obj.booking_count
+        count = obj.active_booking_count
         if count > 0:
             url = reverse('admin:bookings_booking_changelist') + f'?customer__id__exact={obj.id}'
             return format_html('<a href="{}">{} 件</a>', url, count)
         return '0 件'
     booking_count_display.short_description = '予約回数'
+    booking_count_display.admin_order_field = 'active_booking_count'
+    
+    def lifetime_revenue_display(self, obj):
+        return f'¥{obj.lifetime_revenue:,}'
+    lifetime_revenue_display.short_description = '累計売上'
+    lifetime_revenue_display.admin_order_field = 'lifetime_revenue'
     
     # ★ 新規追加: カスタムアクション
     actions = ['mark_as_returning_customer', 'mark_as_first_time_customer']
@@ -168,6 +211,11 @@ class BookingAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'booking_date'
     ordering = ['-booking_date', '-booking_time']
+    # 顧客・サービス・施術者は行ごとに取得せず結合して取得する
+    list_select_related = ['customer', 'service', 'therapist']
+    # 数年分の予約があるため、1ページの件数を抑え、絞り込み前の総件数（COUNT）は数えない
+    list_per_page = 50
+    show_full_result_count = False
     
     fieldsets = (
         ('予約情報', {
@@ -182,6 +230,10 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        # 顧客の名前・メールアドレス・電話番号と備考の検索は全文検索インデックスを使う（search_fields の LIKE を使わない）
+        return search_bookings(queryset, search_term), False
+    
     # ★ 新規追加: 予約一覧で顧客の性別も確認できるメソッド
     def customer_gender_display(self, obj):
         """予約一覧で顧客の性別をアイコン表示"""
@@ -198,6 +250,7 @@ class BookingAdmin(admin.ModelAdmin):
     def therapist_display(self, obj):
         return obj.therapist.display_name if obj.therapist else "指名なし"
     therapist_display.short_description = '施術者'
+    therapist_display.admin_order_field = 'therapist__display_name'
     
     def status_display(self, obj):
         colors = {
@@ -217,17 +270,17 @@ class BookingAdmin(admin.ModelAdmin):
     actions = ['mark_as_confirmed', 'mark_as_completed', 'mark_as_cancelled']
     
     def mark_as_confirmed(self, request, queryset):
-        updated = queryset.update(status='confirmed')
+        updated = len(bulk_change_booking_status(queryset, 'confirmed'))
         self.message_user(request, f'{updated} 件の予約を確定しました。')
     mark_as_confirmed.short_description = '選択した予約を確定する'
     
     def mark_as_completed(self, request, queryset):
-        updated = queryset.update(status='completed')
+        updated = len(bulk_change_booking_status(queryset, 'completed'))
         self.message_user(request, f'{updated} 件の予約を完了しました。')
     mark_as_completed.short_description = '選択した予約を完了する'
     
     def mark_as_cancelled(self, request, queryset):
-        updated = queryset.update(status='cancelled')
+        updated = len(bulk_change_booking_status(queryset, 'cancelled'))
         self.message_user(request, f'{updated} 件の予約をキャンセルしました。')
     mark_as_cancelled.short_description = '選択した予約をキャンセルする'
     
@@ -310,6 +363,7 @@ class BookingSettingsAdmin(admin.ModelAdmin):
         else:
             # 自動ブロックが無効になった場合は既存の自動ブロックを無効化
             GapBlock.objects.filter(is_auto_generated=True, is_active=True).update(is_active=False)
+            invalidate_availability()
             messages.success(request, '予約設定を更新し、自動生成されたブロックを無効化しました。')
         
         return super().response_change(request, obj)
@@ -454,18 +508,19 @@ class GapBlockAdmin(admin.ModelAdmin):
     ]
     
     def activate_blocks(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        updated = bulk_update_dated(queryset, 'block_date', is_active=True)
         self.message_user(request, f'{updated} 件のブロックを有効にしました。')
     activate_blocks.short_description = '選択したブロックを有効にする'
     
     def deactivate_blocks(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = bulk_update_dated(queryset, 'block_date', is_active=False)
         self.message_user(request, f'{updated} 件のブロックを無効にしました。')
     deactivate_blocks.short_description = '選択したブロックを無効にする'
     
     def delete_auto_generated_blocks(self, request, queryset):
         auto_generated = queryset.filter(is_auto_generated=True)
         count = auto_generated.count()
+        invalidate_availability(auto_generated.values_list('block_date', flat=True))
         auto_generated.delete()
         self.message_user(request, f'{count} 件の自動生成ブロックを削除しました。')
     delete_auto_generated_blocks.short_description = '自動生成されたブロックを削除する'
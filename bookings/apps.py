@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookings'
+    
+    def ready(self):
+        # SQLite の接続設定（WAL・busy_timeout など）
+        from .db import connect_signals
+        connect_signals()
+        
+        # 空き時間APIの ETag 用バージョンの更新
+        import bookings.signals
@@ -0,0 +1,57 @@
+# bookings/db.py
+# SQLite の接続ごとの設定（PRAGMA）
+# settings.SQLITE_PRAGMAS の値を connection_created シグナルで適用する
+#
+# - journal_mode=WAL    : 書き込み中も読み込みがブロックされない
+# - busy_timeout        : ロック中は指定ミリ秒まで待ってから "database is locked" にする
+# - synchronous=NORMAL  : WAL と組み合わせて fsync の回数を減らす（電源断時も破損しない）
+# - mmap_size/cache_size/temp_store : 読み込み・一時テーブルをメモリ上で処理する
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 設定可能なPRAGMA（任意のSQLを実行しないよう名前を限定）
+ALLOWED_PRAGMAS = (
+    'journal_mode',
+    'busy_timeout',
+    'synchronous',
+    'mmap_size',
+    'cache_size',
+    'temp_store',
+    'wal_autocheckpoint',
+)
+
+
+def get_sqlite_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """カーソル（sqlite3 / Django どちらでも可）にPRAGMAを適用"""
+    for name, value in pragmas.items():
+        if name not in ALLOWED_PRAGMAS:
+            raise ValueError(f'SQLITE_PRAGMAS に未対応のPRAGMAが含まれています: {name}')
+        if not str(value).lstrip('-').isalnum():
+            raise ValueError(f'SQLITE_PRAGMAS の値が不正です: {name}={value}')
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """新しいDB接続にPRAGMAを適用"""
+    if connection.vendor != 'sqlite':
+        return
+
+    pragmas = get_sqlite_pragmas()
+    if not pragmas:
+        return
+
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, pragmas)
+    logger.debug(f"SQLite PRAGMA を適用しました: {pragmas}")
+
+
+def connect_signals():
+    connection_created.connect(configure_sqlite_connection, dispatch_uid='bookings.configure_sqlite_connection')
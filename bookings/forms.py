@@ -2,37 +2,55 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
-from django.db.models import Q
-from .models import Booking, Service, Customer, Therapist, BookingSettings, Schedule
+from .models import Booking, BookingSettings, Schedule
+from .utils.catalog import get_services, get_service, get_therapists, get_therapist
 import datetime
 
 # ===== 3ステップ予約フォーム =====
 
+class CatalogChoiceField(forms.ChoiceField):
+    """
+    カタログ（bookings/utils/catalog.py）の一覧から選択するフィールド
+    選択肢の作成・入力値の確認ともにカタログから行い、選択された項目（CatalogService など）を返す
+    """
+
+    def __init__(self, *, get_items, get_item, empty_label=None, **kwargs):
+        self.get_item = get_item
+
+        def choices():
+            items = [(item.id, str(item)) for item in get_items()]
+            return [('', empty_label), *items] if empty_label else items
+
+        super().__init__(choices=choices, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        item = self.get_item(value)
+        if item is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+        return item
+
+    def validate(self, value):
+        # 選択肢に含まれるかは to_python で確認済み
+        forms.Field.validate(self, value)
+
+
 class ServiceSelectionForm(forms.Form):
     """ステップ1: サービス選択フォーム"""
-    service = forms.ModelChoiceField(
-        queryset=Service.objects.filter(is_active=True).order_by('sort_order', 'name'),
+    service = CatalogChoiceField(
+        get_items=get_services,
+        get_item=get_service,
         label='ご希望のサービスをお選びください',
         widget=forms.RadioSelect(attrs={'class': 'service-radio'}),
-        empty_label=None,
-        to_field_name='id'
+        error_messages={'invalid_choice': '選択されたサービスは現在ご利用いただけません。'}
     )
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # アクティブなサービスのみを表示
-        self.fields['service'].queryset = Service.objects.filter(is_active=True).order_by('sort_order', 'name')
-    
-    def clean_service(self):
-        service = self.cleaned_data['service']
-        if not service.is_active:
-            raise ValidationError('選択されたサービスは現在ご利用いただけません。')
-        return service
 
 class DateTimeTherapistForm(forms.Form):
     """ステップ2: 日時・施術者選択フォーム"""
-    therapist = forms.ModelChoiceField(
-        queryset=Therapist.objects.filter(is_active=True),
+    therapist = CatalogChoiceField(
+        get_items=get_therapists,
+        get_item=get_therapist,
         label='施術者',
         required=False,
         widget=forms.RadioSelect(attrs={'class': 'therapist-radio'}),
@@ -199,11 +217,11 @@ def validate_booking_time_slot(service, booking_date, booking_time, therapist=No
     overlapping_bookings = Booking.objects.filter(
         booking_date=booking_date,
         status__in=['pending', 'confirmed']  # キャンセル済みは除外
-    )
+    ).select_related('service')
     
     # 施術者が指定されている場合は同じ施術者の予約のみチェック
     if therapist:
-        overlapping_bookings = overlapping_bookings.filter(therapist=therapist)
+        overlapping_bookings = overlapping_bookings.filter(therapist_id=therapist.id)
     
     # 時間の重複をチェック
     for booking in overlapping_bookings:
@@ -265,7 +283,7 @@ def validate_booking_time_slot(service, booking_date, booking_time, therapist=No
     # 施術者が指定されている場合は、その施術者の予定のみチェック
     if therapist:
         conflicting_schedules = conflicting_schedules.filter(
-            models.Q(therapist=therapist) | models.Q(therapist__isnull=True)  # 全体予定も含む
+            models.Q(therapist_id=therapist.id) | models.Q(therapist__isnull=True)  # 全体予定も含む
         )
     
     # 時間の重複チェック
@@ -275,9 +293,9 @@ def validate_booking_time_slot(service, booking_date, booking_time, therapist=No
         
         # 時間の重複判定
         if (booking_datetime_naive < schedule_end and end_datetime_naive > schedule_start):
-            if therapist and schedule.therapist == therapist:
+            if therapist and schedule.therapist_id == therapist.id:
                 raise ValidationError(f'選択された時間は{therapist.display_name}の予定「{schedule.title}」と重複しています。')
-            elif schedule.therapist is None:
+            elif schedule.therapist_id is None:
                 raise ValidationError(f'選択された時間は予定「{schedule.title}」と重複しています。')
     
     return True
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.core.cache import cache
+from bookings.utils.rate_limit import hit
+import time
+import uuid
+
+
+class Command(BaseCommand):
+    help = 'レート制限の1リクエストあたりの処理時間を、IPアドレス数を変えて計測します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ips',
+            type=int,
+            nargs='+',
+            default=[10, 100, 1000, 5000],
+            help='計測するIPアドレス数（複数指定可）'
+        )
+
+        parser.add_argument(
+            '--hits-per-ip',
+            type=int,
+            default=10,
+            help='IPアドレスごとのアクセス回数'
+        )
+
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=5,
+            help='区間内に許可する回数'
+        )
+
+        parser.add_argument(
+            '--window',
+            type=int,
+            default=300,
+            help='区間の長さ（秒）'
+        )
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        window = options['window']
+        hits_per_ip = options['hits_per_ip']
+
+        self.stdout.write(f'キャッシュバックエンド: {cache.__class__.__module__}.{cache.__class__.__name__}')
+        self.stdout.write(f'制限: {limit}回 / {window}秒, IPごとのアクセス: {hits_per_ip}回')
+        self.stdout.write('=' * 50)
+
+        for ip_count in options['ips']:
+            # 計測ごとに別の識別子を使い、前回の結果と混ざらないようにする
+            run_id = uuid.uuid4().hex[:8]
+            identifiers = [f'benchmark:{run_id}:10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}' for i in range(ip_count)]
+
+            blocked = 0
+            started = time.perf_counter()
+            for _ in range(hits_per_ip):
+                for identifier in identifiers:
+                    if not hit(identifier, limit, window):
+                        blocked += 1
+            elapsed = time.perf_counter() - started
+
+            total = ip_count * hits_per_ip
+            expected_blocked = ip_count * max(hits_per_ip - limit, 0)
+            self.stdout.write(
+                f'IP数 {ip_count:>6}: {total:>7}リクエスト, '
+                f'平均 {elapsed / total * 1_000_000:7.1f}µs/リクエスト, '
+                f'拒否 {blocked}/{expected_blocked}件'
+            )
+
+            if blocked < expected_blocked:
+                # LocMemCache の MAX_ENTRIES（既定300）などでカウンタが削除されている
+                self.stdout.write(self.style.WARNING(
+                    '  ※ キャッシュの上限によりカウンタが削除されています。'
+                    'CACHES の MAX_ENTRIES を増やすか共有キャッシュを使用してください'
+                ))
+
+        self.stdout.write('=' * 50)
+        self.stdout.write(self.style.SUCCESS('計測完了'))
@@ -0,0 +1,173 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from bookings.db import apply_sqlite_pragmas
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = 'SQLite の同時読み書き性能を、既定設定と SQLITE_PRAGMAS で比較します（一時DBを使用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=4,
+            help='書き込みスレッド数（予約作成を想定）'
+        )
+
+        parser.add_argument(
+            '--readers',
+            type=int,
+            default=4,
+            help='読み込みスレッド数（空き時間検索・一覧表示を想定）'
+        )
+
+        parser.add_argument(
+            '--seconds',
+            type=float,
+            default=5.0,
+            help='各設定での計測時間（秒）'
+        )
+
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=20000,
+            help='計測前に作成する予約の件数'
+        )
+
+    def handle(self, *args, **options):
+        # (表示名, PRAGMA, トランザクション開始方法)
+        configs = [
+            ('既定（PRAGMAなし）', {}, 'DEFERRED'),
+            ('SQLITE_PRAGMAS', getattr(settings, 'SQLITE_PRAGMAS', {}),
+             getattr(settings, 'SQLITE_TRANSACTION_MODE', 'DEFERRED').upper()),
+        ]
+
+        self.stdout.write(
+            f'書き込み {options["writers"]}スレッド / 読み込み {options["readers"]}スレッド / '
+            f'{options["seconds"]}秒'
+        )
+        self.stdout.write('=' * 50)
+
+        results = []
+        for label, pragmas, transaction_mode in configs:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                self.create_database(path, pragmas, options['rows'])
+                result = self.run(path, pragmas, transaction_mode, options)
+            results.append(result)
+
+            self.stdout.write(f'{label}: {pragmas or "-"} / BEGIN {transaction_mode}')
+            self.stdout.write(
+                f'  書き込み {result["writes"] / result["elapsed"]:8.1f}件/秒, '
+                f'読み込み {result["reads"] / result["elapsed"]:8.1f}件/秒, '
+                f'ロックエラー {result["errors"]}件'
+            )
+
+        base, tuned = results
+        if base['writes'] and base['reads']:
+            self.stdout.write('=' * 50)
+            self.stdout.write(self.style.SUCCESS(
+                f'書き込み {tuned["writes"] / base["writes"]:.1f}倍, '
+                f'読み込み {tuned["reads"] / base["reads"]:.1f}倍'
+            ))
+
+    def connect(self, path, pragmas):
+        # Django と同じく自動コミット・タイムアウト5秒で接続
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        apply_sqlite_pragmas(connection.cursor(), pragmas)
+        return connection
+
+    def create_database(self, path, pragmas, rows):
+        connection = self.connect(path, pragmas)
+        connection.execute(
+            'CREATE TABLE booking ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, booking_date TEXT, booking_time TEXT, '
+            'therapist_id INTEGER, status TEXT, notes TEXT)'
+        )
+        connection.execute('CREATE INDEX booking_date_idx ON booking (booking_date)')
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO booking (booking_date, booking_time, therapist_id, status, notes) VALUES (?, ?, ?, ?, ?)',
+            (self.random_row(random.Random(i)) for i in range(rows))
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def random_row(self, rng):
+        day = datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(365))
+        return (
+            day.isoformat(),
+            f'{rng.randrange(10, 20):02d}:{rng.choice(["00", "30"])}',
+            rng.randrange(1, 6),
+            rng.choice(['pending', 'confirmed', 'completed', 'cancelled']),
+            'benchmark',
+        )
+
+    def run(self, path, pragmas, transaction_mode, options):
+        counters = {'writes': 0, 'reads': 0, 'errors': 0}
+        lock = threading.Lock()
+        stop_at = time.monotonic() + options['seconds']
+
+        def count(key):
+            with lock:
+                counters[key] += 1
+
+        def writer(seed):
+            rng = random.Random(seed)
+            connection = self.connect(path, pragmas)
+            while time.monotonic() < stop_at:
+                row = self.random_row(rng)
+                try:
+                    # 予約作成と同様に、重複確認をしてから登録する
+                    connection.execute(f'BEGIN {transaction_mode}')
+                    connection.execute(
+                        'SELECT COUNT(*) FROM booking WHERE booking_date = ? AND booking_time = ? AND therapist_id = ?',
+                        row[:3]
+                    ).fetchone()
+                    connection.execute(
+                        'INSERT INTO booking (booking_date, booking_time, therapist_id, status, notes) VALUES (?, ?, ?, ?, ?)',
+                        row
+                    )
+                    connection.execute('COMMIT')
+                    count('writes')
+                except sqlite3.OperationalError:
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+                    count('errors')
+            connection.close()
+
+        def reader(seed):
+            rng = random.Random(seed)
+            connection = self.connect(path, pragmas)
+            while time.monotonic() < stop_at:
+                day = (datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(365))).isoformat()
+                try:
+                    connection.execute(
+                        "SELECT booking_time, therapist_id FROM booking "
+                        "WHERE booking_date = ? AND status IN ('pending', 'confirmed')",
+                        (day,)
+                    ).fetchall()
+                    count('reads')
+                except sqlite3.OperationalError:
+                    count('errors')
+            connection.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        threads += [threading.Thread(target=reader, args=(1000 + i,)) for i in range(options['readers'])]
+
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        counters['elapsed'] = time.monotonic() - started
+        return counters
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from bookings.models import Therapist
+
+
+class Command(BaseCommand):
+    help = '施術者の写真の縮小版（WebP・JPEG）を作成します（既存の写真の一括変換用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='作成済みの施術者も作成し直す（縮小版の幅を変更した場合など）'
+        )
+
+    def handle(self, *args, **options):
+        therapists = Therapist.objects.exclude(image='').exclude(image__isnull=True)
+
+        created = 0
+        failed = 0
+        for therapist in therapists:
+            before = therapist.image_renditions
+            therapist.refresh_image_renditions(force=options['force'])
+
+            if not therapist.image_renditions:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'{therapist}: 作成できませんでした（{therapist.image.name}）'))
+            elif therapist.image_renditions != before:
+                created += 1
+                widths = ', '.join(str(width) for width, _ in therapist.image_renditions['jpeg'])
+                self.stdout.write(f'{therapist}: {widths}px')
+
+        self.stdout.write('=' * 50)
+        self.stdout.write(f'作成: {created}件 / 失敗: {failed}件 / 対象: {therapists.count()}件')
+        self.stdout.write(self.style.SUCCESS('縮小版の作成が完了しました'))
@@ -0,0 +1,410 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from bookings.models import Booking, Service, Therapist, Customer
+from bookings.utils.booking_draft import TOKEN_FIELD
+from emails.models import EmailLog
+from collections import defaultdict
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+# 負荷試験で作成した顧客のメールアドレス（終了時にこのドメインの顧客・予約を削除する）
+LOADTEST_EMAIL_DOMAIN = 'loadtest.invalid'
+
+TOKEN_PATTERN = re.compile(rf'name="{TOKEN_FIELD}" value="([^"]+)"')
+
+# 確認画面で予約の重複により確定できなかった場合のエラー（bookings/forms.py の validate_booking_time_slot）
+CONFLICT_PATTERN = re.compile(r'予約が重複しています|既に予約が入っています')
+
+# 重複チェックの対象となる予約ステータス（validate_booking_time_slot と同じ）
+OVERLAP_STATUSES = ['pending', 'confirmed']
+
+# 管理画面の閲覧で巡回するページ
+DASHBOARD_PAGES = [
+    ('dashboard_home', 'dashboard:home'),
+    ('dashboard_calendar', 'dashboard:calendar'),
+    ('dashboard_week', 'dashboard:week_calendar'),
+    ('dashboard_sales', 'dashboard:sales_dashboard'),
+    ('dashboard_booking_list', 'dashboard:booking_list'),
+]
+
+
+def percentile(values, percent):
+    """最近傍順位法によるパーセンタイル"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = '予約フォーム（ステップ1〜確認画面）と管理画面の閲覧を同時に再現し、処理能力を計測します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=10,
+            help='同時に操作する利用者数（スレッド数）'
+        )
+
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30.0,
+            help='計測時間（秒）'
+        )
+
+        parser.add_argument(
+            '--available-times-calls',
+            type=int,
+            default=3,
+            help='1回の予約で空き時間APIを呼び出す回数（日付・施術者を変えて検索）'
+        )
+
+        parser.add_argument(
+            '--days-ahead',
+            type=int,
+            default=14,
+            help='予約日として選ぶ日数（明日から何日先まで）'
+        )
+
+        parser.add_argument(
+            '--staff-ratio',
+            type=float,
+            default=0.1,
+            help='管理画面を閲覧する利用者の割合（0〜1）'
+        )
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='乱数のシード（指定すると同じ操作順になる）'
+        )
+
+        parser.add_argument(
+            '--output',
+            help='結果をJSONで保存するファイル（変更前後の比較用）'
+        )
+
+        parser.add_argument(
+            '--keep-data',
+            action='store_true',
+            help='作成した予約・顧客を削除せずに残す'
+        )
+
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='DEBUG=False の環境でも実行する（予約データが作成されます）'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'DEBUG=False の環境では実行できません。本番データに予約が作成されるため、'
+                '検証用のDBで実行するか --force を指定してください'
+            )
+
+        self.services = list(Service.objects.filter(is_active=True))
+        self.therapists = list(Therapist.objects.filter(is_active=True))
+        if not self.services:
+            raise CommandError('有効なサービスがありません。先にサービスを登録してください')
+
+        self.options = options
+        self.today = timezone.localdate()
+        self.host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')),
+            'localhost'
+        )
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.outcomes = defaultdict(int)
+
+        staff_user = User.objects.create_user(
+            f'loadtest-{uuid.uuid4().hex[:8]}', is_staff=True, password=None
+        )
+
+        self.stdout.write(
+            f'同時利用者 {options["concurrency"]}人 / {options["duration"]}秒 / '
+            f'管理画面の閲覧 {options["staff_ratio"]:.0%}'
+        )
+        self.stdout.write('=' * 70)
+
+        # 負荷試験中は実際のメールを送信しない
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            stop_at = time.monotonic() + options['duration']
+            base_seed = options['seed'] if options['seed'] is not None else random.randrange(1 << 30)
+            threads = [
+                threading.Thread(target=self.worker, args=(random.Random(base_seed + i), staff_user, stop_at))
+                for i in range(options['concurrency'])
+            ]
+
+            started = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+
+        try:
+            self.report(elapsed)
+        finally:
+            staff_user.delete()
+            if not options['keep_data']:
+                self.cleanup()
+
+    def worker(self, rng, staff_user, stop_at):
+        """1人の利用者として、終了時刻まで予約または管理画面の閲覧を繰り返す"""
+        try:
+            while time.monotonic() < stop_at:
+                if rng.random() < self.options['staff_ratio']:
+                    self.browse_dashboard(rng, staff_user)
+                    outcome = 'dashboard'
+                else:
+                    outcome = self.run_funnel(rng)
+                with self.lock:
+                    self.outcomes[outcome] += 1
+        finally:
+            connection.close()
+
+    def new_client(self, rng):
+        # 利用者ごとに別のIPアドレスとし、レート制限にかからないようにする
+        address = f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'
+        return Client(REMOTE_ADDR=address, HTTP_HOST=self.host)
+
+    def request(self, client, name, method, url, data=None):
+        """1リクエストを送信し、処理時間とクエリ数を記録"""
+        query_count = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                response = getattr(client, method)(url, data or {})
+                if response.streaming:
+                    b''.join(response.streaming_content)
+        except Exception:
+            response = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self.lock:
+            self.latencies[name].append(elapsed_ms)
+            self.queries[name] += query_count
+            if response is None or response.status_code >= 400:
+                self.errors[name] += 1
+        return response
+
+    def extract_token(self, response):
+        """トークン方式の場合、ページの hidden 項目からトークンを取得"""
+        if response is None or response.status_code != 200:
+            return ''
+        match = TOKEN_PATTERN.search(response.content.decode('utf-8', 'ignore'))
+        return match.group(1) if match else ''
+
+    def run_funnel(self, rng):
+        """お客様1人分の予約操作（ステップ1〜確認画面）"""
+        client = self.new_client(rng)
+        service = rng.choice(self.services)
+
+        self.request(client, 'step1', 'get', reverse('bookings:booking_step1'))
+        response = self.request(client, 'step1_post', 'post', reverse('bookings:booking_step1'), {
+            'service': service.id,
+        })
+        if response is None or response.status_code != 302:
+            return 'failed'
+
+        step2_url = response['Location']
+        token = self.extract_token(self.request(client, 'step2', 'get', step2_url))
+
+        # 日付・施術者を変えて空き時間を検索し、最後に空きがあった条件で予約する
+        selection = None
+        for _ in range(self.options['available_times_calls']):
+            booking_date = self.today + datetime.timedelta(days=rng.randint(1, self.options['days_ahead']))
+            therapist = rng.choice(self.therapists + [None]) if self.therapists else None
+            response = self.request(client, 'available_times', 'get', reverse('bookings:get_available_times'), {
+                'date': booking_date.isoformat(),
+                'service_id': service.id,
+                'therapist_id': therapist.id if therapist else '',
+            })
+            if response is None or response.status_code != 200:
+                continue
+            times = [slot['time'] for slot in response.json().get('available_times', []) if slot['available']]
+            if times:
+                selection = (booking_date, therapist, rng.choice(times))
+        if selection is None:
+            return 'no_availability'
+
+        booking_date, therapist, booking_time = selection
+        response = self.request(client, 'step2_post', 'post', step2_url, {
+            'therapist': therapist.id if therapist else '',
+            'booking_date': booking_date.isoformat(),
+            'booking_time': booking_time,
+            TOKEN_FIELD: token,
+        })
+        if response is None or response.status_code != 302:
+            return 'failed'
+
+        step3_url = response['Location']
+        token = self.extract_token(self.request(client, 'step3', 'get', step3_url))
+        response = self.request(client, 'step3_post', 'post', step3_url, {
+            'customer_name': '負荷試験',
+            'customer_email': f'{uuid.uuid4().hex}@{LOADTEST_EMAIL_DOMAIN}',
+            'customer_phone': '09000000000',
+            'gender': rng.choice(['female', 'male']),
+            'is_first_visit': 'on',
+            'terms_confirmed': 'on',
+            TOKEN_FIELD: token,
+        })
+        if response is None:
+            return 'failed'
+        if response.status_code == 302:
+            # セッション方式: 確認画面へリダイレクト
+            response = self.request(client, 'confirm', 'get', response['Location'])
+        token = self.extract_token(response)
+
+        response = self.request(client, 'confirm_post', 'post', reverse('bookings:booking_confirm'), {
+            TOKEN_FIELD: token,
+        })
+        if response is None:
+            return 'failed'
+        if response.status_code == 302 and response['Location'] == reverse('bookings:booking_complete'):
+            return 'booked'
+        if response.status_code == 200 and CONFLICT_PATTERN.search(response.content.decode('utf-8', 'ignore')):
+            # 空き時間の検索後に他のお客様が同じ時間を予約した
+            return 'conflict'
+        # レート制限・サーバーエラー・トークンの期限切れ・入力エラーなど
+        return 'failed'
+
+    def browse_dashboard(self, rng, staff_user):
+        """スタッフ1人分の管理画面の閲覧"""
+        client = self.new_client(rng)
+        client.force_login(staff_user)
+        for name, view_name in rng.sample(DASHBOARD_PAGES, 3):
+            self.request(client, name, 'get', reverse(view_name))
+
+    def report(self, elapsed):
+        total_requests = sum(len(values) for values in self.latencies.values())
+        funnels = sum(count for outcome, count in self.outcomes.items() if outcome != 'dashboard')
+        attempts = self.outcomes['booked'] + self.outcomes['conflict']
+
+        self.stdout.write(
+            f'{"エンドポイント":<24}{"件数":>7}{"エラー":>7}{"p50(ms)":>10}{"p95(ms)":>10}'
+            f'{"p99(ms)":>10}{"クエリ/件":>10}'
+        )
+        endpoints = {}
+        for name, values in sorted(self.latencies.items()):
+            endpoints[name] = {
+                'count': len(values),
+                'errors': self.errors[name],
+                'p50_ms': round(percentile(values, 50), 1),
+                'p95_ms': round(percentile(values, 95), 1),
+                'p99_ms': round(percentile(values, 99), 1),
+                'queries_per_request': round(self.queries[name] / len(values), 1),
+            }
+            row = endpoints[name]
+            self.stdout.write(
+                f'{name:<24}{row["count"]:>7}{row["errors"]:>7}{row["p50_ms"]:>10.1f}{row["p95_ms"]:>10.1f}'
+                f'{row["p99_ms"]:>10.1f}{row["queries_per_request"]:>10.1f}'
+            )
+
+        double_bookings = self.count_double_bookings()
+
+        summary = {
+            'concurrency': self.options['concurrency'],
+            'elapsed_seconds': round(elapsed, 1),
+            'requests': total_requests,
+            'requests_per_second': round(total_requests / elapsed, 1),
+            'funnels': funnels,
+            'bookings_per_second': round(self.outcomes['booked'] / elapsed, 2),
+            'outcomes': dict(self.outcomes),
+            'conflict_rate': round(self.outcomes['conflict'] / attempts, 3) if attempts else 0.0,
+            'double_bookings': double_bookings,
+            'double_booking_rate': (
+                round(double_bookings / self.outcomes['booked'], 3) if self.outcomes['booked'] else 0.0
+            ),
+            'endpoints': endpoints,
+        }
+
+        self.stdout.write('=' * 70)
+        self.stdout.write(
+            f'リクエスト {total_requests}件 ({summary["requests_per_second"]}件/秒), '
+            f'予約操作 {funnels}回'
+        )
+        self.stdout.write(
+            f'予約完了 {self.outcomes["booked"]}件, 重複で失敗 {self.outcomes["conflict"]}件 '
+            f'(重複率 {summary["conflict_rate"]:.1%}), 空きなし {self.outcomes["no_availability"]}件, '
+            f'その他の失敗 {self.outcomes["failed"]}件'
+        )
+        self.stdout.write(
+            f'時間が重なった予約 {double_bookings}件 (二重予約率 {summary["double_booking_rate"]:.1%})'
+        )
+
+        if self.options['output']:
+            with open(self.options['output'], 'w', encoding='utf-8') as output:
+                json.dump(summary, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f'結果を保存しました: {self.options["output"]}')
+
+        if double_bookings:
+            self.stdout.write(self.style.WARNING('同じ施術者の予約が重なっています。重複チェックを確認してください'))
+        if any(self.errors.values()):
+            self.stdout.write(self.style.WARNING('エラー応答があります。ログを確認してください'))
+        elif not double_bookings:
+            self.stdout.write(self.style.SUCCESS('計測完了'))
+
+    def count_double_bookings(self):
+        """
+        負荷試験で作成した予約のうち、他の有効な予約と時間が重なった件数
+        （施術者の指名ありは同じ施術者の予約、指名なしはその日のすべての予約と比べる。重複チェックと同じ条件）
+        """
+        created = Booking.objects.filter(
+            customer__email__endswith=f'@{LOADTEST_EMAIL_DOMAIN}', status__in=OVERLAP_STATUSES
+        )
+        bookings_by_date = defaultdict(list)
+        for booking_id, therapist_id, booking_date, booking_time, duration, email in Booking.objects.filter(
+            booking_date__in=created.values('booking_date'), status__in=OVERLAP_STATUSES
+        ).values_list(
+            'id', 'therapist_id', 'booking_date', 'booking_time', 'service__duration_minutes', 'customer__email'
+        ):
+            start = datetime.datetime.combine(booking_date, booking_time)
+            bookings_by_date[booking_date].append((
+                booking_id, therapist_id, start, start + datetime.timedelta(minutes=duration),
+                email.endswith(f'@{LOADTEST_EMAIL_DOMAIN}'),
+            ))
+
+        double_bookings = 0
+        for bookings in bookings_by_date.values():
+            for booking_id, therapist_id, start, end, is_loadtest in bookings:
+                if is_loadtest and any(
+                    other_id != booking_id and start < other_end and other_start < end
+                    and (therapist_id is None or other_therapist_id == therapist_id)
+                    for other_id, other_therapist_id, other_start, other_end, _ in bookings
+                ):
+                    double_bookings += 1
+        return double_bookings
+
+    def cleanup(self):
+        """負荷試験で作成した予約・顧客・メールログを削除"""
+        customers = Customer.objects.filter(email__endswith=f'@{LOADTEST_EMAIL_DOMAIN}')
+        EmailLog.objects.filter(booking__customer__in=customers).delete()
+        EmailLog.objects.filter(recipient_email__endswith=f'@{LOADTEST_EMAIL_DOMAIN}').delete()
+        deleted, _ = customers.delete()
+        self.stdout.write(f'負荷試験のデータを削除しました（{deleted}件）')
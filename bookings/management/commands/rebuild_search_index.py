@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from bookings.utils.search import is_search_index_available, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = '顧客・予約の検索インデックス（全文検索）を作り直します（データの一括登録・移行後の修復用）'
+
+    def handle(self, *args, **options):
+        if not is_search_index_available():
+            self.stdout.write(
+                self.style.WARNING('全文検索インデックスは SQLite のみ対応しています。')
+            )
+            return
+
+        with transaction.atomic():
+            customers, bookings = rebuild_search_index()
+
+        self.stdout.write('=' * 50)
+        self.stdout.write(f'顧客: {customers}名 / 備考のある予約: {bookings}件')
+        self.stdout.write(self.style.SUCCESS('検索インデックスの作成が完了しました'))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from bookings.models import Customer
+from bookings.utils.customer_stats import STATS_FIELDS, recompute_customer_stats
+
+
+class Command(BaseCommand):
+    help = '顧客の利用実績（予約数・初回/最終予約日・累計売上）を予約から集計し直します（ずれた場合の修復用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customer',
+            type=int,
+            action='append',
+            help='対象の顧客ID（複数指定可。省略時はすべての顧客）'
+        )
+
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='実際には変更せず、値がずれている顧客のみ表示'
+        )
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.all()
+        if options['customer']:
+            customers = customers.filter(pk__in=options['customer'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('※ DRY RUN モード: 実際の変更は行いません'))
+
+        def stats():
+            return {row[0]: row[1:] for row in customers.values_list('pk', *STATS_FIELDS)}
+
+        before = stats()
+        with transaction.atomic():
+            updated = recompute_customer_stats(options['customer'])
+            after = stats()
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        changed = [pk for pk, values in after.items() if before.get(pk) != values]
+        for pk in changed[:20]:
+            differences = ', '.join(
+                f'{field}: {old} → {new}'
+                for field, old, new in zip(STATS_FIELDS, before[pk], after[pk]) if old != new
+            )
+            self.stdout.write(f'顧客ID {pk}: {differences}')
+        if len(changed) > 20:
+            self.stdout.write(f'...ほか {len(changed) - 20} 名')
+
+        self.stdout.write('=' * 50)
+        self.stdout.write(f'対象: {updated}名 / 値がずれていた顧客: {len(changed)}名')
+        self.stdout.write(self.style.SUCCESS('顧客の利用実績の集計が完了しました'))
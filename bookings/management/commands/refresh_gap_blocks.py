@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from bookings.models import BookingSettings, GapBlock
+from bookings.utils.availability import invalidate_availability
 from datetime import timedelta
 
 class Command(BaseCommand):
@@ -58,6 +59,7 @@ class Command(BaseCommand):
             
             if not options['dry_run']:
                 GapBlock.objects.filter(is_auto_generated=True).delete()
+                invalidate_availability()
             
             self.stdout.write(self.style.SUCCESS('既存ブロックを削除しました'))
 
@@ -79,6 +81,7 @@ class Command(BaseCommand):
                         block_date=current_date,
                         is_auto_generated=True
                     ).delete()
+                    invalidate_availability([current_date])
                     
                     # 新しいブロックを生成
                     settings._generate_gap_blocks_for_date(current_date)
@@ -0,0 +1,126 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from bookings.utils.bench_data import generate_bench_data, clear_bench_data
+import time
+
+
+class Command(BaseCommand):
+    help = '性能計測用の大量データ（サービス・施術者・顧客・予約・予定・空白時間ブロック・メールログ）を作成します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customers',
+            type=int,
+            default=5000,
+            help='顧客数'
+        )
+
+        parser.add_argument(
+            '--years',
+            type=float,
+            default=2.0,
+            help='過去何年分の予約を作成するか'
+        )
+
+        parser.add_argument(
+            '--days-ahead',
+            type=int,
+            default=60,
+            help='今日から何日先までの予約を作成するか'
+        )
+
+        parser.add_argument(
+            '--bookings-per-day',
+            type=int,
+            default=16,
+            help='1日あたりの予約数'
+        )
+
+        parser.add_argument(
+            '--services',
+            type=int,
+            default=4,
+            help='サービス数（最大6）'
+        )
+
+        parser.add_argument(
+            '--therapists',
+            type=int,
+            default=6,
+            help='施術者数'
+        )
+
+        parser.add_argument(
+            '--no-email-logs',
+            action='store_true',
+            help='メールログを作成しない'
+        )
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='乱数のシード（同じ値・件数なら同じデータになる）'
+        )
+
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='以前に作成した計測用データを削除してから作成'
+        )
+
+        parser.add_argument(
+            '--clear-only',
+            action='store_true',
+            help='計測用データを削除するだけで、新しく作成しない'
+        )
+
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='DEBUG=False の環境でも実行する'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'DEBUG=False の環境では実行できません。検証用のDBで実行するか --force を指定してください'
+            )
+
+        if options['clear'] or options['clear_only']:
+            deleted = clear_bench_data()
+            self.stdout.write(f'以前の計測用データを削除しました（{deleted}件）')
+            if options['clear_only']:
+                return
+
+        self.stdout.write(
+            f'計測用データを作成します（顧客 {options["customers"]}人, 過去{options["years"]}年 + '
+            f'{options["days_ahead"]}日先, 1日 {options["bookings_per_day"]}件, シード {options["seed"]}）'
+        )
+
+        started = time.perf_counter()
+        data = generate_bench_data(
+            customers=options['customers'],
+            days_past=int(options['years'] * 365),
+            days_ahead=options['days_ahead'],
+            bookings_per_day=options['bookings_per_day'],
+            services=options['services'],
+            therapists=options['therapists'],
+            email_logs=not options['no_email_logs'],
+            seed=options['seed'],
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write('=' * 50)
+        for label, key in [
+            ('サービス', 'services'),
+            ('施術者', 'therapists'),
+            ('顧客', 'customers'),
+            ('予約', 'bookings'),
+            ('予定', 'schedules'),
+            ('空白時間ブロック', 'gap_blocks'),
+            ('メールログ', 'email_logs'),
+        ]:
+            self.stdout.write(f'{label:<10}{len(data[key]):>10}件')
+        self.stdout.write('=' * 50)
+        self.stdout.write(self.style.SUCCESS(f'作成完了（{elapsed:.1f}秒）'))
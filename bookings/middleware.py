@@ -1,44 +1,50 @@
-from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connection
 from django.http import HttpResponse
+from django.shortcuts import render
 from django.utils import timezone
-from django.conf import settings
+from .utils.maintenance import is_maintenance_active
+from .utils.profiling import (
+    end_profile, get_excluded_paths, get_sample_rate, install_template_timer,
+    is_profiling_enabled, save_profile, start_profile,
+)
+from .utils.rate_limit import check_policy, get_booking_policies, get_suspicious_activity_policy
 import json
+import logging
+import random
+
+logger = logging.getLogger(__name__)
 
 class BookingSecurityMiddleware:
     """予約セキュリティ用ミドルウェア"""
     
     def __init__(self, get_response):
         self.get_response = get_response
+        # パスごとのレート制限ポリシー
+        self.policies = get_booking_policies()
         
     def __call__(self, request):
         # 予約フォームへのアクセス制限
-        if request.path == '/booking/' and request.method == 'POST':
-            if not self.check_rate_limit(request):
-                return HttpResponse(
+        for policy in self.policies:
+            if not policy.matches(request):
+                continue
+            
+            result = self.check_rate_limit(request, policy)
+            if not result:
+                response = HttpResponse(
                     "申し訳ございません。短時間での予約申込みが多すぎます。しばらく時間をおいてからお試しください。",
                     status=429
                 )
+                response['Retry-After'] = str(result.retry_after)
+                return response
         
         response = self.get_response(request)
         return response
     
-    def check_rate_limit(self, request):
-        """IP制限チェック"""
+    def check_rate_limit(self, request, policy):
+        """IP制限チェック（スライディングウィンドウ）"""
         ip_address = self.get_client_ip(request)
-        
-        # IP単位の制限（1時間に3回まで）
-        ip_key = f"booking_rate_limit_ip_{ip_address}"
-        ip_attempts = cache.get(ip_key, 0)
-        
-        hourly_limit = getattr(settings, 'BOOKING_HOURLY_LIMIT_PER_IP', 3)
-        
-        if ip_attempts >= hourly_limit:
-            return False
-        
-        # カウントを増加
-        cache.set(ip_key, ip_attempts + 1, 3600)  # 1時間
-        
-        return True
+        return check_policy(policy, ip_address)
     
     def get_client_ip(self, request):
         """クライアントIPアドレスを取得"""
@@ -71,6 +77,7 @@ class SuspiciousActivityMiddleware:
     
     def __init__(self, get_response):
         self.get_response = get_response
+        self.policy = get_suspicious_activity_policy()
         
     def __call__(self, request):
         # 不審なパターンを検出（APIリクエストは除外）
@@ -97,25 +104,9 @@ class SuspiciousActivityMiddleware:
         ip_address = self.get_client_ip(request)
         
         # 短時間での大量アクセス検出（フォーム送信のみ）
-        if request.path.startswith('/booking/') and request.method == 'POST':
-            access_key = f"booking_access_{ip_address}"
-            current_time = timezone.now().timestamp()
-            
-            # 過去5分間のアクセス履歴を取得
-            access_history = cache.get(access_key, [])
-            
-            # 古いアクセス履歴を削除（5分以内のみ保持）
-            access_history = [
-                timestamp for timestamp in access_history 
-                if current_time - timestamp < 300  # 5分
-            ]
-            
-            # 新しいアクセスを追加
-            access_history.append(current_time)
-            cache.set(access_key, access_history, 300)
-            
-            # 5分間に5回以上のフォーム送信は不審とみなす
-            if len(access_history) > 5:
+        if self.policy.matches(request):
+            result = check_policy(self.policy, ip_address)
+            if not result:
                 return True
         
         return False
@@ -163,31 +154,64 @@ class MaintenanceModeMiddleware:
             request.path.startswith('/media/')):
             return self.get_response(request)
         
-        # メンテナンスモードの確認
+        # 予約関連のページのみ対象（トップページとセラピスト紹介は閲覧可能）
+        if not (request.path.startswith('/booking/') or
+                request.path.startswith('/bookings/') or
+                request.path.startswith('/en/booking/')):
+            return self.get_response(request)
+        
+        # メンテナンスモードの確認（プロセス内キャッシュを使用し、通常はDBにアクセスしない）
         try:
-            from .models import MaintenanceMode
-            maintenance = MaintenanceMode.get_current_settings()
+            is_active, maintenance = is_maintenance_active()
+        except DatabaseError as e:
+            # テーブル未作成などの場合は通常処理を継続
+            logger.warning(f"メンテナンスモードの確認に失敗しました: {str(e)}")
+            return self.get_response(request)
+        
+        if is_active:
+            # メンテナンス画面を表示
+            context = {
+                'maintenance': maintenance,
+                'title': 'メンテナンス中 - GRACE SPA'
+            }
             
-            if maintenance.is_enabled:
-                # 予約関連のページのみにアクセスした場合（ホームとセラピスト紹介は除外）
-                if (request.path.startswith('/booking/') or
-                    request.path.startswith('/bookings/')):  # トップページとセラピスト紹介は閲覧可能
-                    
-                    # メンテナンス画面を表示
-                    from django.shortcuts import render
-                    from django.http import HttpResponse
-                    
-                    context = {
-                        'maintenance': maintenance,
-                        'title': 'メンテナンス中 - GRACE SPA'
-                    }
-                    
-                    response = render(request, 'maintenance.html', context)
-                    response.status_code = 503  # Service Unavailable
-                    return response
-                    
-        except Exception:
-            # メンテナンスモードの確認でエラーが発生した場合は通常処理を継続
-            pass
-        
-        return self.get_response(request)
\ No newline at end of file
+            response = render(request, 'maintenance.html', context)
+            response.status_code = 503  # Service Unavailable
+            return response
+        
+        return self.get_response(request)
+
+class ProfilingMiddleware:
+    """
+    リクエストごとの処理時間・DBクエリ・テンプレート描画時間を計測するミドルウェア
+    PROFILING_ENABLED=True のときのみ有効。PROFILING_SAMPLE_RATE の割合のリクエストを計測し、
+    Server-Timing ヘッダーを付与して /dashboard/perf/ 用に結果を保存する
+    """
+    
+    def __init__(self, get_response):
+        if not is_profiling_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = get_sample_rate()
+        self.excluded_paths = tuple(get_excluded_paths())
+        install_template_timer()
+        
+    def __call__(self, request):
+        if request.path.startswith(self.excluded_paths) or random.random() >= self.sample_rate:
+            return self.get_response(request)
+        
+        profile, token = start_profile()
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            end_profile(token)
+        profile.finish()
+        
+        response['Server-Timing'] = profile.server_timing()
+        try:
+            save_profile(request, response, profile)
+        except Exception as e:
+            # 計測結果の保存に失敗してもレスポンスには影響させない
+            logger.warning(f"プロファイリング結果の保存に失敗しました: {str(e)}")
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_booking_schedule_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='therapist',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='写真の縮小版'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:08
+
+from django.db import migrations, models
+import django.db.models.expressions
+from django.db.models import Count, IntegerField, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_customer_stats(apps, schema_editor):
+    """既存の予約から顧客の利用実績を集計（bookings/utils/customer_stats.py の recompute_customer_stats と同じ内容）"""
+    Booking = apps.get_model('bookings', 'Booking')
+    Customer = apps.get_model('bookings', 'Customer')
+
+    bookings = Booking.objects.filter(customer=OuterRef('pk')).order_by().values('customer')
+    active = bookings.filter(status__in=['confirmed', 'completed'])
+
+    def count(status):
+        return Coalesce(Subquery(bookings.filter(status=status).annotate(value=Count('id')).values('value')), 0)
+
+    Customer.objects.update(
+        completed_booking_count=count('completed'),
+        confirmed_booking_count=count('confirmed'),
+        first_booking_date=Subquery(active.annotate(value=Min('booking_date')).values('value')),
+        last_booking_date=Subquery(active.annotate(value=Max('booking_date')).values('value')),
+        lifetime_revenue=Coalesce(
+            Subquery(bookings.filter(status='completed').annotate(value=Sum('service__price')).values('value')),
+            0, output_field=IntegerField()
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_therapist_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='completed_booking_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='完了した予約数'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='confirmed_booking_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='確定した予約数'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='first_booking_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='初回予約日'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='last_booking_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='最終予約日'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='lifetime_revenue',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='累計売上'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('completed_booking_count'), '+', models.F('confirmed_booking_count')), name='customer_active_count_idx'),
+        ),
+        migrations.RunPython(populate_customer_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:14
+
+from django.db import migrations, models
+import re
+
+# 全文検索インデックス（bookings/utils/search.py）。trigram トークナイザは SQLite 3.34 以降
+CREATE_SEARCH_TABLES = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS customer_search USING fts5(name, email, phone, tokenize='trigram')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS booking_search USING fts5(notes, tokenize='trigram')",
+]
+DROP_SEARCH_TABLES = [
+    'DROP TABLE IF EXISTS customer_search',
+    'DROP TABLE IF EXISTS booking_search',
+]
+
+
+def populate_normalized_fields(apps, schema_editor):
+    """既存の顧客の検索用の電話番号・メールアドレスを設定"""
+    Customer = apps.get_model('bookings', 'Customer')
+    customers = list(Customer.objects.only('id', 'phone', 'email'))
+    for customer in customers:
+        customer.phone_normalized = re.sub(r'\D', '', customer.phone or '')
+        customer.email_normalized = (customer.email or '').strip().lower()
+    Customer.objects.bulk_update(customers, ['phone_normalized', 'email_normalized'], batch_size=500)
+
+
+def create_search_tables(apps, schema_editor):
+    """全文検索インデックスを作成し、既存の顧客・予約を登録（SQLite のみ）"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SEARCH_TABLES:
+        schema_editor.execute(sql)
+    schema_editor.execute(
+        'INSERT INTO customer_search (rowid, name, email, phone) '
+        'SELECT id, name, email, phone_normalized FROM bookings_customer'
+    )
+    schema_editor.execute(
+        "INSERT INTO booking_search (rowid, notes) SELECT id, notes FROM bookings_booking WHERE notes != ''"
+    )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SEARCH_TABLES:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_customer_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='email_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254, verbose_name='メールアドレス（検索用）'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, verbose_name='電話番号（検索用）'),
+        ),
+        migrations.RunPython(populate_normalized_fields, migrations.RunPython.noop),
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
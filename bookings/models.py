@@ -4,6 +4,12 @@ from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 import datetime
+import logging
+
+from .utils.availability import invalidate_availability
+from .utils.search import normalize_email, normalize_phone
+
+logger = logging.getLogger(__name__)
 
 class Service(models.Model):
     """サービスモデル"""
@@ -47,6 +53,8 @@ class Therapist(models.Model):
     description = models.TextField('紹介文', blank=True)
     description_en = models.TextField('紹介文（英語）', blank=True, default='')  # ★ 追加
     image = models.ImageField('写真', upload_to='therapists/', blank=True, null=True)
+    # 写真の縮小版（WebP・JPEG）の一覧。保存時に自動作成（bookings/utils/images.py）
+    image_renditions = models.JSONField('写真の縮小版', default=dict, blank=True, editable=False)
     is_active = models.BooleanField('有効', default=True)
     sort_order = models.PositiveIntegerField('表示順', default=0)
     created_at = models.DateTimeField('作成日時', auto_now_add=True)
@@ -60,6 +68,38 @@ class Therapist(models.Model):
     def __str__(self):
         return self.display_name
     
+    def save(self, *args, **kwargs):
+        if self.image and not self.image._committed:
+            # 縮小版の作成には確定したファイル名が必要なため、先に写真を保存する（FileField.pre_save と同じ処理）
+            self.image.save(self.image.name, self.image.file, save=False)
+        # 保存後の処理（公開ページのキャッシュ無効化など）で縮小版が参照できるよう、保存前に作成する
+        self.image_renditions = self._build_image_renditions()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'image' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'image_renditions'}
+        super().save(*args, **kwargs)
+    
+    def _build_image_renditions(self, force=False):
+        """写真が変更されていれば縮小版を作成する（作成できない場合は元の写真をそのまま表示する）"""
+        if not self.image:
+            return {}
+        if not force and self.image_renditions.get('source') == self.image.name:
+            return self.image_renditions
+        
+        from .utils.images import generate_renditions
+        try:
+            return generate_renditions(self.image)
+        except Exception as e:
+            logger.warning(f"施術者の写真の縮小版を作成できませんでした（{self.image.name}）: {str(e)}")
+            return {}
+    
+    def refresh_image_renditions(self, force=False):
+        """縮小版を作成し直して保存（既存の写真の一括変換用）"""
+        renditions = self._build_image_renditions(force=force)
+        if renditions != self.image_renditions:
+            self.image_renditions = renditions
+            self.save(update_fields=['image_renditions'])
+    
     # ★ 追加: 言語に応じた表示名を返すメソッド
     def get_display_name(self, language='ja'):
         """言語に応じた表示名を返す"""
@@ -103,6 +143,17 @@ class Customer(models.Model):
         help_text='初回利用かどうか'
     )
     
+    # 検索用に正規化した電話番号（数字のみ）・メールアドレス（小文字）。保存時に設定（bookings/utils/search.py）
+    phone_normalized = models.CharField('電話番号（検索用）', max_length=20, blank=True, db_index=True, editable=False)
+    email_normalized = models.CharField('メールアドレス（検索用）', max_length=254, blank=True, db_index=True, editable=False)
+    
+    # 利用実績（予約の保存・削除時に更新。bookings/utils/customer_stats.py）
+    completed_booking_count = models.PositiveIntegerField('完了した予約数', default=0, editable=False)
+    confirmed_booking_count = models.PositiveIntegerField('確定した予約数', default=0, editable=False)
+    first_booking_date = models.DateField('初回予約日', null=True, blank=True, editable=False)
+    last_booking_date = models.DateField('最終予約日', null=True, blank=True, editable=False)
+    lifetime_revenue = models.PositiveIntegerField('累計売上', default=0, editable=False)
+    
     created_at = models.DateTimeField('作成日時', auto_now_add=True)
     updated_at = models.DateTimeField('更新日時', auto_now=True)
     
@@ -110,24 +161,33 @@ class Customer(models.Model):
         verbose_name = '顧客'
         verbose_name_plural = '顧客'
         ordering = ['-created_at']
+        indexes = [
+            # 予約回数（確定・完了）による絞り込み・並び替え（リピーター・常連客）
+            models.Index(
+                models.F('completed_booking_count') + models.F('confirmed_booking_count'),
+                name='customer_active_count_idx'
+            ),
+        ]
     
     def __str__(self):
         return self.name
     
-    @property
-    def booking_count(self):
-        """予約回数を返す"""
-        return self.booking_set.filter(
-            status__in=['confirmed', 'completed']
-        ).count()
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone)
+        self.email_normalized = normalize_email(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields,
+                *(['phone_normalized'] if 'phone' in update_fields else []),
+                *(['email_normalized'] if 'email' in update_fields else []),
+            }
+        super().save(*args, **kwargs)
     
     @property
-    def last_booking_date(self):
-        """最終予約日を返す"""
-        last_booking = self.booking_set.filter(
-            status__in=['confirmed', 'completed']
-        ).order_by('-booking_date').first()
-        return last_booking.booking_date if last_booking else None
+    def booking_count(self):
+        """予約回数（確定・完了）を返す"""
+        return self.completed_booking_count + self.confirmed_booking_count
     
 class Booking(models.Model):
     """予約モデル"""
@@ -153,6 +213,12 @@ class Booking(models.Model):
         verbose_name_plural = '予約'
         ordering = ['-booking_date', '-booking_time']
         unique_together = ['therapist', 'booking_date', 'booking_time']
+        indexes = [
+            # 空き時間検索・重複チェック（日付 + 施術者 + ステータス）
+            models.Index(fields=['booking_date', 'therapist', 'status'], name='booking_date_ther_status_idx'),
+            # 承認待ち件数など、ステータスでの絞り込み
+            models.Index(fields=['status', 'booking_date'], name='booking_status_date_idx'),
+        ]
     
     def __str__(self):
         therapist_name = self.therapist.display_name if self.therapist else "指名なし"
@@ -312,8 +378,9 @@ class BookingSettings(models.Model):
         """空白時間ブロックを再計算・更新"""
         from datetime import datetime, timedelta
         
-        # 既存の自動生成されたギャップブロックを削除
+        # 既存の自動生成されたギャップブロックを削除（一括削除ではシグナルが送られないため、空き時間も無効化する）
         GapBlock.objects.filter(is_auto_generated=True).delete()
+        invalidate_availability()
         
         # 今日から advance_booking_days 日先まで処理
         today = timezone.now().date()
@@ -487,6 +554,14 @@ class Schedule(models.Model):
         verbose_name = '予定'
         verbose_name_plural = '予定'
         ordering = ['-schedule_date', 'start_time']
+        indexes = [
+            # 有効な予定のみの部分インデックス（空き時間検索・カレンダー表示）
+            models.Index(
+                fields=['schedule_date', 'therapist'],
+                name='schedule_active_date_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
     
     def __str__(self):
         therapist_name = self.therapist.display_name if self.therapist else "全体"
@@ -505,7 +580,7 @@ class Schedule(models.Model):
         conflicting_bookings = Booking.objects.filter(
             booking_date=self.schedule_date,
             status__in=['pending', 'confirmed']
-        )
+        ).select_related('customer', 'service')
         
         if self.therapist:
             conflicting_bookings = conflicting_bookings.filter(therapist=self.therapist)
@@ -645,10 +720,24 @@ class MaintenanceMode(models.Model):
         )
         return settings
     
+    def is_active_at(self, now):
+        """指定日時にメンテナンス中かどうか（開始・終了予定日時の範囲を考慮）"""
+        if not self.is_enabled:
+            return False
+        if self.start_time and now < self.start_time:
+            return False
+        if self.end_time and now >= self.end_time:
+            return False
+        return True
+    
     def save(self, *args, **kwargs):
         """シングルトンパターンを保証"""
         self.pk = 1
         super().save(*args, **kwargs)
+        
+        # ミドルウェアのキャッシュを無効化
+        from .utils.maintenance import invalidate_maintenance_cache
+        invalidate_maintenance_cache()
     
     def delete(self, *args, **kwargs):
         """削除を禁止"""
@@ -0,0 +1,180 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import Signal, receiver
+from .models import Booking, BookingSettings, BusinessHours, Customer, GapBlock, Schedule, Service, Therapist
+from .utils.availability import invalidate_availability
+from .utils.catalog import invalidate_catalog
+from .utils.customer_stats import apply_booking_change, booking_state, recompute_customer_stats
+from .utils.search import BOOKING_SEARCH_TABLE, CUSTOMER_SEARCH_TABLE, index_booking, index_customer, unindex
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 管理画面の一括操作で予約のステータスをまとめて変更した（bookings/utils/bulk_actions.py）
+# 予約ごとの post_save は発生しないため、受信側で変更後の処理を一括で行う
+# 引数: changes（予約と変更前のステータスの組のリスト）, new_status
+# 一括操作のトランザクション内で送信されるため、データベースに書き込む受信側はセーブポイント（transaction.atomic()）内で書き込み、
+# 失敗してもログに記録して一括操作を続けること
+booking_status_bulk_changed = Signal()
+
+# 日付ごとに空き時間が変わるモデルと、その日付のフィールド
+DATED_MODELS = {
+    Booking: 'booking_date',
+    Schedule: 'schedule_date',
+    GapBlock: 'block_date',
+}
+
+
+def _invalidate(days=None):
+    try:
+        invalidate_availability(days)
+    except Exception as e:
+        logger.error(f"空き時間キャッシュ無効化エラー: {str(e)}")
+
+
+# 変更前の状態を記録する項目（保存前に取得し、各アプリの post_save の受信側で共有する）
+PREVIOUS_STATE_FIELDS = {
+    Booking: ('customer_id', 'status', 'booking_date', 'service_id', 'notes'),
+    Schedule: ('schedule_date',),
+    GapBlock: ('block_date',),
+    Service: ('price',),
+}
+
+
+def get_previous_state(instance):
+    """pre_save で記録した変更前の状態（項目名と値の辞書。新規作成時は None）"""
+    return getattr(instance, '_previous_state', None)
+
+
+@receiver(pre_save, sender=Booking)
+@receiver(pre_save, sender=Schedule)
+@receiver(pre_save, sender=GapBlock)
+@receiver(pre_save, sender=Service)
+def previous_state_handler(sender, instance, **kwargs):
+    """
+    変更前の状態を記録（空き時間・ダッシュボードの移動元の日、顧客の実績（予約・サービス料金の変更）、検索インデックス、ステータス変更メールに使う）
+    既存の予約・予定・空白時間ブロック・サービスの保存1回につき SELECT 1回（新規作成時はクエリなし）
+    他のアプリは pre_save で取得し直さず、get_previous_state() で参照すること
+    """
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = sender.objects.filter(
+            pk=instance.pk
+        ).values(*PREVIOUS_STATE_FIELDS[sender]).first()
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+@receiver(post_save, sender=GapBlock)
+@receiver(post_delete, sender=GapBlock)
+def availability_day_changed_handler(sender, instance, **kwargs):
+    """予約・予定・空白時間ブロックの変更時に、その日（と移動元の日）の空き時間を無効化"""
+    field = DATED_MODELS[sender]
+    days = [getattr(instance, field)]
+    previous = get_previous_state(instance)
+    if previous:
+        days.append(previous[field])
+    _invalidate(days)
+
+
+def _apply_customer_stats(instance, previous, current):
+    # 実績の更新に失敗しても予約の保存は止めない（manage.py recompute_customer_stats で集計し直せる）
+    try:
+        apply_booking_change(previous, current)
+    except Exception as e:
+        logger.error(f"顧客実績更新エラー: {instance} - {str(e)}")
+
+
+@receiver(post_save, sender=Booking)
+def customer_stats_saved_handler(sender, instance, **kwargs):
+    """予約の作成・変更を顧客の実績に反映"""
+    previous = get_previous_state(instance)
+    _apply_customer_stats(instance, previous and booking_state(previous), booking_state(instance))
+
+
+@receiver(post_delete, sender=Booking)
+def customer_stats_deleted_handler(sender, instance, **kwargs):
+    """予約の削除を顧客の実績に反映"""
+    _apply_customer_stats(instance, booking_state(instance), None)
+
+
+@receiver(booking_status_bulk_changed)
+def customer_stats_bulk_changed_handler(sender, changes, **kwargs):
+    """一括操作でのステータス変更後、対象の顧客の実績をまとめて集計し直す"""
+    try:
+        # 失敗しても一括操作のトランザクションを壊さないよう、セーブポイント内で更新する
+        with transaction.atomic():
+            recompute_customer_stats({booking.customer_id for booking, old_status in changes})
+    except Exception as e:
+        logger.error(f"顧客実績更新エラー: {len(changes)}件 - {str(e)}")
+
+
+@receiver(post_save, sender=Service)
+def customer_stats_price_changed_handler(sender, instance, **kwargs):
+    """サービス料金の変更時に、そのサービスの完了した予約がある顧客の実績（累計売上）を集計し直す"""
+    previous = get_previous_state(instance)
+    if not previous or previous['price'] == instance.price:
+        return
+    try:
+        recompute_customer_stats(
+            Booking.objects.filter(service=instance, status='completed').values('customer')
+        )
+    except Exception as e:
+        logger.error(f"顧客実績更新エラー: {instance} - {str(e)}")
+
+
+@receiver(post_save, sender=Customer)
+def customer_search_saved_handler(sender, instance, update_fields=None, **kwargs):
+    """顧客の作成・変更を検索インデックスに反映（検索対象の項目を保存しない場合は何もしない）"""
+    if update_fields is not None and not {'name', 'email', 'phone'} & set(update_fields):
+        return
+    index_customer(instance)
+
+
+@receiver(post_delete, sender=Customer)
+def customer_search_deleted_handler(sender, instance, **kwargs):
+    unindex(CUSTOMER_SEARCH_TABLE, instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+def booking_search_saved_handler(sender, instance, update_fields=None, **kwargs):
+    """予約の備考を検索インデックスに反映（備考を保存しない・変わらない場合は何もしない）"""
+    if update_fields is not None and 'notes' not in update_fields:
+        return
+    previous = get_previous_state(instance)
+    if instance.notes == (previous['notes'] if previous else ''):
+        return
+    index_booking(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_search_deleted_handler(sender, instance, **kwargs):
+    if instance.notes:
+        unindex(BOOKING_SEARCH_TABLE, instance.pk)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Therapist)
+@receiver(post_delete, sender=Therapist)
+@receiver(post_save, sender=BusinessHours)
+@receiver(post_delete, sender=BusinessHours)
+@receiver(post_save, sender=BookingSettings)
+@receiver(post_delete, sender=BookingSettings)
+def availability_settings_changed_handler(sender, **kwargs):
+    """営業時間・予約設定・サービス・施術者の変更時に、すべての日の空き時間を無効化"""
+    _invalidate()
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Therapist)
+@receiver(post_delete, sender=Therapist)
+def catalog_changed_handler(sender, **kwargs):
+    """サービス・施術者の変更時に、表示用の一覧（カタログ）を作り直す"""
+    try:
+        invalidate_catalog(services=sender is Service, therapists=sender is Therapist)
+    except Exception as e:
+        logger.error(f"カタログキャッシュ無効化エラー: {str(e)}")
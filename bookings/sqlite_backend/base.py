@@ -0,0 +1,21 @@
+# bookings/sqlite_backend/base.py
+# Django 標準の SQLite バックエンドに、トランザクション開始方法の設定を追加する
+#
+# 標準では "BEGIN"（DEFERRED）で開始するため、読み込み後に書き込もうとした時点で
+# 他の接続が書き込み中だと busy_timeout を待たずに "database is locked" になる。
+# settings.SQLITE_TRANSACTION_MODE = 'IMMEDIATE' の場合は開始時に書き込みロックを取得し、
+# ロック待ちは busy_timeout の範囲で待機させる（Django 5.1 の transaction_mode と同等）
+
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        mode = getattr(settings, 'SQLITE_TRANSACTION_MODE', 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(f'SQLITE_TRANSACTION_MODE の値が不正です: {mode}')
+        self.cursor().execute(f'BEGIN {mode}')
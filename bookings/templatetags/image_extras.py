@@ -0,0 +1,46 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+def _srcset(renditions):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in renditions)
+
+
+@register.simple_tag
+def responsive_image(image, renditions, alt='', sizes='100vw', css_class=''):
+    """
+    縮小版（bookings/utils/images.py）の srcset 付きで画像を表示するタグ
+    縮小版がない場合は元の画像をそのまま表示する
+
+    例: {% responsive_image therapist.image therapist.image_renditions alt=therapist.display_name sizes="300px" %}
+    """
+    if not image:
+        return ''
+
+    attrs = {'alt': alt, 'loading': 'lazy', 'decoding': 'async'}
+    if css_class:
+        attrs['class'] = css_class
+
+    if not renditions or not renditions.get('jpeg'):
+        attrs['src'] = image.url
+        return format_html('<img {}>', format_html_join(' ', '{}="{}"', attrs.items()))
+
+    jpeg = renditions['jpeg']
+    # srcset 非対応のブラウザ向けには 2番目に小さい縮小版（通常は320px）を表示する
+    fallback_name = jpeg[min(1, len(jpeg) - 1)][1]
+    attrs.update({
+        'src': default_storage.url(fallback_name),
+        'srcset': _srcset(jpeg),
+        'sizes': sizes,
+        # レイアウトのずれを防ぐため、縦横比がわかるように元画像の大きさを指定する
+        'width': renditions['width'],
+        'height': renditions['height'],
+    })
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}"><img {}></picture>',
+        _srcset(renditions.get('webp', [])), sizes,
+        format_html_join(' ', '{}="{}"', attrs.items()),
+    )
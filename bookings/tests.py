@@ -1,3 +1,721 @@
-from django.test import TestCase
+import datetime
+import gc
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from emails.models import EmailLog
+from .models import Booking, BookingSettings, Customer, GapBlock, MaintenanceMode, Schedule, Service, Therapist
+from .utils.bench_data import generate_bench_data
+from .utils.booking_draft import loads_draft
+from .utils.bulk_actions import bulk_change_booking_status
+from .utils.catalog import get_service, get_services, get_therapist, get_therapists
+from .utils.customer_stats import STATS_FIELDS, filter_segment, recompute_customer_stats
+from .utils.search import BOOKING_SEARCH_TABLE, rebuild_search_index, search_bookings, search_customers
+from .utils.maintenance import invalidate_maintenance_cache
+
+# 処理時間の基準値（PERF_UPDATE_BASELINE=1 で実行すると更新される）
+PERF_BASELINE_PATH = Path(os.environ.get('PERF_BASELINE_PATH', settings.BASE_DIR / 'perf_baseline.json'))
+# 基準値の何倍を超えたら失敗とするか（0 で処理時間のチェックを無効化）
+PERF_TIME_TOLERANCE = float(os.environ.get('PERF_TIME_TOLERANCE', '3.0'))
+# 短い処理のばらつきで失敗しないための許容時間（ミリ秒）
+PERF_TIME_MARGIN_MS = 50.0
+
+_perf_results = {}
+
+
+def _load_baseline():
+    try:
+        return json.loads(PERF_BASELINE_PATH.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_perf_results():
+    """PERF_UPDATE_BASELINE=1 の場合、今回の計測結果で基準値ファイルを更新"""
+    if not _perf_results or os.environ.get('PERF_UPDATE_BASELINE') != '1':
+        return
+    baseline = _load_baseline()
+    baseline.update(_perf_results)
+    PERF_BASELINE_PATH.write_text(
+        json.dumps(dict(sorted(baseline.items())), ensure_ascii=False, indent=2) + '\n',
+        encoding='utf-8'
+    )
+
+
+class PerformanceTestMixin:
+    """
+    大量データでのクエリ数・処理時間の回帰テスト
+    クエリ数の上限は各テストで指定し、処理時間は perf_baseline.json と比較する
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # seed_bench_data と同じ生成処理（顧客数千件・約1年分の予約・複数の施術者）
+        cls.perf_data = generate_bench_data(customers=2000, days_past=300, days_ahead=60, bookings_per_day=12)
+        BookingSettings.objects.update_or_create(id=1, defaults={'auto_block_gaps': False})
+        MaintenanceMode.get_current_settings()
+        cls.staff_user = User.objects.create_user('perf-staff', password='password', is_staff=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        save_perf_results()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        # キャッシュの有無でクエリ数が変わらないよう、毎回空の状態から計測する
+        cache.clear()
+        invalidate_maintenance_cache()
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries, name):
+        """ブロック内のクエリ数が上限以下であることを確認し、処理時間を記録"""
+        # 他のテストで作られたオブジェクトの回収（GC）が計測中に起きて処理時間がぶれないよう、計測中は止める
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                yield context
+                elapsed_ms = (time.perf_counter() - started) * 1000
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        queries = [query['sql'] for query in context.captured_queries]
+        duplicates = [
+            f'  {count}回: {sql[:200]}'
+            for sql, count in Counter(queries).most_common(5) if count > 1
+        ]
+        self.assertLessEqual(
+            len(queries), max_queries,
+            f'{name}: クエリ数 {len(queries)} が上限 {max_queries} を超えています\n' + '\n'.join(duplicates)
+        )
+
+        _perf_results[name] = {'queries': len(queries), 'ms': round(elapsed_ms, 1)}
+        baseline = _load_baseline().get(name)
+        if baseline and PERF_TIME_TOLERANCE > 0 and os.environ.get('PERF_UPDATE_BASELINE') != '1':
+            limit_ms = baseline['ms'] * PERF_TIME_TOLERANCE + PERF_TIME_MARGIN_MS
+            self.assertLessEqual(
+                elapsed_ms, limit_ms,
+                f'{name}: 処理時間 {elapsed_ms:.1f}ms が基準値 {baseline["ms"]}ms の許容範囲を超えています'
+            )
+
+
+class QueryPlanTests(TestCase):
+    """主要な検索がインデックスを使用していることを EXPLAIN QUERY PLAN で確認"""
+
+    booking_date = datetime.date(2025, 1, 10)
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN は SQLite のみ対象')
+
+    def assertUsesIndex(self, queryset, index_names):
+        plan = queryset.explain()
+        self.assertTrue(
+            any(name in plan for name in index_names),
+            f'インデックス {index_names} が使用されていません:\n{plan}'
+        )
+        self.assertNotRegex(plan, rf'SCAN {queryset.model._meta.db_table}\b')
+
+    def test_booking_by_date_and_status(self):
+        # 空き時間検索・重複チェック（施術者指定なし）
+        queryset = Booking.objects.filter(
+            booking_date=self.booking_date,
+            status__in=['pending', 'confirmed']
+        )
+        self.assertUsesIndex(queryset, ['booking_date_ther_status_idx', 'booking_status_date_idx'])
+
+    def test_booking_by_date_therapist_and_status(self):
+        # 空き時間検索・重複チェック（施術者指定あり）
+        queryset = Booking.objects.filter(
+            booking_date=self.booking_date,
+            therapist_id=1,
+            status__in=['pending', 'confirmed']
+        )
+        # unique_together（施術者 + 日付 + 時間）のインデックスが選ばれる場合もある
+        self.assertUsesIndex(queryset, ['booking_date_ther_status_idx', 'booking_status_date_idx', '_uniq'])
+
+    def test_booking_by_date_range(self):
+        # 月カレンダー・稼働率の集計（ステータス指定なし）
+        queryset = Booking.objects.filter(
+            booking_date__gte=self.booking_date,
+            booking_date__lte=self.booking_date + datetime.timedelta(days=30)
+        )
+        self.assertUsesIndex(queryset, ['booking_date_ther_status_idx'])
+
+    def test_booking_by_date_range_and_status(self):
+        queryset = Booking.objects.filter(
+            booking_date__gte=self.booking_date,
+            booking_date__lte=self.booking_date + datetime.timedelta(days=30),
+            status__in=['pending', 'confirmed', 'completed']
+        )
+        self.assertUsesIndex(queryset, ['booking_date_ther_status_idx', 'booking_status_date_idx'])
+
+    def test_pending_booking_count(self):
+        # ダッシュボードの承認待ち件数
+        queryset = Booking.objects.filter(status='pending')
+        self.assertUsesIndex(queryset, ['booking_status_date_idx'])
+
+    def test_active_schedules_by_date(self):
+        queryset = Schedule.objects.filter(
+            schedule_date=self.booking_date,
+            is_active=True
+        )
+        self.assertUsesIndex(queryset, ['schedule_active_date_idx'])
+
+    def test_active_schedules_by_date_and_therapist(self):
+        queryset = Schedule.objects.filter(
+            schedule_date=self.booking_date,
+            is_active=True
+        ).filter(Q(therapist_id=1) | Q(therapist__isnull=True))
+        self.assertUsesIndex(queryset, ['schedule_active_date_idx'])
+
+    def test_pending_emails(self):
+        # 送信待ちメールの取得
+        queryset = EmailLog.objects.filter(
+            status__in=['pending', 'retry'],
+            scheduled_at__lte=timezone.now()
+        ).order_by('scheduled_at')
+        self.assertUsesIndex(queryset, ['emaillog_status_sched_idx'])
+
+    def test_gap_blocks_by_date(self):
+        queryset = GapBlock.objects.filter(
+            block_date=self.booking_date,
+            is_active=True
+        )
+        self.assertUsesIndex(queryset, ['bookings_ga_block_d_1513e0_idx'])
+
+    def test_customer_segment(self):
+        # 顧客一覧のリピーター・常連客の絞り込みと件数
+        self.assertUsesIndex(filter_segment(Customer.objects.all(), 'vip'), ['customer_active_count_idx'])
+
+    def test_customer_search(self):
+        # 顧客一覧・管理画面の検索（名前の部分一致・電話番号・メールアドレス）
+        for query in ['山田太郎', '090-1234', 'Yamada@Ex']:
+            self.assertUsesIndex(search_customers(Customer.objects.all(), query), ['customer_search'])
+
+    def test_booking_search(self):
+        # 管理画面の予約検索（顧客の名前・メールアドレスと備考）
+        self.assertUsesIndex(search_bookings(Booking.objects.all(), '山田太郎'), ['booking_search'])
+
+
+class BookingFlowPerformanceTests(PerformanceTestMixin, TestCase):
+    """予約フォーム（ステップ1〜確認画面）と空き時間APIのクエリ数"""
+
+    def setUp(self):
+        super().setUp()
+        self.service = self.perf_data['services'][1]
+        self.therapist = self.perf_data['therapists'][0]
+        # 営業日・予約可能期間内で、既存の予約がある日
+        self.booking_date = self.perf_data['today'] + datetime.timedelta(days=7)
+
+    def select_free_time(self, therapist):
+        response = self.client.get(reverse('bookings:get_available_times'), {
+            'date': self.booking_date.isoformat(),
+            'service_id': self.service.id,
+            'therapist_id': therapist.id if therapist else '',
+        })
+        return next(slot['time'] for slot in response.json()['available_times'] if slot['available'])
+
+    def test_step1(self):
+        with self.assertMaxQueries(2, 'booking_step1_get'):
+            response = self.client.get(reverse('bookings:booking_step1'))
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertMaxQueries(5, 'booking_step1_post'):
+            response = self.client.post(reverse('bookings:booking_step1'), {'service': self.service.id})
+        self.assertEqual(response.status_code, 302)
+
+    def test_step2(self):
+        self.client.post(reverse('bookings:booking_step1'), {'service': self.service.id})
+
+        with self.assertMaxQueries(4, 'booking_step2_get'):
+            response = self.client.get(reverse('bookings:booking_step2'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_available_times(self):
+        for therapist in (None, self.therapist):
+            name = 'get_available_times' + ('_therapist' if therapist else '')
+            with self.assertMaxQueries(6, name):
+                response = self.client.get(reverse('bookings:get_available_times'), {
+                    'date': self.booking_date.isoformat(),
+                    'service_id': self.service.id,
+                    'therapist_id': therapist.id if therapist else '',
+                })
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()['available_times'])
+
+    def test_available_times_not_modified(self):
+        url = reverse('bookings:get_available_times')
+        params = {'date': self.booking_date.isoformat(), 'service_id': self.service.id, 'therapist_id': self.therapist.id}
+        response = self.client.get(url, params)
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+
+        with self.assertMaxQueries(0, 'get_available_times_not_modified'):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # 別の日の予約では変わらず、同じ日の予約で変わる
+        booking = Booking.objects.filter(booking_date=self.booking_date).first()
+        other_day = Booking.objects.exclude(booking_date=self.booking_date).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            other_day.save()
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # 予約の日付を変更した場合は移動元の日も変わる
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.booking_date += datetime.timedelta(days=1)
+            booking.save()
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_full_flow(self):
+        booking_time = self.select_free_time(self.therapist)
+        self.client.post(reverse('bookings:booking_step1'), {'service': self.service.id})
+        response = self.client.post(reverse('bookings:booking_step2'), {
+            'therapist': self.therapist.id,
+            'booking_date': self.booking_date.isoformat(),
+            'booking_time': booking_time,
+        })
+        self.assertRedirects(response, reverse('bookings:booking_step3'), fetch_redirect_response=False)
+
+        with self.assertMaxQueries(8, 'booking_step3_get'):
+            response = self.client.get(reverse('bookings:booking_step3'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['validation_error'])
+
+        with self.assertMaxQueries(12, 'booking_step3_post'):
+            response = self.client.post(reverse('bookings:booking_step3'), {
+                'customer_name': '計測 太郎',
+                'customer_email': 'perf@example.com',
+                'customer_phone': '09012345678',
+                'gender': 'male',
+                'terms_confirmed': 'on',
+            })
+        self.assertRedirects(response, reverse('bookings:booking_confirm'), fetch_redirect_response=False)
+
+        with self.assertMaxQueries(8, 'booking_confirm_get'):
+            response = self.client.get(reverse('bookings:booking_confirm'))
+        self.assertEqual(response.status_code, 200)
+
+        # 顧客の検索インデックスへの登録（1回）を含む
+        with self.assertMaxQueries(33, 'booking_confirm_post'):
+            response = self.client.post(reverse('bookings:booking_confirm'))
+        self.assertRedirects(response, reverse('bookings:booking_complete'), fetch_redirect_response=False)
+        self.assertTrue(Booking.objects.filter(customer__email='perf@example.com').exists())
+
+    @override_settings(BOOKING_WIZARD_MODE='token')
+    def test_token_replay(self):
+        booking_time = self.select_free_time(self.therapist)
+        response = self.client.post(reverse('bookings:booking_step1'), {'service': self.service.id})
+        response = self.client.get(response['Location'])
+        response = self.client.post(reverse('bookings:booking_step2'), {
+            'booking_token': response.context['booking_token'],
+            'therapist': self.therapist.id,
+            'booking_date': self.booking_date.isoformat(),
+            'booking_time': booking_time,
+            'notes': '腰痛あり',
+        })
+        # 備考を含むトークンはURLに載せず、ステップ3をそのまま表示する
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'bookings/step3_customer.html')
+        response = self.client.post(reverse('bookings:booking_step3'), {
+            'booking_token': response.context['booking_token'],
+            'customer_name': '再送 太郎',
+            'customer_email': 'replay@example.com',
+            'customer_phone': '09012345678',
+            'gender': 'male',
+            'terms_confirmed': 'on',
+        })
+        token = response.context['booking_token']
+        self.assertIn('腰痛あり', response.context['notes'])
+        for url in (response.context['step3_url'], response.context['step2_url']):
+            self.assertNotIn('booking_notes', loads_draft(parse_qs(urlparse(url).query)['booking_token'][0]))
+
+        response = self.client.post(reverse('bookings:booking_confirm'), {'booking_token': token})
+        self.assertRedirects(response, reverse('bookings:booking_complete'), fetch_redirect_response=False)
+        emails = EmailLog.objects.count()
+
+        # 同じトークンでの再送信では予約もメールも作成しない
+        response = self.client.post(reverse('bookings:booking_confirm'), {'booking_token': token})
+        self.assertRedirects(response, reverse('bookings:booking_complete'), fetch_redirect_response=False)
+        self.assertEqual(Booking.objects.filter(customer__email='replay@example.com').count(), 1)
+        self.assertIn('腰痛あり', Booking.objects.get(customer__email='replay@example.com').notes)
+        self.assertEqual(EmailLog.objects.count(), emails)
+
+    def test_catalog_snapshot(self):
+        get_services()
+        get_therapists()
+        # 読み込み済みのスナップショットからはDBにアクセスせずに取得できる
+        with self.assertNumQueries(0):
+            self.assertEqual(get_service(self.service.id).name, self.service.name)
+            self.assertEqual(get_therapist(str(self.therapist.id)).display_name, self.therapist.display_name)
+            self.assertIsNone(get_service('invalid'))
+
+        self.service.name = '変更後のサービス名'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save()
+        self.assertEqual(get_service(self.service.id).name, '変更後のサービス名')
+
+        # 無効にしたサービスは選択できない
+        self.service.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save()
+        self.assertIsNone(get_service(self.service.id))
+        response = self.client.post(reverse('bookings:booking_step1'), {'service': self.service.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+
+    def test_catalog_snapshot_max_age(self):
+        # バージョンの変化が伝わらない変更（locmem の他のワーカーでの変更など）も、最長時間を過ぎれば読み込み直す
+        get_service(self.service.id)
+        Service.objects.filter(pk=self.service.pk).update(name='他のワーカーで変更')
+        self.assertEqual(get_service(self.service.id).name, self.service.name)
+        with override_settings(CATALOG_SNAPSHOT_MAX_AGE=0):
+            self.assertEqual(get_service(self.service.id).name, '他のワーカーで変更')
+
+    def test_full_flow_en(self):
+        self.service.name_en = 'Perf Massage'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save()
+        booking_time = self.select_free_time(self.therapist)
+
+        response = self.client.get(reverse('bookings:booking_step1_en'))
+        self.assertContains(response, 'Perf Massage')
+        response = self.client.post(reverse('bookings:booking_step1_en'), {'service': self.service.id})
+        self.assertRedirects(response, reverse('bookings:booking_step2_en'), fetch_redirect_response=False)
+
+        # サービス・施術者の一覧はカタログ（キャッシュ）から取得する
+        with self.assertMaxQueries(3, 'booking_step2_en_get'):
+            response = self.client.get(reverse('bookings:booking_step2_en'))
+        self.assertContains(response, 'Perf Massage')
+
+        response = self.client.post(reverse('bookings:booking_step2_en'), {
+            'therapist': self.therapist.id,
+            'booking_date': self.booking_date.isoformat(),
+            'booking_time': booking_time,
+        })
+        self.assertRedirects(response, reverse('bookings:booking_step3_en'), fetch_redirect_response=False)
+        response = self.client.post(reverse('bookings:booking_step3_en'), {
+            'customer_name': 'Perf Taro',
+            'customer_email': 'perf-en@example.com',
+            'customer_phone': '09012345678',
+            'gender': 'male',
+            'terms_confirmed': 'on',
+        })
+        self.assertRedirects(response, reverse('bookings:booking_confirm_en'), fetch_redirect_response=False)
+
+        response = self.client.get(reverse('bookings:booking_confirm_en'))
+        self.assertContains(response, 'Perf Massage')
+        response = self.client.post(reverse('bookings:booking_confirm_en'))
+        self.assertRedirects(response, reverse('bookings:booking_complete_en'), fetch_redirect_response=False)
+        self.assertTrue(Booking.objects.filter(customer__email='perf-en@example.com').exists())
+
+
+class TherapistImageTests(TestCase):
+    """施術者の写真の縮小版"""
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, IMAGE_RENDITION_WIDTHS=(160, 320, 640))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_upload(self, size=(480, 640)):
+        # 位置情報などの EXIF 付きのスマートフォン写真を想定
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (200, 150, 100)).save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('IMG_0001.JPG', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_renditions_created_on_upload(self):
+        therapist = Therapist.objects.create(name='写真', display_name='写真', image=self.make_upload())
+        renditions = Therapist.objects.get(pk=therapist.pk).image_renditions
+
+        self.assertEqual(renditions['source'], therapist.image.name)
+        # 元画像（480px）より大きい幅は作成しない
+        self.assertEqual([width for width, _ in renditions['webp']], [160, 320, 480])
+        self.assertEqual([width for width, _ in renditions['jpeg']], [160, 320, 480])
+        for width, name in renditions['webp'] + renditions['jpeg']:
+            with default_storage.open(name) as f:
+                image = Image.open(f)
+                self.assertEqual(image.width, width)
+                self.assertNotIn('exif', image.info)
+
+    def test_duplicate_uploads_share_renditions(self):
+        first = Therapist.objects.create(name='写真1', display_name='写真1', image=self.make_upload())
+        second = Therapist.objects.create(name='写真2', display_name='写真2', image=self.make_upload())
+
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_renditions['jpeg'], second.image_renditions['jpeg'])
+
+    def test_therapists_page_uses_srcset(self):
+        therapist = Therapist.objects.create(name='写真', display_name='写真', image=self.make_upload())
+
+        response = self.client.get(reverse('website:therapists'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, therapist.image_renditions['webp'][0][1])
+        self.assertNotContains(response, therapist.image.url)
+
+
+class CustomerStatsTests(TestCase):
+    """予約の変更に合わせて顧客の利用実績が更新されること（集計し直した値と一致すること）"""
+
+    def setUp(self):
+        self.service = Service.objects.create(name='ボディ60分', duration_minutes=60, price=6500)
+        self.other_service = Service.objects.create(name='ボディ90分', duration_minutes=90, price=9000)
+        self.customer = Customer.objects.create(name='実績', email='stats@example.com', phone='090-0000-0000')
+        self.other_customer = Customer.objects.create(name='実績2', email='stats2@example.com', phone='090-0000-0001')
+        self.day = datetime.date(2025, 1, 10)
+
+    def book(self, status, days=0, **kwargs):
+        return Booking.objects.create(
+            customer=kwargs.pop('customer', self.customer), service=kwargs.pop('service', self.service),
+            booking_date=self.day + datetime.timedelta(days=days), booking_time=datetime.time(10, 0),
+            status=status, **kwargs
+        )
+
+    def stats(self, customer=None):
+        return Customer.objects.filter(pk=(customer or self.customer).pk).values_list(*STATS_FIELDS).get()
+
+    def assertStatsConsistent(self):
+        """保持している実績が、予約から集計し直した値と同じであること"""
+        stored = {customer.pk: self.stats(customer) for customer in [self.customer, self.other_customer]}
+        recompute_customer_stats()
+        recomputed = {customer.pk: self.stats(customer) for customer in [self.customer, self.other_customer]}
+        self.assertEqual(stored, recomputed)
+
+    def test_status_transitions(self):
+        booking = self.book('pending')
+        self.assertEqual(self.stats(), (0, 0, None, None, 0))
+
+        booking.status = 'confirmed'
+        booking.save()
+        self.assertEqual(self.stats(), (0, 1, self.day, self.day, 0))
+
+        earlier = self.book('completed', days=-30)
+        self.assertEqual(self.stats(), (1, 1, earlier.booking_date, self.day, 6500))
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).booking_count, 2)
+
+        booking.status = 'completed'
+        booking.service = self.other_service
+        booking.save()
+        self.assertEqual(self.stats(), (2, 0, earlier.booking_date, self.day, 15500))
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.stats(), (1, 0, earlier.booking_date, earlier.booking_date, 6500))
+        self.assertStatsConsistent()
+
+    def test_price_change(self):
+        # 完了後に料金を変更してからキャンセルしても、累計売上は負にならず集計し直した値と一致する
+        booking = self.book('completed')
+        self.service.price = 10000
+        self.service.save()
+        self.assertEqual(self.stats()[4], 10000)
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.stats(), (0, 0, None, None, 0))
+        self.assertStatsConsistent()
+
+    def test_stats_failure_does_not_abort_save(self):
+        booking = self.book('confirmed')
+        Customer.objects.update(confirmed_booking_count=0)
+
+        # 予約数が負になる更新は失敗するが、予約の保存は完了する
+        booking.status = 'cancelled'
+        with self.assertLogs('bookings.signals', 'ERROR'):
+            booking.save()
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status, 'cancelled')
+        self.assertEqual(self.stats()[1], 0)
+
+    def test_date_customer_change_and_delete(self):
+        booking = self.book('confirmed', days=5)
+        self.book('confirmed')
+
+        booking.booking_date = self.day - datetime.timedelta(days=5)
+        booking.save()
+        self.assertEqual(self.stats()[2:4], (booking.booking_date, self.day))
+        self.assertStatsConsistent()
+
+        booking.customer = self.other_customer
+        booking.save()
+        self.assertEqual(self.stats(), (0, 1, self.day, self.day, 0))
+        self.assertEqual(self.stats(self.other_customer), (0, 1, booking.booking_date, booking.booking_date, 0))
+
+        booking.delete()
+        self.assertEqual(self.stats(self.other_customer), (0, 0, None, None, 0))
+        self.assertStatsConsistent()
+
+    def test_bulk_status_change(self):
+        for days in range(5):
+            self.book('pending', days=days)
+        self.book('confirmed', days=10, customer=self.other_customer)
+
+        bulk_change_booking_status(Booking.objects.all(), 'completed')
+        self.assertEqual(self.stats(), (5, 0, self.day, self.day + datetime.timedelta(days=4), 5 * 6500))
+        self.assertEqual(self.stats(self.other_customer)[:2], (1, 0))
+        self.assertStatsConsistent()
+        self.assertEqual(list(filter_segment(Customer.objects.all(), 'vip')), [self.customer])
+
+    def test_bulk_stats_failure_does_not_abort_bulk_change(self):
+        self.book('pending')
+
+        def fail(customer_ids):
+            # 制約違反（予約数が負）でデータベースのエラーになる更新
+            Customer.objects.filter(pk__in=customer_ids).update(confirmed_booking_count=-1)
+
+        # 受信側の更新が失敗しても、一括操作のトランザクションは壊れずにステータスの変更が確定する
+        with mock.patch('bookings.signals.recompute_customer_stats', side_effect=fail):
+            with self.assertLogs('bookings.signals', 'ERROR'):
+                changes = bulk_change_booking_status(Booking.objects.all(), 'confirmed')
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(Booking.objects.get().status, 'confirmed')
+        self.assertEqual(self.stats()[1], 0)
+
+    def test_recompute_command(self):
+        self.book('completed')
+        Customer.objects.update(completed_booking_count=0, lifetime_revenue=0)
+
+        out = io.StringIO()
+        call_command('recompute_customer_stats', '--dry-run', stdout=out)
+        self.assertIn('値がずれていた顧客: 1名', out.getvalue())
+        self.assertEqual(self.stats()[0], 0)
+
+        call_command('recompute_customer_stats', stdout=io.StringIO())
+        self.assertEqual(self.stats(), (1, 0, self.day, self.day, 6500))
+
+
+class SearchTests(TestCase):
+    """顧客・予約の検索（全文検索インデックスが保存・削除に合わせて更新されること）"""
+
+    def setUp(self):
+        self.service = Service.objects.create(name='ボディ60分', duration_minutes=60, price=6500)
+        self.yamada = Customer.objects.create(name='山田太郎', email='Taro.Yamada@Example.com', phone='090-1234-5678')
+        self.sato = Customer.objects.create(name='佐藤花子', email='hanako@example.jp', phone='080 9876 5432')
+
+    def search(self, query):
+        return set(search_customers(Customer.objects.all(), query))
+
+    def test_search_customers(self):
+        self.assertEqual(self.search('田太郎'), {self.yamada})
+        self.assertEqual(self.search('山田'), {self.yamada})
+        self.assertEqual(self.search('taro.yamada'), {self.yamada})
+        self.assertEqual(self.search('EXAMPLE'), {self.yamada, self.sato})
+        self.assertEqual(self.search('ha'), {self.sato})
+        self.assertEqual(self.search('12345678'), {self.yamada})
+        self.assertEqual(self.search('080-9876'), {self.sato})
+        self.assertEqual(self.search('"'), set())
+        self.assertEqual(self.search(''), {self.yamada, self.sato})
+
+    def test_index_follows_changes(self):
+        self.yamada.name = '山本一郎'
+        self.yamada.phone = '03-1111-2222'
+        self.yamada.save()
+        self.assertEqual(self.search('山田太郎'), set())
+        self.assertEqual(self.search('山本一郎'), {self.yamada})
+        self.assertEqual(self.search('0311112222'), {self.yamada})
+
+        self.sato.delete()
+        self.assertEqual(self.search('佐藤花子'), set())
+
+    def test_search_bookings(self):
+        booking = Booking.objects.create(
+            customer=self.yamada, service=self.service, booking_date=datetime.date(2025, 1, 10),
+            booking_time=datetime.time(10, 0), notes='肩こりがひどい'
+        )
+        other = Booking.objects.create(
+            customer=self.sato, service=self.service, booking_date=datetime.date(2025, 1, 10),
+            booking_time=datetime.time(11, 0)
+        )
+        self.assertEqual(list(search_bookings(Booking.objects.all(), '肩こりが')), [booking])
+        self.assertEqual(list(search_bookings(Booking.objects.all(), '佐藤花子')), [other])
+        self.assertEqual(list(search_bookings(Booking.objects.all(), '肩こ')), [booking])
+
+        booking.notes = ''
+        booking.save()
+        self.assertEqual(list(search_bookings(Booking.objects.all(), '肩こりが')), [])
+
+        # 備考が変わらない保存では検索インデックスに触れない
+        other.status = 'confirmed'
+        with CaptureQueriesContext(connection) as queries:
+            other.save()
+        self.assertFalse([query for query in queries.captured_queries if BOOKING_SEARCH_TABLE in query['sql']])
+
+    def test_rebuild(self):
+        Customer.objects.filter(pk=self.sato.pk).update(name='鈴木一郎')
+        self.assertEqual(self.search('鈴木一郎'), set())
+        self.assertEqual(rebuild_search_index(), (2, 0))
+        self.assertEqual(self.search('鈴木一郎'), {self.sato})
+
+
+class BenchDataTests(TestCase):
+    """性能計測用のデータ（同じ施術者の予約が重ならず、予定・空白時間ブロックの時間を避けること）"""
+
+    def test_bookings_do_not_overlap(self):
+        data = generate_bench_data(customers=50, days_past=20, days_ahead=20, bookings_per_day=16, services=6)
+        self.assertTrue(data['bookings'])
+
+        def interval(day, start, end):
+            return datetime.datetime.combine(day, start), datetime.datetime.combine(day, end)
+
+        busy = {}
+        for booking in data['bookings']:
+            start = datetime.datetime.combine(booking.booking_date, booking.booking_time)
+            busy.setdefault(booking.booking_date, []).append(
+                (booking.therapist_id, start, start + datetime.timedelta(minutes=booking.service.duration_minutes))
+            )
+        blocked = [
+            (item.therapist_id, *interval(item.schedule_date, item.start_time, item.end_time))
+            for item in data['schedules'] if item.is_active
+        ] + [
+            (item.therapist_id, *interval(item.block_date, item.start_time, item.end_time))
+            for item in data['gap_blocks']
+        ]
+
+        for bookings in busy.values():
+            for index, (therapist_id, start, end) in enumerate(bookings):
+                for other_therapist_id, other_start, other_end in bookings[index + 1:]:
+                    if therapist_id and therapist_id == other_therapist_id:
+                        self.assertFalse(start < other_end and other_start < end)
+        for therapist_id, block_start, block_end in blocked:
+            for booking_therapist_id, start, end in busy.get(block_start.date(), []):
+                if booking_therapist_id and therapist_id in (None, booking_therapist_id):
+                    self.assertFalse(start < block_end and block_start < end)
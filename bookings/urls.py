@@ -11,12 +11,12 @@ urlpatterns = [
     path('booking/confirm/', views.booking_confirm, name='booking_confirm'),  # 確認画面
     path('booking/complete/', views.booking_complete, name='booking_complete'),  # 完了画面
     
-    # ★ 新規追加: 英語版3ステップ予約フォーム
-    path('en/booking/step1/', views.booking_step1_en, name='booking_step1_en'),  # Service Selection
-    path('en/booking/step2/', views.booking_step2_en, name='booking_step2_en'),  # Date & Time Selection
-    path('en/booking/step3/', views.booking_step3_en, name='booking_step3_en'),  # Customer Information
-    path('en/booking/confirm/', views.booking_confirm_en, name='booking_confirm_en'),  # Confirmation
-    path('en/booking/complete/', views.booking_complete_en, name='booking_complete_en'),  # Completion
+    # 英語版3ステップ予約フォーム（同じビューで、テンプレートとメッセージを英語版に切り替える）
+    path('en/booking/step1/', views.booking_step1, {'language': 'en'}, name='booking_step1_en'),  # Service Selection
+    path('en/booking/step2/', views.booking_step2, {'language': 'en'}, name='booking_step2_en'),  # Date & Time Selection
+    path('en/booking/step3/', views.booking_step3, {'language': 'en'}, name='booking_step3_en'),  # Customer Information
+    path('en/booking/confirm/', views.booking_confirm, {'language': 'en'}, name='booking_confirm_en'),  # Confirmation
+    path('en/booking/complete/', views.booking_complete, {'language': 'en'}, name='booking_complete_en'),  # Completion
     
     # 予約管理機能（管理者用）
     path('booking/<int:booking_id>/cancel/', views.cancel_booking, name='cancel_booking'),
@@ -25,4 +25,4 @@ urlpatterns = [
     
     # AJAX API
     path('booking/api/available-times/', views.get_available_times, name='get_available_times'),
-]
\ No newline at end of file
+]
@@ -0,0 +1,127 @@
+# bookings/utils/availability.py
+# 空き時間API（get_available_times）の条件付きGET（ETag・304）用のバージョン管理
+#
+# 空き時間は「その日の予約・予定・空白時間ブロック」と「営業時間・予約設定・サービス・施術者」で決まるため、
+#   - 日別のバージョン（予約・予定・空白時間ブロックの変更時に、その日の分だけ上げる）
+#   - 全体のバージョン（営業時間・予約設定・サービス・施術者の変更時に上げる）
+# を ETag に含める。どちらも変わっていなければ、空き時間を計算せずに 304 を返せる
+# バージョンはトランザクション確定後に上げる（確定前に上げると、変更前の内容に新しい ETag が付く）
+
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .cache_versions import get_versions, bump_version
+
+AVAILABILITY_VERSION = 'availability'
+DAY_SETTINGS_KEY = 'availability:settings:{version}:{weekday}'
+
+# 予約設定を取得できない場合の既定値
+DEFAULT_INTERVAL_MINUTES = 30
+DEFAULT_BUFFER_MINUTES = 15
+DEFAULT_MIN_ADVANCE_MINUTES = 20
+
+
+def _day_version_name(day):
+    return f'{AVAILABILITY_VERSION}:{day.isoformat()}'
+
+
+def get_available_times_max_age():
+    """空き時間APIのブラウザでのキャッシュ期間（秒）"""
+    return getattr(settings, 'AVAILABLE_TIMES_MAX_AGE', 30)
+
+
+def invalidate_availability(days=None):
+    """
+    空き時間のバージョンを上げる（トランザクション確定後）
+    days を省略した場合は全体のバージョンを上げ、すべての日を無効にする
+    """
+    names = [_day_version_name(day) for day in set(days)] if days is not None else [AVAILABILITY_VERSION]
+
+    def bump():
+        for name in names:
+            bump_version(name)
+
+    transaction.on_commit(bump)
+
+
+def get_day_settings(day, version=None):
+    """
+    その日の営業時間と予約設定（全体のバージョンごとにキャッシュし、通常はDBにアクセスしない）
+
+    戻り値: {'open_time', 'close_time'（休業日は None）, 'interval', 'buffer', 'min_advance'}
+    """
+    from ..models import BookingSettings, BusinessHours
+
+    if version is None:
+        version = get_versions(AVAILABILITY_VERSION)[AVAILABILITY_VERSION]
+    key = DAY_SETTINGS_KEY.format(version=version, weekday=day.weekday())
+    day_settings = cache.get(key)
+    if day_settings is not None:
+        return day_settings
+
+    business_hours = BusinessHours.objects.filter(weekday=day.weekday(), is_open=True).first()
+    try:
+        settings_obj = BookingSettings.get_current_settings()
+        interval = settings_obj.booking_interval_minutes
+        buffer = settings_obj.treatment_buffer_minutes
+        min_advance = getattr(settings_obj, 'min_advance_minutes', DEFAULT_MIN_ADVANCE_MINUTES)
+    except Exception:
+        interval, buffer, min_advance = DEFAULT_INTERVAL_MINUTES, DEFAULT_BUFFER_MINUTES, DEFAULT_MIN_ADVANCE_MINUTES
+
+    day_settings = {
+        'open_time': business_hours.open_time if business_hours else None,
+        'close_time': business_hours.close_time if business_hours else None,
+        'interval': interval,
+        'buffer': buffer,
+        'min_advance': min_advance,
+    }
+    cache.set(key, day_settings, None)
+    return day_settings
+
+
+def get_min_booking_time(day, day_settings, now):
+    """
+    当日の場合の最も早い予約可能時刻（直前予約制限）。当日でなければ None
+    営業終了時刻を過ぎている場合も営業終了後の時刻を返す
+    """
+    if day != now.date():
+        return None
+    min_datetime = now + datetime.timedelta(minutes=day_settings['min_advance'])
+    return max(day_settings['open_time'], min_datetime.astimezone(timezone.get_current_timezone()).time())
+
+
+def _passed_slots(day, day_settings, now):
+    """当日の場合、直前予約制限で選べなくなった時間枠の数（時間の経過で空き時間が変わるため ETag に含める）"""
+    if day_settings['open_time'] is None:
+        return 0
+    min_booking_time = get_min_booking_time(day, day_settings, now)
+    if min_booking_time is None:
+        return 0
+
+    count = 0
+    slot = datetime.datetime.combine(day, day_settings['open_time'])
+    end = datetime.datetime.combine(day, day_settings['close_time'])
+    while slot <= end and slot.time() < min_booking_time:
+        count += 1
+        slot += datetime.timedelta(minutes=day_settings['interval'])
+    return count
+
+
+def get_availability_etag(day, service_id, therapist_id, now=None):
+    """
+    空き時間APIの ETag と、その日の営業時間・予約設定を返す
+    キャッシュへの問い合わせのみで、DBにはアクセスしない（営業時間・予約設定のキャッシュがない場合を除く）
+    """
+    now = now or timezone.now()
+    versions = get_versions(AVAILABILITY_VERSION, _day_version_name(day))
+    day_settings = get_day_settings(day, version=versions[AVAILABILITY_VERSION])
+    source = ':'.join(str(value) for value in [
+        versions[AVAILABILITY_VERSION], versions[_day_version_name(day)],
+        day.isoformat(), service_id, therapist_id or '', _passed_slots(day, day_settings, now),
+    ])
+    return '"%s"' % hashlib.md5(source.encode()).hexdigest(), day_settings
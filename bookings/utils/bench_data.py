@@ -0,0 +1,289 @@
+# bookings/utils/bench_data.py
+# 性能計測用の大量データを生成する（seed_bench_data コマンド・性能テストで共通）
+#
+# 同じ seed・件数であれば同じデータになるため、変更前後の計測を同じ条件で比較できる
+# 生成したデータは BENCH_EMAIL_DOMAIN・名前の接頭辞で識別し、clear_bench_data() で削除できる
+
+import datetime
+import itertools
+import random
+
+from django.db import transaction
+from django.utils import timezone
+
+from emails.models import EmailLog
+from ..models import Booking, BusinessHours, Customer, GapBlock, Schedule, Service, Therapist
+from .customer_stats import recompute_customer_stats
+from .search import rebuild_search_index
+
+BENCH_EMAIL_DOMAIN = 'bench.invalid'
+BENCH_NAME_PREFIX = 'ベンチマーク'
+BENCH_CREATED_BY = 'seed_bench_data'
+
+# (施術時間, 料金)
+BENCH_SERVICES = [(30, 3500), (60, 6500), (90, 9000), (120, 12000), (130, 14000), (190, 18500)]
+
+# 過去・未来の予約のステータスの割合
+PAST_STATUS_WEIGHTS = {'completed': 82, 'cancelled': 12, 'confirmed': 4, 'pending': 2}
+FUTURE_STATUS_WEIGHTS = {'pending': 30, 'confirmed': 60, 'cancelled': 10}
+
+# 指名なし予約の割合
+UNASSIGNED_RATIO = 0.15
+
+# メールログを作成する期間（過去何日分の予約か）
+EMAIL_LOG_DAYS = 90
+
+# 予約の開始時刻の間隔と、施術後のインターバル（BookingSettings の既定値）（分）
+SLOT_MINUTES = 30
+BUFFER_MINUTES = 15
+
+
+def _weighted_choice(rng, weights):
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+
+def _to_minutes(time_obj):
+    return time_obj.hour * 60 + time_obj.minute
+
+
+def _to_time(minutes):
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def _next_slot(minutes):
+    """予約の開始時刻の間隔に切り上げる"""
+    return -(-minutes // SLOT_MINUTES) * SLOT_MINUTES
+
+
+def _find_start(cursor, duration, close, blocked):
+    """
+    cursor 以降で、予定・空白時間ブロック（blocked: (開始分, 終了分) のリスト）と重ならず、
+    閉店までに終わる最初の開始時刻（分）。空きがなければ None
+    """
+    start = _next_slot(cursor)
+    while start + duration <= close:
+        block_end = next((end for begin, end in blocked if start < end and begin < start + duration), None)
+        if block_end is None:
+            return start
+        start = _next_slot(block_end)
+    return None
+
+
+def generate_bench_data(customers=5000, days_past=730, days_ahead=60, bookings_per_day=16,
+                        services=4, therapists=6, email_logs=True, seed=1, today=None, batch_size=1000):
+    """
+    性能計測用のデータを bulk_create で作成し、作成したオブジェクトを種類ごとに返す
+
+    顧客の来店回数は少数の常連客に偏るように（パレート分布の重み）割り当てる
+    予約は施術者ごとに営業時間内で時刻順に詰め、施術時間が重ならず予定・空白時間ブロックの時間を避ける
+    """
+    rng = random.Random(seed)
+    today = today or timezone.localdate()
+
+    with transaction.atomic():
+        # 営業時間が未設定の曜日のみ作成（既存の設定は変更しない）
+        for weekday in range(7):
+            BusinessHours.objects.get_or_create(
+                weekday=weekday,
+                defaults={'is_open': True, 'open_time': '09:00', 'close_time': '21:00', 'last_booking_time': '20:00'}
+            )
+
+        service_objs = Service.objects.bulk_create([
+            Service(
+                name=f'{BENCH_NAME_PREFIX}{minutes}分コース', name_en=f'Benchmark {minutes} min',
+                duration_minutes=minutes, price=price, sort_order=100 + i
+            )
+            for i, (minutes, price) in enumerate(BENCH_SERVICES[:services])
+        ])
+        therapist_objs = Therapist.objects.bulk_create([
+            Therapist(
+                name=f'{BENCH_NAME_PREFIX}施術者{i + 1}', display_name=f'{BENCH_NAME_PREFIX}{i + 1}',
+                display_name_en=f'Benchmark {i + 1}', sort_order=100 + i
+            )
+            for i in range(therapists)
+        ])
+
+        # 来店回数の偏り（少数の常連客に予約が集中する）
+        customer_weights = list(itertools.accumulate(rng.paretovariate(1.2) for _ in range(customers)))
+        customer_objs = [
+            Customer(
+                name=f'{BENCH_NAME_PREFIX}顧客{i + 1}',
+                email=f'customer{i + 1}@{BENCH_EMAIL_DOMAIN}',
+                email_normalized=f'customer{i + 1}@{BENCH_EMAIL_DOMAIN}',
+                phone=f'090{i + 1:08d}',
+                phone_normalized=f'090{i + 1:08d}',
+                gender=rng.choice(['female', 'female', 'female', 'male', None]),
+            )
+            for i in range(customers)
+        ]
+
+        open_hours = {
+            weekday: (_to_minutes(open_time), _to_minutes(close_time))
+            for weekday, open_time, close_time in BusinessHours.objects.filter(is_open=True).values_list(
+                'weekday', 'open_time', 'close_time'
+            )
+        }
+        slots = [datetime.time(hour, minute) for hour in range(9, 20) for minute in (0, 30)]
+        booking_rows = []
+        schedule_objs = []
+        gap_block_objs = []
+        for offset in range(-days_past, days_ahead + 1):
+            day = today + datetime.timedelta(days=offset)
+
+            # 予定：施術者ごとの休憩・全体の会議・研修（一部は無効化済み）
+            day_schedules = []
+            for therapist in therapist_objs:
+                if rng.random() < 0.3:
+                    start = rng.choice([12, 13, 14])
+                    day_schedules.append(Schedule(
+                        title='休憩', schedule_type='break', therapist=therapist, schedule_date=day,
+                        start_time=datetime.time(start, 0), end_time=datetime.time(start, 45),
+                        is_active=rng.random() > 0.05, created_by=BENCH_CREATED_BY,
+                    ))
+            if day.weekday() == 0:
+                day_schedules.append(Schedule(
+                    title='朝礼', schedule_type='meeting', schedule_date=day,
+                    start_time=datetime.time(9, 0), end_time=datetime.time(9, 30), created_by=BENCH_CREATED_BY,
+                ))
+            if rng.random() < 0.03:
+                day_schedules.append(Schedule(
+                    title='技術研修', schedule_type='training', therapist=rng.choice(therapist_objs),
+                    schedule_date=day, start_time=datetime.time(18, 0), end_time=datetime.time(20, 0),
+                    created_by=BENCH_CREATED_BY,
+                ))
+
+            # 空白時間ブロック：今日以降の短い空き時間
+            day_gap_blocks = []
+            if offset >= 0:
+                for therapist in therapist_objs:
+                    if rng.random() < 0.4:
+                        start = datetime.datetime.combine(day, rng.choice(slots[2:-2]))
+                        day_gap_blocks.append(GapBlock(
+                            therapist=therapist, block_date=day, start_time=start.time(),
+                            end_time=(start + datetime.timedelta(minutes=30)).time(),
+                            block_type='between_bookings', reason=f'{BENCH_NAME_PREFIX}：30分の空白時間',
+                        ))
+            schedule_objs.extend(day_schedules)
+            gap_block_objs.extend(day_gap_blocks)
+
+            if day.weekday() not in open_hours:
+                continue
+            open_time, close_time = open_hours[day.weekday()]
+
+            # 施術者ごとに予約を時刻順に詰める（施術時間・インターバルで重ならず、予定・ブロックの時間は避ける）
+            blocked = {
+                therapist: [
+                    (_to_minutes(item.start_time), _to_minutes(item.end_time))
+                    for item in day_schedules + day_gap_blocks
+                    if getattr(item, 'is_active', True) and item.therapist in (None, therapist)
+                ]
+                for therapist in therapist_objs
+            }
+            cursors = {therapist: open_time + rng.choice([0, 0, 30, 60]) for therapist in therapist_objs}
+            weights = PAST_STATUS_WEIGHTS if offset < 0 else FUTURE_STATUS_WEIGHTS
+            lanes = rng.sample(therapist_objs, len(therapist_objs))
+            placed = 0
+            while placed < bookings_per_day and lanes:
+                for therapist in list(lanes):
+                    if placed >= bookings_per_day:
+                        break
+                    service = rng.choice(service_objs)
+                    start = _find_start(cursors[therapist], service.duration_minutes, close_time, blocked[therapist])
+                    if start is None:
+                        # この施術者のその日の空きがなくなった
+                        lanes.remove(therapist)
+                        continue
+                    end = start + service.duration_minutes
+                    cursors[therapist] = end + BUFFER_MINUTES + rng.choice([0, 0, 30, 60])
+                    booking_rows.append((
+                        rng.choices(range(customers), cum_weights=customer_weights)[0], service,
+                        None if rng.random() < UNASSIGNED_RATIO else therapist,
+                        day, _to_time(start), _weighted_choice(rng, weights),
+                    ))
+                    placed += 1
+
+        # 予約が1件以下の顧客を初回利用とする
+        visits = [0] * customers
+        for row in booking_rows:
+            visits[row[0]] += 1
+        for customer, count in zip(customer_objs, visits):
+            customer.is_first_visit = count <= 1
+        Customer.objects.bulk_create(customer_objs, batch_size=batch_size)
+
+        booking_objs = Booking.objects.bulk_create([
+            Booking(
+                customer=customer_objs[customer_index], service=service, therapist=therapist,
+                booking_date=day, booking_time=booking_time, status=status,
+                notes='' if rng.random() < 0.8 else '【ご要望】強めでお願いします',
+            )
+            for customer_index, service, therapist, day, booking_time, status in booking_rows
+        ], batch_size=batch_size)
+        Schedule.objects.bulk_create(schedule_objs, batch_size=batch_size)
+        GapBlock.objects.bulk_create(gap_block_objs, batch_size=batch_size)
+
+        # メールログ：直近の予約の確認メール・管理者通知・リマインダー
+        email_log_objs = []
+        if email_logs:
+            now = timezone.now()
+            since = today - datetime.timedelta(days=EMAIL_LOG_DAYS)
+            for booking in booking_objs:
+                if booking.booking_date < since:
+                    continue
+                customer = booking.customer
+                sent_at = timezone.make_aware(datetime.datetime.combine(
+                    booking.booking_date - datetime.timedelta(days=rng.randint(1, 14)), datetime.time(10, 0)
+                ))
+                for subject, recipient in [
+                    ('【GRACE SPA】ご予約を承りました', customer.email),
+                    ('【GRACE SPA】新規予約のお知らせ', f'admin@{BENCH_EMAIL_DOMAIN}'),
+                ]:
+                    failed = rng.random() < 0.02
+                    email_log_objs.append(EmailLog(
+                        recipient_email=recipient, recipient_name=customer.name, subject=subject,
+                        body_text=f'{customer.name}様 {booking.booking_date} {booking.booking_time}', booking=booking,
+                        status='failed' if failed else 'sent', error_message='SMTP timeout' if failed else '',
+                        scheduled_at=sent_at, sent_at=None if failed else sent_at,
+                    ))
+                if booking.status in ('pending', 'confirmed') and booking.booking_date >= today:
+                    reminder_at = timezone.make_aware(datetime.datetime.combine(
+                        booking.booking_date - datetime.timedelta(days=1), datetime.time(10, 0)
+                    ))
+                    email_log_objs.append(EmailLog(
+                        recipient_email=customer.email, recipient_name=customer.name,
+                        subject='【GRACE SPA】明日のご予約のお知らせ', body_text=f'{customer.name}様',
+                        booking=booking, status='pending' if reminder_at > now else 'sent',
+                        scheduled_at=reminder_at,
+                    ))
+            EmailLog.objects.bulk_create(email_log_objs, batch_size=batch_size)
+
+        # bulk_create ではシグナルが発生しないため、顧客の利用実績と検索インデックスはまとめて作成する
+        recompute_customer_stats(Customer.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}').values('pk'))
+        rebuild_search_index()
+
+    return {
+        'services': service_objs,
+        'therapists': therapist_objs,
+        'customers': customer_objs,
+        'bookings': booking_objs,
+        'schedules': schedule_objs,
+        'gap_blocks': gap_block_objs,
+        'email_logs': email_log_objs,
+        'today': today,
+    }
+
+
+def clear_bench_data():
+    """generate_bench_data で作成したデータを削除し、削除件数を返す"""
+    with transaction.atomic():
+        deleted = 0
+        for queryset in [
+            EmailLog.objects.filter(recipient_email__endswith=f'@{BENCH_EMAIL_DOMAIN}'),
+            Customer.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}'),
+            Schedule.objects.filter(created_by=BENCH_CREATED_BY),
+            GapBlock.objects.filter(reason__startswith=BENCH_NAME_PREFIX),
+            Service.objects.filter(name__startswith=BENCH_NAME_PREFIX),
+            Therapist.objects.filter(name__startswith=BENCH_NAME_PREFIX),
+        ]:
+            count, _ = queryset.delete()
+            deleted += count
+    return deleted
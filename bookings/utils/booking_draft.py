@@ -0,0 +1,148 @@
+# bookings/utils/booking_draft.py
+# 予約フォーム（ステップ1〜確認画面）の入力途中のデータを管理する
+#
+# BOOKING_WIZARD_MODE = 'session'（既定）: 従来どおりセッションに保存
+# BOOKING_WIZARD_MODE = 'token'         : 署名付きトークン（django.core.signing）に保存し、
+#                                         フォームの hidden 項目で次のステップに引き継ぐ
+#
+# トークンは改ざんできないが暗号化はされないため、お客様情報（備考を含む）を含むトークンはURLに載せない
+# （ステップ2→ステップ3、ステップ3→確認画面は、リダイレクトせずに次の画面を直接表示する）
+#
+# トークンは有効期間内なら何度でも検証を通るため、予約の確定に使ったトークンはキャッシュに記録し、
+# 同じトークンでの再送信（二重送信・再生）では予約を作成しない（ワーカー間で共有するキャッシュが必要）
+
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+from urllib.parse import urlencode
+
+TOKEN_FIELD = 'booking_token'
+TOKEN_SALT = 'bookings.booking_draft'
+
+# セッションのキー → トークン内の短いキー
+DRAFT_KEYS = {
+    'booking_service_id': 's',
+    'booking_date': 'd',
+    'booking_time': 't',
+    'booking_therapist_id': 'th',
+    'booking_notes': 'n',
+    'customer_name': 'cn',
+    'customer_email': 'ce',
+    'customer_phone': 'cp',
+    'customer_gender': 'cg',
+    'customer_is_first_visit': 'cf',
+}
+SHORT_KEYS = {short: key for key, short in DRAFT_KEYS.items()}
+
+# 予約の確定に使ったトークン（トークンのハッシュ）
+USED_TOKEN_KEY = 'booking_draft:used:{}'
+
+# 日時・施術者選択までの項目（お客様情報を含まない。備考は健康状態などを含むことがあるため除く）
+SELECTION_KEYS = ('booking_service_id', 'booking_date', 'booking_time', 'booking_therapist_id')
+
+
+def is_token_mode():
+    return getattr(settings, 'BOOKING_WIZARD_MODE', 'session') == 'token'
+
+
+def get_token_max_age():
+    """トークンの有効期間（秒）"""
+    return getattr(settings, 'BOOKING_TOKEN_MAX_AGE', 3600)
+
+
+def dumps_draft(data):
+    """入力データを署名付きトークンに変換"""
+    compact = {DRAFT_KEYS[key]: value for key, value in data.items() if key in DRAFT_KEYS}
+    return signing.dumps(compact, salt=TOKEN_SALT, compress=True)
+
+
+def loads_draft(token):
+    """
+    署名付きトークンから入力データを復元
+    改ざん・期限切れの場合は signing.BadSignature を送出する
+    """
+    compact = signing.loads(token, salt=TOKEN_SALT, max_age=get_token_max_age())
+    return {SHORT_KEYS[short]: value for short, value in compact.items() if short in SHORT_KEYS}
+
+
+class BookingDraft:
+    """予約フォームの入力途中のデータ（セッションまたは署名付きトークン）"""
+
+    def __init__(self, request):
+        self.request = request
+        self.use_token = is_token_mode()
+        # トークンが改ざん・期限切れだった場合に True
+        self.invalid_token = False
+        # 受け取ったトークン（トークン方式のみ）
+        self.received_token = ''
+        self.data = self._load()
+
+    def _load(self):
+        if not self.use_token:
+            session = self.request.session
+            return {key: session[key] for key in DRAFT_KEYS if key in session}
+
+        token = self.request.POST.get(TOKEN_FIELD) or self.request.GET.get(TOKEN_FIELD)
+        if not token:
+            return {}
+        self.received_token = token
+        try:
+            return loads_draft(token)
+        except signing.BadSignature:
+            self.invalid_token = True
+            return {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def update(self, **values):
+        self.data.update(values)
+        if not self.use_token:
+            for key, value in values.items():
+                self.request.session[key] = value
+
+    def _used_token_key(self):
+        return USED_TOKEN_KEY.format(hashlib.sha256(self.received_token.encode()).hexdigest())
+
+    def claim(self):
+        """
+        予約の確定前に、受け取ったトークンを使用済みにする
+        すでに使用済み（同じトークンでの再送信）の場合は False。セッション方式では常に True
+        （セッション方式では確定後に入力データを削除するため、再送信は入力不足になる）
+        """
+        if not self.use_token:
+            return True
+        return cache.add(self._used_token_key(), True, get_token_max_age())
+
+    def release(self):
+        """予約を確定できなかった場合に、トークンを使用済みから戻す（同じ内容で再送信できるように）"""
+        if self.use_token:
+            cache.delete(self._used_token_key())
+
+    def clear(self):
+        """予約確定後に入力データを削除"""
+        if not self.use_token:
+            for key in DRAFT_KEYS:
+                self.request.session.pop(key, None)
+        self.data = {}
+
+    @property
+    def token(self):
+        """フォームの hidden 項目に埋め込むトークン（セッション方式では空）"""
+        return dumps_draft(self.data) if self.use_token else ''
+
+    def url(self, view_name, keys=SELECTION_KEYS):
+        """
+        次のステップ・戻り先のURL
+        トークン方式では指定した項目だけを含むトークンをクエリに付ける
+        """
+        url = reverse(view_name)
+        if not self.use_token:
+            return url
+        data = {key: self.data[key] for key in keys if key in self.data}
+        if not data:
+            return url
+        return f'{url}?{urlencode({TOKEN_FIELD: dumps_draft(data)})}'
@@ -0,0 +1,54 @@
+# bookings/utils/bulk_actions.py
+# 管理画面の一括操作（予約のステータス変更・空白時間ブロックの有効/無効など）
+#
+# 予約ごとに save() すると、シグナル（変更前の取得・メール送信・キャッシュ無効化・ダッシュボード通知）が
+# 1件ずつ実行され、数百件の操作に数分かかる。一括操作では
+#   - 変更は UPDATE 1回
+#   - 変更後の処理は booking_status_bulk_changed シグナルで、操作ごとに1回だけ実行する
+#     （メールはまとめて送信待ちに登録し、キャッシュの無効化は対象日の分を1回で行う）
+#     受信側は一括操作のトランザクション内で実行されるため、それぞれセーブポイント内で書き込み、
+#     失敗してもログに記録するだけで一括操作は確定する
+
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import invalidate_availability
+
+
+def bulk_change_booking_status(queryset, new_status):
+    """
+    予約のステータスを一括変更する
+
+    戻り値: ステータスを変更した予約と変更前のステータスの組のリスト
+    （すでに変更後のステータスの予約は対象外）
+    """
+    from ..models import Booking
+    from ..signals import booking_status_bulk_changed
+
+    with transaction.atomic():
+        bookings = list(
+            queryset.exclude(status=new_status).select_related('customer', 'service', 'therapist')
+        )
+        if not bookings:
+            return []
+
+        changes = [(booking, booking.status) for booking in bookings]
+        now = timezone.now()
+        Booking.objects.filter(id__in=[booking.id for booking in bookings]).update(status=new_status, updated_at=now)
+        for booking in bookings:
+            booking.status = new_status
+            booking.updated_at = now
+
+        invalidate_availability({booking.booking_date for booking in bookings})
+        booking_status_bulk_changed.send(sender=Booking, changes=changes, new_status=new_status)
+    return changes
+
+
+def bulk_update_dated(queryset, date_field, **values):
+    """
+    日付ごとに空き時間が変わるモデル（空白時間ブロックなど）を一括更新し、対象日の空き時間を1回で無効化する
+    戻り値: 更新した件数
+    """
+    with transaction.atomic():
+        invalidate_availability(queryset.values_list(date_field, flat=True).distinct())
+        return queryset.update(**values)
@@ -0,0 +1,55 @@
+# bookings/utils/cache_versions.py
+# キャッシュの世代（バージョン）番号を管理する
+# データ変更時にバージョンを上げることで、古いキャッシュキーを参照しなくなる
+
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY_PREFIX = 'cache_version'
+
+
+def _version_key(name):
+    return f'{VERSION_KEY_PREFIX}:{name}'
+
+
+def _initial_version():
+    """
+    初期値（キャッシュから削除された後に作り直した場合も、以前と同じ番号にならないよう現在時刻を使う）
+    バージョン番号を ETag に含める場合に、古い ETag と一致してしまうのを防ぐ
+    """
+    return int(time.time() * 1000)
+
+
+def get_version(name):
+    """現在のバージョン番号を取得（未設定なら初期化）"""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key, 1)
+    return version
+
+
+def get_versions(*names):
+    """複数のバージョン番号をまとめて取得（キャッシュへの問い合わせは1回）"""
+    keys = {name: _version_key(name) for name in names}
+    found = cache.get_many(list(keys.values()))
+    versions = {}
+    for name, key in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), None)
+            found[key] = cache.get(key, 1)
+        versions[name] = found[key]
+    return versions
+
+
+def bump_version(name):
+    """バージョン番号を1つ上げる（他プロセスと競合しないようincrを使用）"""
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # キーが存在しない場合は初期化してから加算
+        cache.add(key, _initial_version(), None)
+        return cache.incr(key)
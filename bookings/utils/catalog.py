@@ -0,0 +1,185 @@
+# bookings/utils/catalog.py
+# 予約フォーム・空き時間API・公開ページで使うサービス・施術者の一覧（カタログ）
+#
+# 有効なサービス・施術者を日本語・英語の両方で表示用に変換した、変更不可のスナップショットを
+# プロセスごとに1回だけ読み込み、ID から直接取得できるようにする（各ステップでの Service.objects.get を省く）
+# サービス・施術者の保存・削除時にバージョンを上げ（bookings/signals.py）、
+# 各プロセスは次の参照時にバージョンの変化を検知して読み込み直す
+#
+# バージョンは Django のキャッシュに保存するため、ワーカー間で共有するキャッシュが必要
+# （locmem ではバージョンの変化が他のワーカーに伝わらない）。共有されない場合でも古い一覧を使い続けないよう、
+# 読み込んでから CATALOG_SNAPSHOT_MAX_AGE 秒を過ぎたスナップショットは読み込み直す
+
+from dataclasses import dataclass
+from typing import Any, Optional
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache_versions import get_versions, bump_version
+
+LANGUAGES = ('ja', 'en')
+SERVICES_VERSION = 'catalog:services'
+THERAPISTS_VERSION = 'catalog:therapists'
+
+# このプロセスで読み込んだスナップショット（バージョンが変わるまで使い回す）
+_snapshots = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CatalogService:
+    """表示用のサービス（言語ごとに作成）"""
+    id: int
+    name: str
+    description: str
+    duration_minutes: int
+    price: int
+    is_combo: bool
+    updated_at: Optional[datetime.datetime]
+
+    @classmethod
+    def from_model(cls, service, language='ja'):
+        return cls(
+            id=service.id,
+            name=service.get_name(language),
+            description=service.get_description(language),
+            duration_minutes=service.duration_minutes,
+            price=service.price,
+            # コンボメニュー判定（日本語名ベースで判定）
+            is_combo='タイ古式' in service.name or 'コンボ' in service.name,
+            updated_at=service.updated_at,
+        )
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.name
+
+
+@dataclass(frozen=True)
+class CatalogTherapist:
+    """表示用の施術者（言語ごとに作成）"""
+    id: int
+    name: str
+    display_name: str
+    description: str
+    image: Any
+    image_renditions: dict
+    sort_order: int
+    updated_at: Optional[datetime.datetime]
+
+    @classmethod
+    def from_model(cls, therapist, language='ja'):
+        return cls(
+            id=therapist.id,
+            name=therapist.name,
+            display_name=therapist.get_display_name(language),
+            description=therapist.get_description(language),
+            image=therapist.image,
+            image_renditions=therapist.image_renditions,
+            sort_order=therapist.sort_order,
+            updated_at=therapist.updated_at,
+        )
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.display_name
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """ある時点の有効なサービス（または施術者）の一覧"""
+    version: int
+    # 言語ごとの一覧（表示順）と、ID からの対応表
+    items: dict
+    by_id: dict
+    # 読み込んだ時刻（time.monotonic()）
+    loaded_at: float
+
+    @classmethod
+    def build(cls, version, objects, entry_class):
+        items = {language: tuple(entry_class.from_model(obj, language) for obj in objects) for language in LANGUAGES}
+        by_id = {language: {entry.id: entry for entry in entries} for language, entries in items.items()}
+        return cls(version=version, items=items, by_id=by_id, loaded_at=time.monotonic())
+
+    def is_current(self, version):
+        """バージョンが同じで、読み込んでから CATALOG_SNAPSHOT_MAX_AGE 秒以内か"""
+        return self.version == version and time.monotonic() - self.loaded_at < get_snapshot_max_age()
+
+
+def get_snapshot_max_age():
+    """スナップショットを使い回す最長時間（秒）"""
+    return getattr(settings, 'CATALOG_SNAPSHOT_MAX_AGE', 60)
+
+
+def _load_services():
+    from ..models import Service
+    return Service.objects.filter(is_active=True).order_by('sort_order', 'name'), CatalogService
+
+
+def _load_therapists():
+    from ..models import Therapist
+    return Therapist.objects.filter(is_active=True).order_by('sort_order', 'name'), CatalogTherapist
+
+
+def _get_snapshot(version_name, load):
+    """このプロセスのスナップショットを取得（バージョンが変わっているか、最長時間を過ぎていれば読み込み直す）"""
+    version = get_versions(version_name)[version_name]
+    snapshot = _snapshots.get(version_name)
+    if snapshot is not None and snapshot.is_current(version):
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshots.get(version_name)
+        if snapshot is None or not snapshot.is_current(version):
+            queryset, entry_class = load()
+            snapshot = CatalogSnapshot.build(version, list(queryset), entry_class)
+            _snapshots[version_name] = snapshot
+    return snapshot
+
+
+def _to_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_services(language='ja'):
+    """有効なサービスの一覧（表示順）"""
+    return _get_snapshot(SERVICES_VERSION, _load_services).items[language]
+
+
+def get_therapists(language='ja'):
+    """有効な施術者の一覧（表示順）"""
+    return _get_snapshot(THERAPISTS_VERSION, _load_therapists).items[language]
+
+
+def get_service(service_id, language='ja'):
+    """有効なサービスをIDで取得（見つからない・無効な場合は None）"""
+    return _get_snapshot(SERVICES_VERSION, _load_services).by_id[language].get(_to_id(service_id))
+
+
+def get_therapist(therapist_id, language='ja'):
+    """有効な施術者をIDで取得（見つからない・無効な場合は None）"""
+    return _get_snapshot(THERAPISTS_VERSION, _load_therapists).by_id[language].get(_to_id(therapist_id))
+
+
+def invalidate_catalog(services=False, therapists=False):
+    """カタログのバージョンを上げる（トランザクション確定後）"""
+    names = [name for name, changed in [(SERVICES_VERSION, services), (THERAPISTS_VERSION, therapists)] if changed]
+
+    def bump():
+        for name in names:
+            bump_version(name)
+
+    transaction.on_commit(bump)
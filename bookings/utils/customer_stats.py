@@ -0,0 +1,151 @@
+# bookings/utils/customer_stats.py
+# 顧客ごとの利用実績（確定・完了の予約数、初回・最終の予約日、累計売上）
+#
+# 一覧・管理画面で顧客ごとに予約を数えないよう、実績は Customer の列に保持する
+#   - 予約の保存・削除時は、変更前後の差分だけを UPDATE 1回で反映する（bookings/signals.py。累計売上はその顧客分を集計し直す）
+#   - サービス料金の変更時は、そのサービスの完了した予約がある顧客の実績を集計し直す
+#   - 一括操作（bookings/utils/bulk_actions.py）では、対象の顧客分をまとめて集計し直す
+#   - ずれた場合は manage.py recompute_customer_stats で全件を集計し直せる
+# 初回・最終の予約日は確定・完了の予約から、累計売上は売上ダッシュボードと同じく完了した予約のサービス料金の合計
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+ACTIVE_STATUSES = ('confirmed', 'completed')
+COUNT_FIELDS = {
+    'confirmed': 'confirmed_booking_count',
+    'completed': 'completed_booking_count',
+}
+
+# Customer に保持する実績の列
+STATS_FIELDS = (
+    'completed_booking_count', 'confirmed_booking_count', 'first_booking_date', 'last_booking_date', 'lifetime_revenue',
+)
+
+# 予約回数（確定・完了）による顧客区分
+REPEAT_MIN_BOOKINGS = 2
+VIP_MIN_BOOKINGS = 5
+
+# 予約回数（確定・完了）。Customer の関数インデックスと同じ式にすること（絞り込み・並び替えでインデックスを使う）
+ACTIVE_BOOKING_COUNT = F('completed_booking_count') + F('confirmed_booking_count')
+
+
+def with_active_booking_count(queryset):
+    """予約回数（確定・完了）を active_booking_count として付ける（集計はせず、保持している列の和）"""
+    return queryset.annotate(active_booking_count=ACTIVE_BOOKING_COUNT)
+
+
+def filter_segment(queryset, segment):
+    """顧客区分で絞り込む（repeat: 2回以上, vip: 5回以上）"""
+    min_bookings = {'repeat': REPEAT_MIN_BOOKINGS, 'vip': VIP_MIN_BOOKINGS}.get(segment)
+    if min_bookings is None:
+        return queryset
+    return with_active_booking_count(queryset).filter(active_booking_count__gte=min_bookings)
+
+
+# 実績の計算に使う予約の項目
+STATE_FIELDS = ('customer_id', 'status', 'booking_date', 'service_id')
+
+
+def booking_state(booking):
+    """実績の計算に使う予約の状態（顧客・ステータス・予約日・サービス）。予約、または項目名と値の辞書から作る"""
+    if isinstance(booking, dict):
+        return tuple(booking[field] for field in STATE_FIELDS)
+    return tuple(getattr(booking, field) for field in STATE_FIELDS)
+
+
+def _customer_bookings(customer_id, statuses):
+    from ..models import Booking
+    return Booking.objects.filter(customer_id=customer_id, status__in=statuses).order_by().values('customer')
+
+
+def _revenue(bookings):
+    """完了した予約のサービス料金の合計（予約がなければ0）"""
+    return Coalesce(
+        Subquery(bookings.filter(status='completed').annotate(value=Sum('service__price')).values('value')),
+        0, output_field=IntegerField()
+    )
+
+
+def _apply(customer_id, previous, current):
+    """1人の顧客に、1件の予約の変更前後の差分を反映する（previous / current: (ステータス, 予約日, サービス) または None）"""
+    from ..models import Customer
+
+    previous_status, previous_date, previous_service = previous or (None, None, None)
+    current_status, current_date, current_service = current or (None, None, None)
+    updates = {}
+
+    for status, field in COUNT_FIELDS.items():
+        delta = (current_status == status) - (previous_status == status)
+        if delta:
+            updates[field] = F(field) + delta
+
+    completed = 'completed' in (previous_status, current_status)
+    if completed and (previous_status, previous_service) != (current_status, current_service):
+        # 累計売上は差分ではなく、この顧客の完了した予約から求め直す（変更は反映済み）
+        # 料金の変更後に完了を取り消しても、変更前の料金との差でずれたり負になったりしない
+        updates['lifetime_revenue'] = _revenue(_customer_bookings(customer_id, ['completed']))
+
+    previous_active = previous_status in ACTIVE_STATUSES
+    current_active = current_status in ACTIVE_STATUSES
+    if previous_active and (not current_active or previous_date != current_date):
+        # 初回・最終の予約日が外れた可能性があるため、この顧客の予約から求め直す（変更は反映済み）
+        bookings = _customer_bookings(customer_id, ACTIVE_STATUSES)
+        updates['first_booking_date'] = Subquery(bookings.annotate(value=Min('booking_date')).values('value'))
+        updates['last_booking_date'] = Subquery(bookings.annotate(value=Max('booking_date')).values('value'))
+    elif current_active and not previous_active:
+        updates['first_booking_date'] = Least(Coalesce('first_booking_date', Value(current_date)), Value(current_date))
+        updates['last_booking_date'] = Greatest(Coalesce('last_booking_date', Value(current_date)), Value(current_date))
+
+    if updates:
+        # 失敗しても呼び出し元（予約の保存）のトランザクションを壊さないよう、セーブポイント内で更新する
+        with transaction.atomic():
+            Customer.objects.filter(pk=customer_id).update(**updates)
+
+
+def apply_booking_change(previous=None, current=None):
+    """
+    予約の保存・削除を顧客の実績に反映する（F式による UPDATE のため、同時に更新されても値がずれない）
+    previous / current: booking_state() の値（新規作成時の previous、削除時の current は None）
+    """
+    if previous == current:
+        return
+    previous_customer = previous[0] if previous else None
+    current_customer = current[0] if current else None
+
+    if previous_customer == current_customer:
+        _apply(current_customer, previous[1:], current[1:])
+        return
+    # 予約の顧客が変わった場合は、変更前の顧客から除き、変更後の顧客に加える
+    if previous_customer:
+        _apply(previous_customer, previous[1:], None)
+    if current_customer:
+        _apply(current_customer, None, current[1:])
+
+
+def recompute_customer_stats(customer_ids=None):
+    """
+    顧客の実績を予約から集計し直す（対象の顧客をまとめて UPDATE 1回）
+    customer_ids: 顧客IDのリスト・集合、または顧客IDを返すクエリセット（省略した場合はすべての顧客）
+    戻り値: 更新した顧客数
+    """
+    from ..models import Booking, Customer
+
+    bookings = Booking.objects.filter(customer=OuterRef('pk')).order_by().values('customer')
+    active = bookings.filter(status__in=ACTIVE_STATUSES)
+
+    def count(status):
+        return Coalesce(Subquery(bookings.filter(status=status).annotate(value=Count('id')).values('value')), 0)
+
+    customers = Customer.objects.all()
+    if customer_ids is not None:
+        customers = customers.filter(pk__in=customer_ids)
+
+    return customers.update(
+        completed_booking_count=count('completed'),
+        confirmed_booking_count=count('confirmed'),
+        first_booking_date=Subquery(active.annotate(value=Min('booking_date')).values('value')),
+        last_booking_date=Subquery(active.annotate(value=Max('booking_date')).values('value')),
+        lifetime_revenue=_revenue(bookings),
+    )
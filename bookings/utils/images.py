@@ -0,0 +1,89 @@
+# bookings/utils/images.py
+# アップロード画像の縮小版（WebP・JPEG）を作成する
+#
+# スマートフォンで撮影した写真（数百KB〜数MB）をそのまま配信しないよう、表示幅ごとの縮小版を作成し
+# テンプレートタグ {% responsive_image %}（bookings/templatetags/image_extras.py）で srcset として出力する
+# 縮小版は元画像の内容のハッシュで保存するため、同じ写真を何度アップロードしてもファイルは1組だけになる
+# （ファイル名が内容で決まるので、ブラウザ・CDNで長期間キャッシュしてもよい）
+
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+RENDITION_DIR = 'renditions'
+
+# 形式ごとの保存設定（EXIF は渡さないため、位置情報などは縮小版に残らない）
+RENDITION_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 75, 'method': 6},
+    'jpeg': {'format': 'JPEG', 'quality': 80, 'optimize': True, 'progressive': True},
+}
+
+
+def get_rendition_widths():
+    """作成する縮小版の幅（px）"""
+    return getattr(settings, 'IMAGE_RENDITION_WIDTHS', (160, 320, 640, 960))
+
+
+def _open_image(data):
+    """画像を開き、EXIF の向きを反映したRGB画像を返す"""
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # 透過部分は白で塗りつぶす（JPEG は透過に対応していないため）
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_renditions(field_file, widths=None, storage=None):
+    """
+    画像の縮小版を作成し、テンプレートタグで使う一覧を返す
+
+    戻り値の例:
+        {'source': 'therapists/IMG_2390.JPG', 'hash': '…', 'width': 3024, 'height': 4032,
+         'webp': [[160, 'renditions/…/160w.webp'], …], 'jpeg': [[160, 'renditions/…/160w.jpg'], …]}
+
+    元画像より大きい幅は作成しない（元画像が最小幅より小さい場合は元の幅で1つだけ作成）
+    同じハッシュの縮小版が既にあれば作成せずに再利用する
+    """
+    storage = storage or default_storage
+    field_file.open('rb')
+    try:
+        data = field_file.read()
+    finally:
+        field_file.close()
+
+    digest = hashlib.sha256(data).hexdigest()
+    image = _open_image(data)
+    original_width, original_height = image.size
+
+    target_widths = sorted({min(width, original_width) for width in (widths or get_rendition_widths())})
+    renditions = {
+        'source': field_file.name,
+        'hash': digest,
+        'width': original_width,
+        'height': original_height,
+    }
+    for ext in RENDITION_FORMATS:
+        renditions[ext] = []
+
+    for width in target_widths:
+        height = round(original_height * width / original_width)
+        resized = None
+        for ext, options in RENDITION_FORMATS.items():
+            name = f'{RENDITION_DIR}/{digest[:2]}/{digest[:16]}/{width}w.{"jpg" if ext == "jpeg" else ext}'
+            if not storage.exists(name):
+                if resized is None:
+                    resized = image if width == original_width else image.resize((width, height), Image.LANCZOS)
+                buffer = io.BytesIO()
+                resized.save(buffer, **options)
+                storage.save(name, ContentFile(buffer.getvalue()))
+            renditions[ext].append([width, name])
+
+    return renditions
@@ -0,0 +1,41 @@
+# bookings/utils/maintenance.py
+# メンテナンスモードの状態をプロセス内にキャッシュする
+# DjangoキャッシュのバージョンキーでMaintenanceMode.save()時の変更を検知する
+
+from django.utils import timezone
+from .cache_versions import get_version, bump_version
+
+MAINTENANCE_VERSION = 'maintenance_mode'
+
+# プロセス内キャッシュ（バージョン番号と設定インスタンス）
+_local_state = {'version': None, 'maintenance': None}
+
+
+def invalidate_maintenance_cache():
+    """メンテナンス設定のキャッシュを無効化（全プロセスに反映）"""
+    _local_state['version'] = None
+    _local_state['maintenance'] = None
+    bump_version(MAINTENANCE_VERSION)
+
+
+def get_cached_maintenance():
+    """
+    メンテナンス設定を取得
+    バージョンが変わっていなければDBにアクセスせずプロセス内のインスタンスを返す
+    """
+    from bookings.models import MaintenanceMode
+
+    version = get_version(MAINTENANCE_VERSION)
+    if _local_state['version'] != version or _local_state['maintenance'] is None:
+        _local_state['maintenance'] = MaintenanceMode.get_current_settings()
+        _local_state['version'] = version
+    return _local_state['maintenance']
+
+
+def is_maintenance_active(now=None):
+    """
+    現在メンテナンス中かどうか
+    開始日時・終了予定日時が設定されている場合はその期間内のみ有効とする
+    """
+    maintenance = get_cached_maintenance()
+    return maintenance.is_active_at(now or timezone.now()), maintenance
@@ -0,0 +1,183 @@
+# bookings/utils/profiling.py
+# リクエストごとの処理時間の内訳（DBクエリ・テンプレート描画）を計測する
+#
+# ProfilingMiddleware（bookings/middleware.py）が PROFILING_SAMPLE_RATE の割合のリクエストを計測し、
+# 結果を Server-Timing ヘッダーで返すとともにキャッシュ上の連番付きログに保存する
+# （dashboard/live.py のイベントログと同じ方式）。/dashboard/perf/ でこのログを集計して表示する
+
+import contextvars
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils import timezone
+
+PROFILE_SEQ_KEY = 'profiling:seq'
+PROFILE_KEY = 'profiling:{}'
+
+# 1リクエストで保存する重複SQLの件数
+MAX_DUPLICATES = 5
+
+# 計測中のリクエスト（スレッド・非同期タスクごと）
+_current_profile = contextvars.ContextVar('current_profile', default=None)
+
+
+def is_profiling_enabled():
+    return getattr(settings, 'PROFILING_ENABLED', False)
+
+
+def get_sample_rate():
+    """計測するリクエストの割合（0〜1）"""
+    return getattr(settings, 'PROFILING_SAMPLE_RATE', 1.0)
+
+
+def get_history_size():
+    """/dashboard/perf/ で集計する直近のリクエスト数"""
+    return getattr(settings, 'PROFILING_HISTORY_SIZE', 500)
+
+
+def get_excluded_paths():
+    """計測しないパス（前方一致）"""
+    return getattr(settings, 'PROFILING_EXCLUDE_PATHS', ['/static/', '/media/', '/dashboard/events/', '/dashboard/perf/'])
+
+
+class RequestProfile:
+    """1リクエスト分の計測結果"""
+
+    __slots__ = ('started', 'total_ms', 'db_ms', 'template_ms', 'queries', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.queries = 0
+        # SQL文 → [実行回数, 合計時間(ms)]
+        self.statements = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper に渡すクエリ計測"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.db_ms += elapsed_ms
+            statement = self.statements[sql]
+            statement[0] += 1
+            statement[1] += elapsed_ms
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def duplicates(self):
+        """2回以上実行されたSQL文（N+1 の候補）を実行回数の多い順に返す"""
+        rows = [
+            {'sql': sql, 'count': count, 'ms': round(ms, 2)}
+            for sql, (count, ms) in self.statements.items() if count > 1
+        ]
+        rows.sort(key=lambda row: (-row['count'], -row['ms']))
+        return rows[:MAX_DUPLICATES]
+
+    def server_timing(self):
+        """Server-Timing ヘッダーの値"""
+        return (
+            f'total;dur={self.total_ms:.1f}, '
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries", '
+            f'tpl;dur={self.template_ms:.1f}'
+        )
+
+
+def start_profile():
+    profile = RequestProfile()
+    return profile, _current_profile.set(profile)
+
+
+def end_profile(token):
+    _current_profile.reset(token)
+
+
+_original_template_render = DjangoTemplate.render
+
+
+def _timed_template_render(self, context=None, request=None):
+    profile = _current_profile.get()
+    if profile is None:
+        return _original_template_render(self, context, request)
+    started = time.perf_counter()
+    try:
+        return _original_template_render(self, context, request)
+    finally:
+        profile.template_ms += (time.perf_counter() - started) * 1000
+
+
+def install_template_timer():
+    """
+    テンプレート描画時間を計測できるようにする（プロファイリング有効時のみ呼び出す）
+    render() / TemplateResponse はいずれもこのバックエンドの Template.render を経由する
+    {% include %} は内部のテンプレートで描画されるため二重には数えない
+    """
+    DjangoTemplate.render = _timed_template_render
+
+
+def save_profile(request, response, profile):
+    """計測結果をキャッシュ上のログに保存"""
+    try:
+        profile_id = cache.incr(PROFILE_SEQ_KEY)
+    except ValueError:
+        cache.add(PROFILE_SEQ_KEY, 0, None)
+        profile_id = cache.incr(PROFILE_SEQ_KEY)
+
+    match = getattr(request, 'resolver_match', None)
+    cache.set(PROFILE_KEY.format(profile_id), {
+        'id': profile_id,
+        'time': timezone.now(),
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else '',
+        'status': response.status_code,
+        'total_ms': round(profile.total_ms, 1),
+        'db_ms': round(profile.db_ms, 1),
+        'template_ms': round(profile.template_ms, 1),
+        'queries': profile.queries,
+        'duplicates': profile.duplicates(),
+    }, getattr(settings, 'PROFILING_TTL', 3600))
+    return profile_id
+
+
+def get_recent_profiles(limit=None):
+    """直近の計測結果を新しい順に返す（期限切れ・削除済みは飛ばす）"""
+    latest_id = cache.get(PROFILE_SEQ_KEY, 0)
+    limit = limit or get_history_size()
+    keys = [PROFILE_KEY.format(profile_id) for profile_id in range(latest_id, max(latest_id - limit, 0), -1)]
+    found = cache.get_many(keys)
+    return [found[key] for key in keys if key in found]
+
+
+def summarise_profiles(profiles):
+    """ビューごとに集計し、合計処理時間の多い順に返す"""
+    groups = defaultdict(list)
+    for profile in profiles:
+        groups[profile['view'] or profile['path']].append(profile)
+
+    summary = []
+    for name, rows in groups.items():
+        totals = sorted(row['total_ms'] for row in rows)
+        count = len(rows)
+        summary.append({
+            'name': name,
+            'count': count,
+            'avg_ms': round(sum(totals) / count, 1),
+            'p95_ms': totals[min(count - 1, int(count * 0.95))],
+            'max_ms': totals[-1],
+            'avg_queries': round(sum(row['queries'] for row in rows) / count, 1),
+            'max_queries': max(row['queries'] for row in rows),
+            'avg_db_ms': round(sum(row['db_ms'] for row in rows) / count, 1),
+            'avg_template_ms': round(sum(row['template_ms'] for row in rows) / count, 1),
+            'total_ms': round(sum(totals), 1),
+        })
+    summary.sort(key=lambda row: -row['total_ms'])
+    return summary
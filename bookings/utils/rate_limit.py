@@ -0,0 +1,146 @@
+# bookings/utils/rate_limit.py
+# スライディングウィンドウ方式のレート制限
+#
+# 1つのキー（IPアドレスなど）につき「現在の区間」と「直前の区間」の2つのカウンタだけを
+# キャッシュに保持し、直前の区間の件数を経過時間で按分して現在の件数に加える。
+#   推定件数 = 直前の件数 × (残り時間 / 区間長) + 現在の件数
+# アクセス履歴のリストを保持しないため、1キーあたりのメモリと処理コストは一定。
+#
+# カウンタの加算は cache.add / cache.incr で行うため、LocMem・memcached・Redis 互換の
+# バックエンドではプロセス間でも競合しない（ファイルキャッシュの incr は Django 側の
+# get/set で代替されるため厳密な原子性はない）。
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'ratelimit'
+
+
+class RateLimitPolicy:
+    """パスごとのレート制限ポリシー"""
+
+    def __init__(self, name, limit, window, paths=None, methods=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.paths = tuple(paths or ())
+        self.methods = tuple(method.upper() for method in (methods or ()))
+
+    def matches(self, request):
+        """リクエストがこのポリシーの対象かどうか（パスは前方一致）"""
+        if self.methods and request.method not in self.methods:
+            return False
+        return not self.paths or request.path.startswith(self.paths)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data['name'],
+            limit=data['limit'],
+            window=data['window'],
+            paths=data.get('paths'),
+            methods=data.get('methods'),
+        )
+
+    def __repr__(self):
+        return f'RateLimitPolicy({self.name!r}, {self.limit}/{self.window}s)'
+
+
+class RateLimitResult:
+    """レート制限の判定結果"""
+
+    __slots__ = ('allowed', 'count', 'limit', 'retry_after')
+
+    def __init__(self, allowed, count, limit, retry_after):
+        self.allowed = allowed
+        self.count = count
+        self.limit = limit
+        self.retry_after = retry_after
+
+    def __bool__(self):
+        return self.allowed
+
+
+def _incr(key, timeout):
+    """カウンタを原子的に1増やす（存在しなければ0で作成）"""
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # add と incr の間に期限切れ・削除された場合
+        cache.add(key, 0, timeout)
+        return cache.incr(key)
+
+
+def hit(identifier, limit, window, now=None):
+    """
+    1回のアクセスを記録し、制限内かどうかを返す
+
+    identifier: ポリシー名とIPアドレスなどを組み合わせた識別子
+    limit: 区間内に許可する回数
+    window: 区間の長さ（秒）
+    """
+    if now is None:
+        now = time.time()
+
+    current_window = int(now // window)
+    elapsed = now - current_window * window
+
+    current_key = f'{KEY_PREFIX}:{identifier}:{current_window}'
+    previous_key = f'{KEY_PREFIX}:{identifier}:{current_window - 1}'
+
+    # 直前の区間の按分に使うため、2区間分保持する
+    current_count = _incr(current_key, window * 2)
+    previous_count = cache.get(previous_key, 0)
+
+    weight = (window - elapsed) / window
+    count = previous_count * weight + current_count
+
+    allowed = count <= limit
+    retry_after = 0 if allowed else int(window - elapsed) + 1
+    return RateLimitResult(allowed, count, limit, retry_after)
+
+
+def check_policy(policy, client_id, now=None):
+    """ポリシーに従ってアクセスを記録・判定する"""
+    return hit(f'{policy.name}:{client_id}', policy.limit, policy.window, now=now)
+
+
+def get_booking_policies():
+    """
+    予約セキュリティ用のポリシー一覧
+    settings.BOOKING_RATE_LIMIT_POLICIES で上書きできる
+    """
+    policies = getattr(settings, 'BOOKING_RATE_LIMIT_POLICIES', None)
+    if policies is None:
+        policies = [
+            {
+                # 予約の確定（1時間にIPごと3回まで）
+                'name': 'booking_submit',
+                'paths': ['/booking/confirm/', '/en/booking/confirm/'],
+                'methods': ['POST'],
+                'limit': getattr(settings, 'BOOKING_HOURLY_LIMIT_PER_IP', 3),
+                'window': 3600,
+            },
+        ]
+    return [RateLimitPolicy.from_dict(policy) for policy in policies]
+
+
+def get_suspicious_activity_policy():
+    """
+    不審なアクティビティ検出用のポリシー
+    settings.SUSPICIOUS_ACTIVITY_POLICY で上書きできる
+    """
+    policy = getattr(settings, 'SUSPICIOUS_ACTIVITY_POLICY', None)
+    if policy is None:
+        policy = {
+            # 5分間に5回を超えるフォーム送信は不審とみなす
+            'name': 'suspicious_post',
+            'paths': ['/booking/', '/en/booking/'],
+            'methods': ['POST'],
+            'limit': 5,
+            'window': 300,
+        }
+    return RateLimitPolicy.from_dict(policy)
@@ -0,0 +1,164 @@
+# bookings/utils/search.py
+# 顧客・予約の検索（ダッシュボードの顧客一覧・管理画面の検索）
+#
+# 名前・メールアドレス・電話番号の部分一致（icontains）はテーブル全体の LIKE になり、顧客数に比例して遅くなるため、
+# SQLite FTS5 の全文検索インデックス（trigram トークナイザ。日本語の名前も3文字単位で部分一致できる）を使う
+#   - customer_search: 顧客の名前・メールアドレス・電話番号（数字のみ）。rowid は顧客ID
+#   - booking_search : 予約の備考（備考のある予約のみ）。rowid は予約ID
+# インデックスは顧客・予約の保存・削除時に更新する（bookings/signals.py。予約は備考が変わった場合のみ）。
+# bulk_create などシグナルが発生しない変更の後は rebuild_search_index()（manage.py rebuild_search_index）で作り直す
+#
+# trigram は3文字未満の語を検索できないため、短い検索語は正規化した電話番号・メールアドレスの前方一致
+# （インデックスの範囲検索）と、名前・備考の部分一致で検索する
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+CUSTOMER_SEARCH_TABLE = 'customer_search'
+BOOKING_SEARCH_TABLE = 'booking_search'
+
+# trigram で検索できる最短の文字数
+MIN_MATCH_LENGTH = 3
+
+# 電話番号として検索する入力（数字と区切り文字のみ）
+PHONE_QUERY_PATTERN = re.compile(r'^[\d\s()+\-]+$')
+
+
+def normalize_phone(phone):
+    """電話番号を数字のみにする（ハイフン・空白・括弧の有無によらず検索できるように）"""
+    return re.sub(r'\D', '', phone or '')
+
+
+def normalize_email(email):
+    """メールアドレスを小文字にする"""
+    return (email or '').strip().lower()
+
+
+def is_search_index_available():
+    """全文検索インデックスを使えるか（SQLite のみ）"""
+    return connection.vendor == 'sqlite'
+
+
+def _phrase(text):
+    """FTS5 の検索式のフレーズ（記号を演算子として解釈させない）"""
+    return '"%s"' % text.replace('"', '""')
+
+
+def _prefix_range(field, prefix):
+    """前方一致をインデックスの範囲検索で行う（LIKE は大文字小文字を区別しないためインデックスを使えない）"""
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\uffff'})
+
+
+def _match(table, expression):
+    """全文検索に一致する rowid（顧客ID・予約ID）のサブクエリ"""
+    return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [expression])
+
+
+def _customer_condition(term):
+    """顧客の検索条件（インデックスを使える条件の OR。3文字未満の名前のみ部分一致で全件走査する）"""
+    if not is_search_index_available():
+        return Q(name__icontains=term) | Q(email__icontains=term) | Q(phone__icontains=term)
+
+    digits = normalize_phone(term) if PHONE_QUERY_PATTERN.match(term) else ''
+    phrases = []
+    if len(term) >= MIN_MATCH_LENGTH:
+        phrases.append(_phrase(term))
+    if len(digits) >= MIN_MATCH_LENGTH and digits != term:
+        phrases.append(f'phone : {_phrase(digits)}')
+
+    if phrases:
+        condition = Q(pk__in=_match(CUSTOMER_SEARCH_TABLE, ' OR '.join(phrases)))
+    else:
+        condition = Q(name__icontains=term)
+    condition |= _prefix_range('email_normalized', normalize_email(term))
+    if digits:
+        condition |= _prefix_range('phone_normalized', digits)
+    return condition
+
+
+def search_customers(queryset, query):
+    """顧客を名前・メールアドレス・電話番号で検索"""
+    term = (query or '').strip()
+    if not term:
+        return queryset
+    return queryset.filter(_customer_condition(term))
+
+
+def search_bookings(queryset, query):
+    """予約を顧客の名前・メールアドレス・電話番号と備考で検索"""
+    from ..models import Customer
+
+    term = (query or '').strip()
+    if not term:
+        return queryset
+
+    # 顧客は先に絞り込み、予約は顧客IDのインデックスで取得する
+    condition = Q(customer__in=Customer.objects.filter(_customer_condition(term)).values('pk'))
+    if is_search_index_available() and len(term) >= MIN_MATCH_LENGTH:
+        condition |= Q(pk__in=_match(BOOKING_SEARCH_TABLE, _phrase(term)))
+    else:
+        condition |= Q(notes__icontains=term)
+    return queryset.filter(condition)
+
+
+def index_customer(customer):
+    """顧客を検索インデックスに登録（登録済みなら置き換える）"""
+    if not is_search_index_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {CUSTOMER_SEARCH_TABLE} (rowid, name, email, phone) VALUES (%s, %s, %s, %s)',
+            [customer.pk, customer.name, customer.email, normalize_phone(customer.phone)]
+        )
+
+
+def index_booking(booking):
+    """予約の備考を検索インデックスに登録（備考がなければ削除。備考が変わった場合のみ呼ぶ）"""
+    if not is_search_index_available():
+        return
+    if not booking.notes:
+        unindex(BOOKING_SEARCH_TABLE, booking.pk)
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {BOOKING_SEARCH_TABLE} (rowid, notes) VALUES (%s, %s)',
+            [booking.pk, booking.notes]
+        )
+
+
+def unindex(table, pk):
+    """検索インデックスから削除"""
+    if not is_search_index_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+
+
+def rebuild_search_index():
+    """
+    検索インデックスを顧客・予約のテーブルから作り直す
+    戻り値: (登録した顧客数, 登録した予約数)
+    """
+    from ..models import Booking, Customer
+
+    if not is_search_index_available():
+        return 0, 0
+    customer_table = Customer._meta.db_table
+    booking_table = Booking._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {CUSTOMER_SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {CUSTOMER_SEARCH_TABLE} (rowid, name, email, phone) '
+            f'SELECT id, name, email, phone_normalized FROM {customer_table}'
+        )
+        customers = cursor.rowcount
+        cursor.execute(f'DELETE FROM {BOOKING_SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {BOOKING_SEARCH_TABLE} (rowid, notes) '
+            f"SELECT id, notes FROM {booking_table} WHERE notes != ''"
+        )
+        bookings = cursor.rowcount
+    return customers, bookings
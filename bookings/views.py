@@ -1,18 +1,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.core.exceptions import ValidationError
 from django.db.models import Q
 import datetime
 import json
 import logging
 
-from .models import Service, Therapist, Booking, Customer, BusinessHours, BookingSettings, Schedule
+from .models import Service, Therapist, Booking, Customer, BookingSettings, Schedule
 from .forms import ServiceSelectionForm, DateTimeTherapistForm, CustomerInfoForm, validate_booking_time_slot
-from .utils.language import get_language
+from .utils.catalog import get_services, get_service, get_therapists, get_therapist
+from .utils.booking_draft import BookingDraft, DRAFT_KEYS
+from .utils.availability import get_availability_etag, get_available_times_max_age, get_min_booking_time
 
 # メール機能のインポート
 from emails.utils import (
@@ -23,18 +27,129 @@ from emails.utils import (
 
 logger = logging.getLogger(__name__)
 
-def booking_step1(request):
-    """ステップ1: サービス選択"""
-    
-    # デバッグ: サービス情報を確認
-    all_services = Service.objects.all()
-    active_services = Service.objects.filter(is_active=True)
+class BookingSelectionIncomplete(Exception):
+    """予約フォームの入力データが不足している"""
+
+
+def _load_booking_selection(draft, language='ja'):
+    """
+    入力データからサービス・日時・施術者を取得（サービス・施術者はカタログから取得）
+    不足している場合は BookingSelectionIncomplete、不正な値の場合は
+    DoesNotExist / ValueError を送出する
+    """
+    service_id = draft.get('booking_service_id')
+    booking_date_str = draft.get('booking_date')
+    booking_time_str = draft.get('booking_time')
+    therapist_id = draft.get('booking_therapist_id')
     
-    logger.debug(f"全サービス数: {all_services.count()}")
-    logger.debug(f"アクティブサービス数: {active_services.count()}")
+    if not all([service_id, booking_date_str, booking_time_str]):
+        raise BookingSelectionIncomplete()
+    
+    service = get_service(service_id, language)
+    if service is None:
+        raise Service.DoesNotExist()
+    booking_date = datetime.datetime.fromisoformat(booking_date_str).date()
+    booking_time = datetime.datetime.strptime(booking_time_str, '%H:%M').time()
+    therapist = None
+    if therapist_id:
+        therapist = get_therapist(therapist_id, language)
+        if therapist is None:
+            raise Therapist.DoesNotExist()
+    return service, booking_date, booking_time, therapist
+
+# 言語ごとのテンプレートと画面タイトル
+BOOKING_PAGES = {
+    'ja': {
+        'step1': ('bookings/step1_service.html', 'ステップ1: サービス選択 - GRACE SPA'),
+        'step2': ('bookings/step2_datetime.html', 'ステップ2: 日時・施術者選択 - GRACE SPA'),
+        'step3': ('bookings/step3_customer.html', 'ステップ3: お客様情報入力 - GRACE SPA'),
+        'confirm': ('bookings/confirm.html', '予約確認 - GRACE SPA'),
+        'complete': ('bookings/complete.html', '予約完了 - GRACE SPA'),
+    },
+    'en': {
+        'step1': ('en/bookings/step1_service_en.html', 'Step 1: Service Selection - GRACE SPA'),
+        'step2': ('en/bookings/step2_datetime_en.html', 'Step 2: Date & Therapist Selection - GRACE SPA'),
+        'step3': ('en/bookings/step3_customer_en.html', 'Step 3: Customer Information - GRACE SPA'),
+        'confirm': ('en/bookings/confirm_en.html', 'Booking Confirmation - GRACE SPA'),
+        'complete': ('en/bookings/complete_en.html', 'Booking Complete - GRACE SPA'),
+    },
+}
+
+# 言語ごとのメッセージ
+BOOKING_MESSAGES = {
+    'ja': {
+        'expired': '予約情報の有効期限が切れました。最初からやり直してください。',
+        'no_service': 'サービスが選択されていません。最初からやり直してください。',
+        'service_not_found': '選択されたサービスが見つかりません。',
+        'incomplete': '予約情報が不完全です。最初からやり直してください。',
+        'invalid': '予約情報に問題があります。最初からやり直してください。',
+        'requested': '予約申込みを受け付けました。管理者が確認後、確定のご連絡をいたします。',
+        'confirmed': '予約が確定しました。',
+        'received': '予約申込みを受け付けました。',
+        'confirm_failed': '予約の確定に失敗しました: {error}',
+        'confirm_error': '予約の確定中にエラーが発生しました。もう一度お試しください。',
+        'already_submitted': 'この予約はすでに受け付けています。',
+        # 備考を統合する際の見出し
+        'requests_label': '【ご要望】',
+        'notes_label': '【備考】',
+    },
+    'en': {
+        'expired': 'Your booking session has expired. Please start over.',
+        'no_service': 'Service not selected. Please start over.',
+        'service_not_found': 'Selected service not found.',
+        'incomplete': 'Booking information is incomplete. Please start over.',
+        'invalid': 'There is a problem with the booking information. Please start over.',
+        'requested': 'Your booking request has been received. We will contact you for confirmation after review by our staff.',
+        'confirmed': 'Your booking has been confirmed.',
+        'received': 'Your booking request has been received.',
+        'confirm_failed': 'Failed to confirm booking: {error}',
+        'confirm_error': 'An error occurred while confirming your booking. Please try again.',
+        'already_submitted': 'This booking has already been submitted.',
+        'requests_label': '【Requests】',
+        'notes_label': '【Notes】',
+    },
+}
+
+
+def _url_name(name, language):
+    """言語に応じたURL名（英語版は末尾に _en が付く）"""
+    return f'bookings:{name}_en' if language == 'en' else f'bookings:{name}'
+
+
+def _render_page(request, language, page, context):
+    """言語に応じたテンプレートで表示"""
+    template_name, title = BOOKING_PAGES[language][page]
+    context.update(title=title, language=language)
+    return render(request, template_name, context)
+
+
+def _restart(request, language, message_key):
+    """メッセージを表示してステップ1に戻す"""
+    messages.error(request, BOOKING_MESSAGES[language][message_key])
+    return redirect(_url_name('booking_step1', language))
+
+
+def _check_time_slot(service, booking_date, booking_time, therapist):
+    """予約可能性をチェック（表示時のみ - 実際の予約確定は後で行う）"""
+    try:
+        validate_booking_time_slot(service, booking_date, booking_time, therapist)
+    except ValidationError as e:
+        logger.warning(f"予約時間重複チェック: {str(e)}")
+        return str(e)
+    return None
+
+
+def booking_step1(request, language='ja'):
+    """ステップ1: サービス選択"""
     
-    for service in all_services:
-        logger.debug(f"サービス: {service.name}, アクティブ: {service.is_active}, ID: {service.id}")
+    # デバッグ: サービス情報を確認（DEBUGログが無効な場合はクエリを発行しない）
+    if logger.isEnabledFor(logging.DEBUG):
+        all_services = Service.objects.all()
+        logger.debug(f"全サービス数: {all_services.count()}")
+        logger.debug(f"アクティブサービス数: {Service.objects.filter(is_active=True).count()}")
+        
+        for service in all_services:
+            logger.debug(f"サービス: {service.name}, アクティブ: {service.is_active}, ID: {service.id}")
     
     if request.method == 'POST':
         form = ServiceSelectionForm(request.POST)
@@ -44,41 +159,37 @@ def booking_step1(request):
             logger.debug(f"フォームエラー: {form.errors}")
             
         if form.is_valid():
-            # セッションにサービス情報を保存
+            # セッション（またはトークン）にサービス情報と言語を保存
             service_id = form.cleaned_data['service'].id
             logger.debug(f"選択されたサービスID: {service_id}")
-            request.session['booking_service_id'] = service_id
-            return redirect('bookings:booking_step2')
+            draft = BookingDraft(request)
+            draft.update(booking_service_id=service_id)
+            if not draft.use_token:
+                request.session['language'] = language
+            return redirect(draft.url(_url_name('booking_step2', language)))
     else:
         form = ServiceSelectionForm()
     
-    services = Service.objects.filter(is_active=True).order_by('sort_order', 'name')
-    logger.debug(f"テンプレートに渡すサービス数: {services.count()}")
-    
-# ★ 常に日本語版テンプレートを使用
     context = {
         'form': form,
-        'services': services,
-        'title': 'ステップ1: サービス選択 - GRACE SPA',
+        'services': get_services(language),
         'step': 1,
         'total_steps': 3
     }
-    return render(request, 'bookings/step1_service.html', context)
+    return _render_page(request, language, 'step1', context)
 
-def booking_step2(request):
+def booking_step2(request, language='ja'):
     """ステップ2: 日時・施術者選択"""
     
-    # セッションからサービス情報を取得
-    service_id = request.session.get('booking_service_id')
+    # セッション（またはトークン）からサービス情報を取得
+    draft = BookingDraft(request)
+    service_id = draft.get('booking_service_id')
     if not service_id:
-        messages.error(request, 'サービスが選択されていません。最初からやり直してください。')
-        return redirect('bookings:booking_step1')
+        return _restart(request, language, 'expired' if draft.invalid_token else 'no_service')
     
-    try:
-        service = Service.objects.get(id=service_id)
-    except Service.DoesNotExist:
-        messages.error(request, '選択されたサービスが見つかりません。')
-        return redirect('bookings:booking_step1')
+    service = get_service(service_id, language)
+    if service is None:
+        return _restart(request, language, 'service_not_found')
     
     # 施術者選択機能が有効かチェック
     try:
@@ -90,155 +201,128 @@ def booking_step2(request):
     if request.method == 'POST':
         form = DateTimeTherapistForm(request.POST, enable_therapist_selection=enable_therapist_selection)
         if form.is_valid():
-            # セッションに選択情報を保存
-            request.session['booking_date'] = form.cleaned_data['booking_date'].isoformat()
-            request.session['booking_time'] = form.cleaned_data['booking_time'].strftime('%H:%M')
-            
-            if enable_therapist_selection:
-                therapist = form.cleaned_data.get('therapist')
-                request.session['booking_therapist_id'] = therapist.id if therapist else None
-            else:
-                request.session['booking_therapist_id'] = None
-            
-            # ステップ2の備考をセッションに保存
-            request.session['booking_notes'] = form.cleaned_data.get('notes', '')
+            # セッション（またはトークン）に選択情報を保存
+            therapist = form.cleaned_data.get('therapist') if enable_therapist_selection else None
+            draft.update(
+                booking_date=form.cleaned_data['booking_date'].isoformat(),
+                booking_time=form.cleaned_data['booking_time'].strftime('%H:%M'),
+                booking_therapist_id=therapist.id if therapist else None,
+                # ステップ2の備考
+                booking_notes=form.cleaned_data.get('notes', ''),
+            )
             
-            return redirect('bookings:booking_step3')
+            if draft.use_token:
+                # 備考（お客様の入力）を含むトークンはURLに載せず、ステップ3をそのまま表示
+                return _booking_step3(request, draft, language, submitted=False)
+            return redirect(draft.url(_url_name('booking_step3', language)))
     else:
         form = DateTimeTherapistForm(enable_therapist_selection=enable_therapist_selection)
     
-    # アクティブな施術者を取得
-    therapists = Therapist.objects.filter(is_active=True).order_by('sort_order', 'name')
-    
-   # ★ 常に日本語版テンプレートを使用
     context = {
         'form': form,
         'service': service,
-        'therapists': therapists,
+        'therapists': get_therapists(language),
         'enable_therapist_selection': enable_therapist_selection,
-        'title': 'ステップ2: 日時・施術者選択 - GRACE SPA',
+        'booking_token': draft.token,
+        'back_url': reverse(_url_name('booking_step1', language)),
         'step': 2,
         'total_steps': 3
     }
-    return render(request, 'bookings/step2_datetime.html', context)
+    return _render_page(request, language, 'step2', context)
 
-def booking_step3(request):
+def booking_step3(request, language='ja'):
     """ステップ3: お客様情報入力"""
-    # セッションから予約情報を取得
-    service_id = request.session.get('booking_service_id')
-    booking_date_str = request.session.get('booking_date')
-    booking_time_str = request.session.get('booking_time')
-    therapist_id = request.session.get('booking_therapist_id')
-    
-    if not all([service_id, booking_date_str, booking_time_str]):
-        messages.error(request, '予約情報が不完全です。最初からやり直してください。')
-        return redirect('bookings:booking_step1')
-    
+    # セッション（またはトークン）から予約情報を取得
+    draft = BookingDraft(request)
+    return _booking_step3(request, draft, language, submitted=request.method == 'POST')
+
+def _booking_step3(request, draft, language, submitted):
+    """ステップ3の表示・送信（submitted: お客様情報が送信された場合 True。ステップ2からの表示では False）"""
     try:
-        service = Service.objects.get(id=service_id)
-        booking_date = datetime.datetime.fromisoformat(booking_date_str).date()
-        booking_time = datetime.datetime.strptime(booking_time_str, '%H:%M').time()
-        therapist = Therapist.objects.get(id=therapist_id) if therapist_id else None
+        service, booking_date, booking_time, therapist = _load_booking_selection(draft, language)
+    except BookingSelectionIncomplete:
+        return _restart(request, language, 'expired' if draft.invalid_token else 'incomplete')
     except (Service.DoesNotExist, Therapist.DoesNotExist, ValueError): 
-        messages.error(request, '予約情報に問題があります。最初からやり直してください。')
-        return redirect('bookings:booking_step1')
+        return _restart(request, language, 'invalid')
     
-    # 予約可能性をチェック（表示時のみ - 実際の予約確定は後で行う）
-    validation_error = None
-    try:
-        validate_booking_time_slot(service, booking_date, booking_time, therapist)
-    except ValidationError as e:
-        validation_error = str(e)
-        logger.warning(f"予約時間重複チェック: {validation_error}")
+    validation_error = _check_time_slot(service, booking_date, booking_time, therapist)
     
-    if request.method == 'POST':
+    if submitted:
         form = CustomerInfoForm(request.POST)
         if form.is_valid():
-            # セッションに顧客情報を保存（フィールド名を修正）
-            request.session['customer_name'] = form.cleaned_data['customer_name']
-            request.session['customer_email'] = form.cleaned_data['customer_email']
-            request.session['customer_phone'] = form.cleaned_data['customer_phone']
-            
-            # ★ 新規追加: 性別と初回利用フラグをセッションに保存
-            request.session['customer_gender'] = form.cleaned_data['gender']
-            request.session['customer_is_first_visit'] = form.cleaned_data['is_first_visit']
-
             # ステップ2とステップ3の備考を統合
-            step2_notes = request.session.get('booking_notes', '')
+            step2_notes = draft.get('booking_notes') or ''
             step3_notes = form.cleaned_data.get('notes', '')
             
             # 両方に内容がある場合は改行で区切って統合
+            labels = BOOKING_MESSAGES[language]
             combined_notes = []
             if step2_notes.strip(): 
-                combined_notes.append(f"【ご要望】{step2_notes.strip()}")
+                combined_notes.append(f"{labels['requests_label']}{step2_notes.strip()}")
             if step3_notes.strip():
-                combined_notes.append(f"【備考】{step3_notes.strip()}")
-            
-            request.session['booking_notes'] = '\n'.join(combined_notes)
+                combined_notes.append(f"{labels['notes_label']}{step3_notes.strip()}")
+            
+            # セッション（またはトークン）に顧客情報を保存
+            draft.update(
+                customer_name=form.cleaned_data['customer_name'],
+                customer_email=form.cleaned_data['customer_email'],
+                customer_phone=form.cleaned_data['customer_phone'],
+                # ★ 新規追加: 性別と初回利用フラグ
+                customer_gender=form.cleaned_data['gender'],
+                customer_is_first_visit=form.cleaned_data['is_first_visit'],
+                booking_notes='\n'.join(combined_notes),
+            )
             
-            return redirect('bookings:booking_confirm')
+            if draft.use_token:
+                # お客様情報を含むトークンはURLに載せず、確認画面をそのまま表示
+                return _render_booking_confirm(
+                    request, draft, service, booking_date, booking_time, therapist, validation_error,
+                    language=language
+                )
+            return redirect(_url_name('booking_confirm', language))
     else:
         form = CustomerInfoForm()
     
-     # ★ 常に日本語版テンプレートを使用
-        context = {
-            'form': form,
-            'service': service,
-            'therapist': therapist,
-            'booking_date': booking_date,
-            'booking_time': booking_time,
-            'validation_error': validation_error,
-            'title': 'ステップ3: お客様情報入力 - GRACE SPA',
-            'step': 3,
-            'total_steps': 3
-        }
-    
-    return render(request, 'bookings/step3_customer.html', context)
+    context = {
+        'form': form,
+        'service': service,
+        'therapist': therapist,
+        'booking_date': booking_date,
+        'booking_time': booking_time,
+        'validation_error': validation_error,
+        'booking_token': draft.token,
+        'back_url': draft.url(_url_name('booking_step2', language), keys=('booking_service_id',)),
+        'step': 3,
+        'total_steps': 3
+    }
+    return _render_page(request, language, 'step3', context)
 
-def booking_confirm(request):
+def booking_confirm(request, language='ja'):
     """確認画面"""
-    current_language = get_language()
-    
-    # ★ 修正: セッションからすべての情報を取得（性別と初回利用フラグを追加）
-    session_keys = ['booking_service_id', 'booking_date', 'booking_time', 'booking_therapist_id',
-                   'customer_name', 'customer_email', 'customer_phone', 'booking_notes',
-                   'customer_gender', 'customer_is_first_visit']
+    labels = BOOKING_MESSAGES[language]
     
-    session_data = {}
-    for key in session_keys:
-        session_data[key] = request.session.get(key)
+    # ★ 修正: セッション（またはトークン）からすべての情報を取得（性別と初回利用フラグを追加）
+    draft = BookingDraft(request)
+    session_data = {key: draft.get(key) for key in DRAFT_KEYS}
     
     # 必須項目のチェック
-    if not all([session_data['booking_service_id'], session_data['booking_date'], 
-               session_data['booking_time'], session_data['customer_name'], 
-               session_data['customer_email']]):
-        if current_language == 'en':
-            messages.error(request, 'Booking information is incomplete. Please start over.')
-        else:
-            messages.error(request, '予約情報が不完全です。最初からやり直してください。')
-        return redirect('bookings:booking_step1')
-    
     try:
-        service = Service.objects.get(id=session_data['booking_service_id'])
-        booking_date = datetime.datetime.fromisoformat(session_data['booking_date']).date()
-        booking_time = datetime.datetime.strptime(session_data['booking_time'], '%H:%M').time()
-        therapist = Therapist.objects.get(id=session_data['booking_therapist_id']) if session_data['booking_therapist_id'] else None
+        if not all([session_data['customer_name'], session_data['customer_email']]):
+            raise BookingSelectionIncomplete()
+        service, booking_date, booking_time, therapist = _load_booking_selection(draft, language)
+    except BookingSelectionIncomplete:
+        return _restart(request, language, 'expired' if draft.invalid_token else 'incomplete')
     except (Service.DoesNotExist, Therapist.DoesNotExist, ValueError):
-        if current_language == 'en':
-            messages.error(request, 'There is a problem with the booking information. Please start over.')
-        else:
-            messages.error(request, '予約情報に問題があります。最初からやり直してください。')
-        return redirect('bookings:booking_step1')
+        return _restart(request, language, 'invalid')
     
-    # 予約可能性をチェック（表示時のみ - 実際の予約確定は後で行う）
-    validation_error = None
-    try:
-        validate_booking_time_slot(service, booking_date, booking_time, therapist)
-    except ValidationError as e:
-        validation_error = str(e)
-        logger.warning(f"予約時間重複チェック: {validation_error}")
+    validation_error = _check_time_slot(service, booking_date, booking_time, therapist)
     
     if request.method == 'POST':
+        # 確定に使ったトークンでの再送信（二重送信・再生）では予約を作成しない
+        if not draft.claim():
+            messages.info(request, labels['already_submitted'])
+            return redirect(_url_name('booking_complete', language))
+        
         # 予約を確定する前に再度チェック
         try:
             # 最終的な重複チェック
@@ -268,8 +352,8 @@ def booking_confirm(request):
             # 予約を作成
             booking = Booking.objects.create(
                 customer=customer,
-                service=service,
-                therapist=therapist,
+                service_id=service.id,
+                therapist_id=therapist.id if therapist else None,
                 booking_date=booking_date,
                 booking_time=booking_time,
                 notes=session_data['booking_notes'],
@@ -285,314 +369,66 @@ def booking_confirm(request):
                 send_admin_new_booking_email(booking)
                 
                 if getattr(settings, 'BOOKING_REQUIRES_APPROVAL', True):
-                    if current_language == 'en':
-                        messages.success(
-                            request, 
-                            'Your booking request has been received. We will contact you for confirmation after review by our staff.'
-                        )
-                    else:
-                        messages.success(
-                            request, 
-                            '予約申込みを受け付けました。管理者が確認後、確定のご連絡をいたします。'
-                        )
+                    messages.success(request, labels['requested'])
                 else:
-                    if current_language == 'en':
-                        messages.success(request, 'Your booking has been confirmed.')
-                    else:
-                        messages.success(request, '予約が確定しました。')
+                    messages.success(request, labels['confirmed'])
                     
                 logger.info(f"新規予約作成とメール送信完了: {booking}")
                     
             except Exception as e:
                 logger.error(f"メール送信エラー: {e}")
-                if current_language == 'en':
-                    messages.success(request, 'Your booking request has been received.')
-                else:
-                    messages.success(request, '予約申込みを受け付けました。')
+                messages.success(request, labels['received'])
             
             # ★ 修正: セッションをクリア（性別と初回利用フラグも追加）
-            session_keys = ['booking_service_id', 'booking_therapist_id', 'booking_date', 'booking_time', 
-                          'booking_notes', 'customer_name', 'customer_email', 'customer_phone',
-                          'customer_gender', 'customer_is_first_visit']
-            for key in session_keys:
-                request.session.pop(key, None)
+            draft.clear()
             
-            return redirect('bookings:booking_complete')
+            return redirect(_url_name('booking_complete', language))
             
         except ValidationError as e:
-            if current_language == 'en':
-                messages.error(request, f'Failed to confirm booking: {str(e)}')
-            else:
-                messages.error(request, f'予約の確定に失敗しました: {str(e)}')
+            draft.release()
+            messages.error(request, labels['confirm_failed'].format(error=str(e)))
             logger.error(f"予約確定エラー: {str(e)}")
         except Exception as e:
-            if current_language == 'en':
-                messages.error(request, 'An error occurred while confirming your booking. Please try again.')
-            else:
-                messages.error(request, '予約の確定中にエラーが発生しました。もう一度お試しください。')
+            draft.release()
+            messages.error(request, labels['confirm_error'])
             logger.error(f"予約確定エラー: {str(e)}")
     
-    # 言語に応じてコンテンツを分ける
-    if current_language == 'en':
-        context = {
-            'service': service,
-            'therapist': therapist,
-            'booking_date': booking_date,
-            'booking_time': booking_time,
-            'customer_name': session_data['customer_name'],
-            'customer_email': session_data['customer_email'],
-            'customer_phone': session_data['customer_phone'],
-            'notes': session_data['booking_notes'],
-            'validation_error': validation_error,
-            'title': 'Booking Confirmation - GRACE SPA'
-        }
-        template_name = 'bookings/confirm_en.html'
-    else:
-        context = {
-            'service': service,
-            'therapist': therapist,
-            'booking_date': booking_date,
-            'booking_time': booking_time,
-            'customer_name': session_data['customer_name'],
-            'customer_email': session_data['customer_email'],
-            'customer_phone': session_data['customer_phone'],
-            'notes': session_data['booking_notes'],
-            'validation_error': validation_error,
-            'title': '予約確認 - GRACE SPA'
-        }
-        template_name = 'bookings/confirm.html'
-    
-    return render(request, template_name, context)
-
-def booking_complete(request):
-    """完了画面"""
-    current_language = get_language()
-    
-    # 言語に応じてコンテンツを分ける
-    if current_language == 'en':
-        context = {
-            'title': 'Booking Complete - GRACE SPA'
-        }
-        template_name = 'bookings/complete_en.html'
-    else:
-        context = {
-            'title': '予約完了 - GRACE SPA'
-        }
-        template_name = 'bookings/complete.html'
-    
-    return render(request, template_name, context)
-
-# bookings/views.py の最後に以下の英語版ビュー関数を追加してください
-
-# ============ 英語版予約システム ============
-
-def booking_step1_en(request):
-    """Step 1: Service Selection (English)"""
-    from .forms import ServiceSelectionForm
-    from .models import Service
-    
-    if request.method == 'POST':
-        form = ServiceSelectionForm(request.POST)
-        if form.is_valid():
-            # セッションに選択したサービスIDと言語を保存
-            request.session['booking_service_id'] = form.cleaned_data['service'].id
-            request.session['language'] = 'en'
-            return redirect('bookings:booking_step2_en')
-    else:
-        form = ServiceSelectionForm()
-    
-    # アクティブなサービスを取得して英語版に変換
-    services_data = Service.objects.filter(is_active=True).order_by('sort_order', 'name')
-    services = []
-    
-    for service in services_data:
-        services.append({
-            'id': service.id,
-            'name_en': service.get_name('en'),
-            'description_en': service.get_description('en'),
-            'duration_minutes': service.duration_minutes,
-            'price': service.price,
-            'is_active': service.is_active
-        })
-    
-    context = {
-        'form': form,
-        'services': services,
-        'title': 'Step 1: Service Selection - GRACE SPA',
-        'step': 1,
-        'total_steps': 3
-    }
-    return render(request, 'en/bookings/step1_service_en.html', context)
-
-
-def booking_step2_en(request):
-    """Step 2: Date & Therapist Selection (English)"""
-    
-    # セッションから予約情報を取得
-    service_id = request.session.get('booking_service_id')
-    if not service_id:
-        messages.error(request, 'Service not selected. Please start over.')
-        return redirect('bookings:booking_step1_en')
-    
-    try:
-        service = Service.objects.get(id=service_id)
-    except Service.DoesNotExist:
-        messages.error(request, 'Selected service not found.')
-        return redirect('bookings:booking_step1_en')
-    
-    # 施術者選択機能が有効かチェック
-    try:
-        booking_settings = BookingSettings.get_current_settings()
-        enable_therapist_selection = booking_settings.enable_therapist_selection
-    except:
-        enable_therapist_selection = True  # デフォルトは有効
-    
-    if request.method == 'POST':
-        form = DateTimeTherapistForm(request.POST, enable_therapist_selection=enable_therapist_selection)
-        if form.is_valid():
-            # セッションに選択情報を保存
-            request.session['booking_date'] = form.cleaned_data['booking_date'].isoformat()
-            request.session['booking_time'] = form.cleaned_data['booking_time'].strftime('%H:%M')
-            
-            if enable_therapist_selection:
-                therapist = form.cleaned_data.get('therapist')
-                request.session['booking_therapist_id'] = therapist.id if therapist else None
-            else:
-                request.session['booking_therapist_id'] = None
-            
-            # ステップ2の備考をセッションに保存
-            request.session['booking_notes'] = form.cleaned_data.get('notes', '')
-            
-            return redirect('bookings:booking_step3_en')
-    else:
-        form = DateTimeTherapistForm(enable_therapist_selection=enable_therapist_selection)
-    
-    # アクティブな施術者を取得して英語版に変換
-    therapists_data = Therapist.objects.filter(is_active=True).order_by('sort_order', 'name')
-    therapists = []
-    
-    for therapist in therapists_data:
-        therapists.append({
-            'id': therapist.id,
-            'display_name_en': therapist.get_display_name('en'),
-            'description_en': therapist.get_description('en'),
-            'image': therapist.image,
-            'is_active': therapist.is_active
-        })
-    
-    context = {
-        'form': form,
-        'service': {
-            'id': service.id,
-            'name_en': service.get_name('en'),
-            'description_en': service.get_description('en'),
-            'duration_minutes': service.duration_minutes,
-            'price': service.price
-        },
-        'therapists': therapists,
-        'enable_therapist_selection': enable_therapist_selection,
-        'title': 'Step 2: Date & Therapist Selection - GRACE SPA',
-        'step': 2,
-        'total_steps': 3
-    }
-    return render(request, 'en/bookings/step2_datetime_en.html', context)
+    return _render_booking_confirm(
+        request, draft, service, booking_date, booking_time, therapist, validation_error,
+        language=language
+    )
 
 
-def booking_step3_en(request):
-    """Step 3: Customer Information (English)"""
-    
-    # セッションから予約情報を取得
-    service_id = request.session.get('booking_service_id')
-    booking_date_str = request.session.get('booking_date')
-    booking_time_str = request.session.get('booking_time')
-    therapist_id = request.session.get('booking_therapist_id')
-    
-    if not all([service_id, booking_date_str, booking_time_str]):
-        messages.error(request, 'Booking information is incomplete. Please start over.')
-        return redirect('bookings:booking_step1_en')
-    
-    try:
-        service = Service.objects.get(id=service_id)
-        booking_date = datetime.datetime.fromisoformat(booking_date_str).date()
-        booking_time = datetime.datetime.strptime(booking_time_str, '%H:%M').time()
-        therapist = Therapist.objects.get(id=therapist_id) if therapist_id else None
-    except (Service.DoesNotExist, Therapist.DoesNotExist, ValueError):
-        messages.error(request, 'There is a problem with the booking information. Please start over.')
-        return redirect('bookings:booking_step1_en')
-    
-    # 予約可能性をチェック（表示時のみ）
-    validation_error = None
-    try:
-        validate_booking_time_slot(service, booking_date, booking_time, therapist)
-    except ValidationError as e:
-        validation_error = str(e)
-        logger.warning(f"Booking time conflict check: {validation_error}")
-    
-    if request.method == 'POST':
-        form = CustomerInfoForm(request.POST)
-        if form.is_valid():
-            # セッションに顧客情報を保存
-            request.session['customer_name'] = form.cleaned_data['customer_name']
-            request.session['customer_email'] = form.cleaned_data['customer_email']
-            request.session['customer_phone'] = form.cleaned_data['customer_phone']
-            request.session['customer_gender'] = form.cleaned_data['gender']
-            request.session['customer_is_first_visit'] = form.cleaned_data['is_first_visit']
-
-            # ステップ2とステップ3の備考を統合
-            step2_notes = request.session.get('booking_notes', '')
-            step3_notes = form.cleaned_data.get('notes', '')
-            
-            # 両方に内容がある場合は改行で区切って統合
-            combined_notes = []
-            if step2_notes.strip():
-                combined_notes.append(f"【Requests】{step2_notes.strip()}")
-            if step3_notes.strip():
-                combined_notes.append(f"【Notes】{step3_notes.strip()}")
-            
-            request.session['booking_notes'] = '\n'.join(combined_notes)
-            
-            return redirect('bookings:booking_confirm_en')
-    else:
-        form = CustomerInfoForm()
-    
+def _render_booking_confirm(request, draft, service, booking_date, booking_time, therapist,
+                            validation_error, language='ja'):
+    """確認画面を表示"""
     context = {
-        'form': form,
-        'service': {
-            'id': service.id,
-            'name_en': service.get_name('en'),
-            'price': service.price
-        },
-        'therapist': {
-            'display_name_en': therapist.get_display_name('en') if therapist else None
-        } if therapist else None,
+        'service': service,
+        'therapist': therapist,
         'booking_date': booking_date,
         'booking_time': booking_time,
+        'customer_name': draft.get('customer_name'),
+        'customer_email': draft.get('customer_email'),
+        'customer_phone': draft.get('customer_phone'),
+        'notes': draft.get('booking_notes'),
         'validation_error': validation_error,
-        'title': 'Step 3: Customer Information - GRACE SPA',
-        'step': 3,
-        'total_steps': 3
-    }
-    return render(request, 'en/bookings/step3_customer_en.html', context)
-
-
-def booking_confirm_en(request):
-    """Booking Confirmation (English)"""
-    # 英語版の確認画面
-    # ... （詳細実装は次のステップで）...
-    context = {
-        'title': 'Booking Confirmation - GRACE SPA'
+        'booking_token': draft.token,
+        # 戻り先のURL（トークン方式でもお客様情報はURLに含めない）
+        'step3_url': draft.url(_url_name('booking_step3', language)),
+        'step2_url': draft.url(_url_name('booking_step2', language), keys=('booking_service_id',)),
     }
-    return render(request, 'en/bookings/confirm_en.html', context)
+    return _render_page(request, language, 'confirm', context)
 
+def booking_complete(request, language='ja'):
+    """完了画面"""
+    return _render_page(request, language, 'complete', {})
 
-def booking_complete_en(request):
-    """Booking Completion (English)"""
-    # 英語版の完了画面
-    # ... （詳細実装は次のステップで）...
-    context = {
-        'title': 'Booking Complete - GRACE SPA'
-    }
-    return render(request, 'en/bookings/complete_en.html', context)
+def _available_times_response(data, etag):
+    """空き時間APIのレスポンス（ブラウザで短時間キャッシュし、その後は ETag で確認させる）"""
+    response = data if isinstance(data, HttpResponse) else JsonResponse(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=get_available_times_max_age())
+    return response
 
 def get_available_times(request):
     """AJAX: 指定された日付の利用可能時間を取得（①当日時刻チェック ②直前予約制限対応）"""
@@ -605,69 +441,70 @@ def get_available_times(request):
     
     try:
         booking_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-        service = Service.objects.get(id=service_id)
-        therapist = Therapist.objects.get(id=therapist_id) if therapist_id else None
-    except (ValueError, Service.DoesNotExist, Therapist.DoesNotExist):
+    except ValueError:
         return JsonResponse({'error': '無効なパラメータです'}, status=400)
     
     # 現在時刻を取得（aware datetime）
     now = timezone.now()
-    current_date = now.date()
-    is_today = booking_date == current_date
     
-    # 営業時間を取得（weekdayフィールドを使用）
+    # その日の予約・予定・設定が変わっていなければ、空き時間を計算せずに 304 を返す
+    etag, day_settings = get_availability_etag(booking_date, service_id, therapist_id, now)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return _available_times_response(not_modified, etag)
+    
+    # サービス・施術者はカタログから取得（DBにはアクセスしない）
+    service = get_service(service_id)
+    therapist = get_therapist(therapist_id) if therapist_id else None
+    if service is None or (therapist_id and therapist is None):
+        return JsonResponse({'error': '無効なパラメータです'}, status=400)
+    
+    is_today = booking_date == now.date()
+    
     try:
-        business_hours = BusinessHours.objects.filter(
-            weekday=booking_date.weekday(),
-            is_open=True
-        ).first()
+        # 営業時間・予約設定（曜日ごとにキャッシュ済み）
+        if day_settings['open_time'] is None:
+            return _available_times_response({'available_times': []}, etag)
         
-        if not business_hours:
-            return JsonResponse({'available_times': []})
+        open_time = day_settings['open_time']
+        close_time = day_settings['close_time']
+        interval_minutes = day_settings['interval']
+        buffer_minutes = day_settings['buffer']  # インターバル時間
         
-        # 予約設定を取得
-        try:
-            settings_obj = BookingSettings.get_current_settings()
-            interval_minutes = settings_obj.booking_interval_minutes
-            buffer_minutes = settings_obj.treatment_buffer_minutes  # インターバル時間を取得
-            # ②直前予約制限の設定を取得
-            min_advance_minutes = getattr(settings_obj, 'min_advance_minutes', 20)  # デフォルト20分
-        except:
-            interval_minutes = 30  # デフォルト30分間隔
-            buffer_minutes = 15   # デフォルト15分インターバル
-            min_advance_minutes = 20  # デフォルト20分前まで
-        
-        # ①当日の場合の最小予約可能時間を計算
-        min_booking_time = business_hours.open_time
-        if is_today:
-            # ②直前予約制限: 現在時刻 + 制限時間
-            min_datetime = now + datetime.timedelta(minutes=min_advance_minutes)
-            # 🔧 修正: ローカルタイムゾーンに変換してから時刻を取得
-            from django.utils import timezone as django_timezone
-            calculated_min_time = min_datetime.astimezone(django_timezone.get_current_timezone()).time()
-            
-            # 営業開始時間と比較して遅い方を採用
-            if calculated_min_time > min_booking_time:
-                min_booking_time = calculated_min_time
-            
+        # ①当日の場合の最小予約可能時間を計算（②直前予約制限: 現在時刻 + 制限時間）
+        min_booking_time = get_min_booking_time(booking_date, day_settings, now) or open_time
+        if is_today and min_booking_time > close_time:
             # 営業終了時間を超えている場合は空のリストを返す
-            if min_booking_time > business_hours.close_time:
-                return JsonResponse({'available_times': []})
+            return _available_times_response({'available_times': []}, etag)
         
         # 既存の予約を取得
         existing_bookings = Booking.objects.filter(
             booking_date=booking_date,
             status__in=['pending', 'confirmed']
-        )
+        ).select_related('service')
         
         # 施術者が指定されている場合は、同じ施術者の予約のみチェック
         if therapist:
-            existing_bookings = existing_bookings.filter(therapist=therapist)
+            existing_bookings = existing_bookings.filter(therapist_id=therapist.id)
+        existing_bookings = list(existing_bookings)
+        
+        # その日の予定を取得（時間枠ごとに問い合わせない）
+        conflicting_schedules = Schedule.objects.filter(
+            schedule_date=booking_date,
+            is_active=True
+        )
+        
+        # 施術者が指定されている場合は、その施術者の予定のみチェック
+        if therapist:
+            conflicting_schedules = conflicting_schedules.filter(
+                Q(therapist_id=therapist.id) | Q(therapist__isnull=True)  # 全体予定も含む
+            )
+        conflicting_schedules = list(conflicting_schedules)
         
         # 利用可能時間のリストを生成
         available_times = []
-        current_time_slot = datetime.datetime.combine(booking_date, business_hours.open_time)
-        end_time = datetime.datetime.combine(booking_date, business_hours.close_time)
+        current_time_slot = datetime.datetime.combine(booking_date, open_time)
+        end_time = datetime.datetime.combine(booking_date, close_time)
         
         while current_time_slot + datetime.timedelta(minutes=service.duration_minutes) <= end_time:
             time_str = current_time_slot.strftime('%H:%M')
@@ -699,29 +536,14 @@ def get_available_times(request):
             
             # スケジュール（予定）との重複チェック
             if is_available:
-                try:
-                    conflicting_schedules = Schedule.objects.filter(
-                        schedule_date=booking_date,
-                        is_active=True
-                    )
-                    
-                    # 施術者が指定されている場合は、その施術者の予定のみチェック
-                    if therapist:
-                        conflicting_schedules = conflicting_schedules.filter(
-                            Q(therapist=therapist) | Q(therapist__isnull=True)  # 全体予定も含む
-                        )
+                for schedule in conflicting_schedules:
+                    schedule_start = datetime.datetime.combine(schedule.schedule_date, schedule.start_time)
+                    schedule_end = datetime.datetime.combine(schedule.schedule_date, schedule.end_time)
                     
-                    for schedule in conflicting_schedules:
-                        schedule_start = datetime.datetime.combine(schedule.schedule_date, schedule.start_time)
-                        schedule_end = datetime.datetime.combine(schedule.schedule_date, schedule.end_time)
-                        
-                        # 時間の重複判定
-                        if (new_booking_start < schedule_end and new_booking_end > schedule_start):
-                            is_available = False
-                            break
-                            
-                except Exception as e:
-                    logger.warning(f"スケジュールチェックエラー: {str(e)}")
+                    # 時間の重複判定
+                    if (new_booking_start < schedule_end and new_booking_end > schedule_start):
+                        is_available = False
+                        break
             
             available_times.append({
                 'time': time_str,
@@ -731,7 +553,7 @@ def get_available_times(request):
             
             current_time_slot += datetime.timedelta(minutes=interval_minutes)
         
-        return JsonResponse({'available_times': available_times})
+        return _available_times_response({'available_times': available_times}, etag)
         
     except Exception as e:
         logger.error(f"利用可能時間取得エラー: {str(e)}")
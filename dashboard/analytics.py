@@ -0,0 +1,228 @@
+"""
+施術者の稼働率・占有率の集計
+
+期間内の予約・予定・空白時間ブロックを1回のクエリ（UNION ALL）で取得し、
+全施術者×日の区間を1回の並べ替えでまとめてスイープして以下の時間（分）を算出する。
+
+- booked_minutes: 施術時間
+- buffer_minutes: 施術後のインターバル
+- schedule_minutes: 休憩・会議などの予定
+- gap_blocked_minutes: 空白時間ブロック
+- idle_minutes: 営業時間内で何も入っていない時間
+
+区間が重なる場合は 施術 > インターバル > 予定 > ブロック の優先順で1回だけ数える。
+どの区間も営業時間内に限定するため、稼働率は100%を超えない（休業日はすべて0）。
+"""
+from datetime import timedelta
+
+from django.db.models import F, IntegerField, Q, TimeField, Value
+
+from bookings.models import Booking, Schedule, GapBlock, BusinessHours, BookingSettings, Therapist
+
+# 優先順位（小さいほど優先）
+BOOKED, BUFFER, SCHEDULE, GAP_BLOCKED, IDLE = range(5)
+CATEGORY_KEYS = ['booked_minutes', 'buffer_minutes', 'schedule_minutes', 'gap_blocked_minutes', 'idle_minutes']
+
+# 稼働率の対象となる予約ステータス（キャンセル以外）
+UTILISATION_STATUSES = ['pending', 'confirmed', 'completed']
+
+# 一度に集計できる最大日数
+MAX_RANGE_DAYS = 366
+
+UNASSIGNED_LABEL = '指名なし'
+
+
+def _to_minutes(time_obj):
+    return time_obj.hour * 60 + time_obj.minute
+
+
+def sweep_intervals(intervals, group_count=1):
+    """
+    (グループ, 開始分, 終了分, 優先順位) の区間リストを1回の並べ替えでまとめてスイープし、
+    グループ（施術者×日）ごとに優先順位ごとの占有時間（分）のリストを返す
+    """
+    events = []
+    for group, start, end, priority in intervals:
+        if start < end:
+            events.append((group, start, 1, priority))
+            events.append((group, end, -1, priority))
+    events.sort()
+
+    totals = [[0] * len(CATEGORY_KEYS) for _ in range(group_count)]
+    # グループの最後の区間が閉じると active はすべて0に戻る
+    active = [0] * len(CATEGORY_KEYS)
+    current_group = previous = None
+
+    for group, position, delta, priority in events:
+        if group == current_group and position > previous:
+            for index, count in enumerate(active):
+                if count:
+                    totals[group][index] += position - previous
+                    break
+        active[priority] += delta
+        current_group, previous = group, position
+
+    return totals
+
+
+def _clip(start, end, window_start, window_end):
+    return max(start, window_start), min(end, window_end)
+
+
+def _load_business_hours():
+    """曜日ごとの営業時間（開始分, 終了分）を返す。休業日は含まない"""
+    return {
+        weekday: (_to_minutes(open_time), _to_minutes(close_time))
+        for weekday, open_time, close_time in BusinessHours.objects.filter(
+            is_open=True
+        ).values_list('weekday', 'open_time', 'close_time')
+    }
+
+
+def _get_buffer_minutes():
+    try:
+        return BookingSettings.get_current_settings().treatment_buffer_minutes
+    except Exception:
+        return 15
+
+
+def _load_intervals(start_date, end_date):
+    """
+    期間内の予約・予定・空白時間ブロックを1回のクエリ（UNION ALL）で取得する
+
+    戻り値は (優先順位, 施術者ID, 日付, 開始時刻, 終了時刻, 施術時間) のリスト
+    （予約は終了時刻なし、予定・ブロックは施術時間なし）
+    """
+    columns = ('kind', 'owner', 'day', 'start', 'end', 'duration')
+    no_time = Value(None, output_field=TimeField())
+    no_duration = Value(None, output_field=IntegerField())
+
+    bookings = Booking.objects.filter(
+        booking_date__gte=start_date,
+        booking_date__lte=end_date,
+        status__in=UTILISATION_STATUSES
+    ).annotate(
+        kind=Value(BOOKED), owner=F('therapist_id'), day=F('booking_date'),
+        start=F('booking_time'), end=no_time, duration=F('service__duration_minutes')
+    ).order_by().values_list(*columns)
+
+    schedules = Schedule.objects.filter(
+        schedule_date__gte=start_date,
+        schedule_date__lte=end_date,
+        is_active=True
+    ).annotate(
+        kind=Value(SCHEDULE), owner=F('therapist_id'), day=F('schedule_date'),
+        start=F('start_time'), end=F('end_time'), duration=no_duration
+    ).order_by().values_list(*columns)
+
+    gap_blocks = GapBlock.objects.filter(
+        block_date__gte=start_date,
+        block_date__lte=end_date,
+        is_active=True
+    ).annotate(
+        kind=Value(GAP_BLOCKED), owner=F('therapist_id'), day=F('block_date'),
+        start=F('start_time'), end=F('end_time'), duration=no_duration
+    ).order_by().values_list(*columns)
+
+    return list(bookings.union(schedules, gap_blocks, all=True))
+
+
+def compute_utilisation(start_date, end_date):
+    """
+    指定期間の施術者×日ごとの稼働状況を返す
+
+    戻り値は日付・施術者順の辞書リスト
+    """
+    if end_date < start_date:
+        raise ValueError('終了日は開始日以降を指定してください')
+    if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f'集計期間は{MAX_RANGE_DAYS}日以内で指定してください')
+
+    business_hours = _load_business_hours()
+    buffer_minutes = _get_buffer_minutes()
+    records = _load_intervals(start_date, end_date)
+
+    # 在籍中の施術者と、期間内に予約のある施術者（退職済みを含む）
+    booked_ids = {owner for kind, owner, *_ in records if kind == BOOKED}
+    names = dict(
+        Therapist.objects.filter(
+            Q(is_active=True) | Q(id__in=[tid for tid in booked_ids if tid is not None])
+        ).values_list('id', 'display_name')
+    )
+    ordered_ids = sorted(names, key=lambda tid: names[tid])
+    if None in booked_ids:
+        ordered_ids.append(None)
+
+    # 施術者×日ごとの行（スイープのグループ番号は行の位置）
+    rows = []
+    groups = {}
+    opening = {}
+    day = start_date
+    while day <= end_date:
+        opening[day] = business_hours.get(day.weekday(), (0, 0))
+        open_start, open_end = opening[day]
+        for therapist_id in ordered_ids:
+            groups[(therapist_id, day)] = len(rows)
+            rows.append({
+                'date': day,
+                'therapist_id': therapist_id,
+                'therapist_name': names.get(therapist_id, UNASSIGNED_LABEL),
+                'open_minutes': max(open_end - open_start, 0),
+            })
+        day += timedelta(days=1)
+
+    intervals = [(group, *opening[row['date']], IDLE) for group, row in enumerate(rows)]
+
+    def add(owners, date, start, end, priority):
+        # どの区間も営業時間内に限定する（休業日は営業時間が (0, 0) のためすべて除外される）
+        start, end = _clip(start, end, *opening[date])
+        for owner in owners:
+            group = groups.get((owner, date))
+            # 集計対象外（退職済みで予約のない施術者）の予定・ブロックは数えない
+            if group is not None:
+                intervals.append((group, start, end, priority))
+
+    for kind, therapist_id, date, start_time, end_time, duration in records:
+        start = _to_minutes(start_time)
+        if kind == BOOKED:
+            end = start + duration
+            add([therapist_id], date, start, end, BOOKED)
+            add([therapist_id], date, end, end + buffer_minutes, BUFFER)
+        else:
+            # 全体（施術者未指定）の予定・ブロックは全施術者に適用する
+            owners = ordered_ids if therapist_id is None else [therapist_id]
+            add(owners, date, start, _to_minutes(end_time), kind)
+
+    for row, totals in zip(rows, sweep_intervals(intervals, len(rows))):
+        row.update(zip(CATEGORY_KEYS, totals))
+        open_minutes = row['open_minutes']
+        row['utilisation'] = round(row['booked_minutes'] / open_minutes * 100, 1) if open_minutes else 0
+
+    return rows
+
+
+def summarise_by_therapist(rows):
+    """日別の集計を施術者ごとに合計する"""
+    summary = {}
+    for row in rows:
+        therapist_id = row['therapist_id']
+        if therapist_id not in summary:
+            summary[therapist_id] = {
+                'therapist_id': therapist_id,
+                'therapist_name': row['therapist_name'],
+                'open_minutes': 0,
+                **{key: 0 for key in CATEGORY_KEYS},
+            }
+        entry = summary[therapist_id]
+        entry['open_minutes'] += row['open_minutes']
+        for key in CATEGORY_KEYS:
+            entry[key] += row[key]
+
+    for entry in summary.values():
+        open_minutes = entry['open_minutes']
+        entry['utilisation'] = round(entry['booked_minutes'] / open_minutes * 100, 1) if open_minutes else 0
+        # 予約・インターバル・予定・ブロックで埋まっている割合
+        occupied = open_minutes - entry['idle_minutes']
+        entry['occupancy'] = round(occupied / open_minutes * 100, 1) if open_minutes else 0
+
+    return list(summary.values())
@@ -0,0 +1,148 @@
+from django.db.models import Count, Sum, Q
+from bookings.models import Booking, Schedule, BusinessHours, Therapist
+from datetime import timedelta
+
+# カレンダーに表示する予約ステータス
+CALENDAR_BOOKING_STATUSES = ['pending', 'confirmed']
+# 稼働率の計算対象（キャンセル以外）
+UTILISATION_STATUSES = ['pending', 'confirmed', 'completed']
+
+
+def _minutes_between(start_time, end_time):
+    return (end_time.hour * 60 + end_time.minute) - (start_time.hour * 60 + start_time.minute)
+
+
+def get_open_minutes(first_day, last_day):
+    """期間内の営業時間の合計（分）を返す"""
+    open_minutes_by_weekday = {
+        weekday: _minutes_between(open_time, close_time)
+        for weekday, open_time, close_time in BusinessHours.objects.filter(
+            is_open=True
+        ).values_list('weekday', 'open_time', 'close_time')
+    }
+
+    total = 0
+    day = first_day
+    while day <= last_day:
+        total += max(open_minutes_by_weekday.get(day.weekday(), 0), 0)
+        day += timedelta(days=1)
+    return total
+
+
+def build_month_summary(first_day, last_day):
+    """
+    月カレンダー用の集計を返す
+    予約・予定はモデルを読み込まず、日別件数と施術者別の稼働時間のみ集計する
+    """
+    days = {}
+
+    def day_entry(day):
+        key = day.strftime('%Y-%m-%d')
+        if key not in days:
+            days[key] = {'bookings': 0, 'pending': 0, 'confirmed': 0, 'schedules': 0}
+        return days[key]
+
+    # 日別・ステータス別の予約件数
+    booking_counts = Booking.objects.filter(
+        booking_date__gte=first_day,
+        booking_date__lte=last_day,
+        status__in=CALENDAR_BOOKING_STATUSES
+    ).values_list('booking_date', 'status').annotate(count=Count('id')).order_by()
+
+    for booking_date, status, count in booking_counts:
+        entry = day_entry(booking_date)
+        entry['bookings'] += count
+        entry[status] += count
+
+    # 日別の予定件数
+    schedule_counts = Schedule.objects.filter(
+        schedule_date__gte=first_day,
+        schedule_date__lte=last_day,
+        is_active=True
+    ).values_list('schedule_date').annotate(count=Count('id')).order_by()
+
+    for schedule_date, count in schedule_counts:
+        day_entry(schedule_date)['schedules'] += count
+
+    # 月次統計
+    month_bookings = Booking.objects.filter(
+        booking_date__gte=first_day,
+        booking_date__lte=last_day
+    )
+    stats = month_bookings.aggregate(
+        total_bookings=Count('id', filter=~Q(status='cancelled')),
+        confirmed_bookings=Count('id', filter=Q(status='confirmed')),
+        completed_bookings=Count('id', filter=Q(status='completed')),
+        total_revenue=Sum('service__price', filter=Q(status='completed')),
+    )
+    stats['total_revenue'] = stats['total_revenue'] or 0
+
+    # 施術者別の稼働率（予約時間 / 営業時間）
+    open_minutes = get_open_minutes(first_day, last_day)
+    booked = {
+        therapist_id: (count, minutes or 0)
+        for therapist_id, count, minutes in month_bookings.filter(
+            status__in=UTILISATION_STATUSES
+        ).values_list('therapist_id').annotate(
+            count=Count('id'),
+            minutes=Sum('service__duration_minutes')
+        ).order_by()
+    }
+
+    therapists = []
+    for therapist_id, display_name in Therapist.objects.filter(is_active=True).order_by(
+        'sort_order', 'name'
+    ).values_list('id', 'display_name'):
+        count, minutes = booked.get(therapist_id, (0, 0))
+        therapists.append({
+            'id': therapist_id,
+            'name': display_name,
+            'bookings': count,
+            'booked_minutes': minutes,
+            'utilisation': round(minutes / open_minutes * 100, 1) if open_minutes else 0,
+        })
+
+    # 指名なしの予約
+    if None in booked:
+        count, minutes = booked[None]
+        therapists.append({
+            'id': None,
+            'name': '指名なし',
+            'bookings': count,
+            'booked_minutes': minutes,
+            'utilisation': round(minutes / open_minutes * 100, 1) if open_minutes else 0,
+        })
+
+    return {
+        'days': days,
+        'stats': stats,
+        'therapists': therapists,
+        'open_minutes': open_minutes,
+    }
+
+
+def get_day_detail(day):
+    """
+    指定日の予約・予定を (id, 時刻, 短いラベル, ステータス) のタプルで返す
+    """
+    bookings = [
+        (booking_id, booking_time.strftime('%H:%M'), f'{customer_name} / {service_name}', status)
+        for booking_id, booking_time, customer_name, service_name, status in Booking.objects.filter(
+            booking_date=day,
+            status__in=CALENDAR_BOOKING_STATUSES
+        ).order_by('booking_time').values_list(
+            'id', 'booking_time', 'customer__name', 'service__name', 'status'
+        )
+    ]
+
+    schedules = [
+        (schedule_id, f'{start_time.strftime("%H:%M")}-{end_time.strftime("%H:%M")}', title, schedule_type)
+        for schedule_id, start_time, end_time, title, schedule_type in Schedule.objects.filter(
+            schedule_date=day,
+            is_active=True
+        ).order_by('start_time').values_list(
+            'id', 'start_time', 'end_time', 'title', 'schedule_type'
+        )
+    ]
+
+    return {'bookings': bookings, 'schedules': schedules}
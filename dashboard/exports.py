@@ -0,0 +1,131 @@
+import csv
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from bookings.models import Booking
+from .filters import filter_bookings, filter_customers, parse_selected_month, month_range
+
+# 1回のDB読み込みで取得する行数（メモリ使用量を一定に保つ）
+EXPORT_CHUNK_SIZE = 2000
+
+# Excelで日本語が文字化けしないようにBOM付きUTF-8で出力する
+UTF8_BOM = '\ufeff'
+
+
+class Echo:
+    """csv.writer 用の疑似バッファ（書き込まれた行をそのまま返す）"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    """ヘッダーと行イテレータからCSV文字列を1行ずつ生成する"""
+    writer = csv.writer(Echo())
+    yield UTF8_BOM + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(filename, header, rows):
+    """CSVをストリーミングで返すレスポンスを作成"""
+    response = StreamingHttpResponse(
+        stream_csv(header, rows),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _timestamp():
+    return timezone.localtime().strftime('%Y%m%d_%H%M')
+
+
+@staff_member_required
+def export_bookings_csv(request):
+    """予約一覧CSVエクスポート（予約一覧と同じ絞り込み条件）"""
+    bookings = filter_bookings(request.GET).select_related('customer', 'service', 'therapist')
+    status_labels = dict(Booking.STATUS_CHOICES)
+
+    header = [
+        '予約ID', '予約日', '予約時間', 'ステータス', 'お客様名', 'メールアドレス', '電話番号',
+        'サービス', '料金', '施術者', '備考', '申込日時',
+    ]
+
+    def rows():
+        for booking in bookings.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                booking.id,
+                booking.booking_date.strftime('%Y-%m-%d'),
+                booking.booking_time.strftime('%H:%M'),
+                status_labels.get(booking.status, booking.status),
+                booking.customer.name,
+                booking.customer.email,
+                booking.customer.phone,
+                booking.service.name,
+                booking.service.price,
+                booking.therapist.display_name if booking.therapist else '指名なし',
+                booking.notes,
+                timezone.localtime(booking.created_at).strftime('%Y-%m-%d %H:%M'),
+            ]
+
+    return csv_response(f'bookings_{_timestamp()}.csv', header, rows())
+
+
+@staff_member_required
+def export_customers_csv(request):
+    """顧客一覧CSVエクスポート（顧客一覧と同じ検索条件）"""
+    # 予約回数・最終予約日は顧客の実績の列から取得（予約は集計しない）
+    customers = filter_customers(request.GET)
+    gender_labels = {'male': '男性', 'female': '女性'}
+
+    header = ['顧客ID', 'お名前', 'メールアドレス', '電話番号', '性別', '利用状況', '予約回数', '最終予約日', '登録日', '備考']
+
+    def rows():
+        for customer in customers.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            last_date = customer.last_booking_date
+            yield [
+                customer.id,
+                customer.name,
+                customer.email,
+                customer.phone,
+                gender_labels.get(customer.gender, '未設定'),
+                '初回' if customer.is_first_visit else 'リピート',
+                customer.active_booking_count,
+                last_date.strftime('%Y-%m-%d') if last_date else '',
+                timezone.localtime(customer.created_at).strftime('%Y-%m-%d'),
+                customer.notes,
+            ]
+
+    return csv_response(f'customers_{_timestamp()}.csv', header, rows())
+
+
+@staff_member_required
+def export_sales_csv(request):
+    """売上CSVエクスポート（売上ダッシュボードの選択月の完了予約）"""
+    today = timezone.now().date()
+    month_start, next_month = month_range(parse_selected_month(request.GET, today))
+
+    bookings = Booking.objects.filter(
+        booking_date__gte=month_start,
+        booking_date__lt=next_month,
+        status='completed'
+    ).select_related('customer', 'service', 'therapist').order_by('booking_date', 'booking_time')
+
+    header = ['予約ID', '施術日', '施術時間', 'サービス', '施術者', 'お客様名', '売上']
+
+    def rows():
+        for booking in bookings.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                booking.id,
+                booking.booking_date.strftime('%Y-%m-%d'),
+                booking.booking_time.strftime('%H:%M'),
+                booking.service.name,
+                booking.therapist.display_name if booking.therapist else '指名なし',
+                booking.customer.name,
+                booking.service.price,
+            ]
+
+    return csv_response(f'sales_{month_start.strftime("%Y%m")}.csv', header, rows())
@@ -0,0 +1,58 @@
+from bookings.models import Booking, Customer
+from bookings.utils.customer_stats import filter_segment, with_active_booking_count
+from bookings.utils.search import search_customers
+from datetime import datetime
+
+
+def filter_bookings(params, queryset=None):
+    """予約一覧の絞り込み条件（ステータス・予約日）を適用"""
+    bookings = queryset if queryset is not None else Booking.objects.all()
+    status_filter = params.get('status', '')
+    date_filter = params.get('date', '')
+
+    if status_filter:
+        bookings = bookings.filter(status=status_filter)
+
+    if date_filter:
+        try:
+            filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
+            bookings = bookings.filter(booking_date=filter_date)
+        except ValueError:
+            pass
+
+    return bookings.order_by('-booking_date', '-booking_time')
+
+
+def filter_customers(params, queryset=None):
+    """
+    顧客一覧の検索条件（名前・メール・電話番号）と顧客区分（segment: repeat / vip）を適用
+    予約回数（確定・完了）を active_booking_count として付ける
+    """
+    customers = queryset if queryset is not None else Customer.objects.all()
+    search = params.get('search', '')
+
+    if search:
+        customers = search_customers(customers, search)
+
+    customers = filter_segment(with_active_booking_count(customers), params.get('segment', ''))
+    return customers.order_by('-created_at')
+
+
+def parse_selected_month(params, today):
+    """売上ダッシュボードの表示月（year/month パラメータ）を月初日で返す"""
+    try:
+        year = int(params.get('year', today.year))
+        month = int(params.get('month', today.month))
+        return datetime(year, month, 1).date()
+    except ValueError:
+        # 無効な年月の場合は現在月を使用
+        return today.replace(day=1)
+
+
+def month_range(month_start):
+    """月初日から [月初日, 翌月1日) の範囲を返す"""
+    if month_start.month == 12:
+        next_month = month_start.replace(year=month_start.year + 1, month=1, day=1)
+    else:
+        next_month = month_start.replace(month=month_start.month + 1, day=1)
+    return month_start, next_month
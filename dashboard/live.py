@@ -0,0 +1,117 @@
+"""
+ダッシュボードのリアルタイム更新（Server-Sent Events）
+
+予約・予定・メールのシグナルから publish_event() でイベントを発行し、
+キャッシュ上の連番付きイベントログに保存する。
+SSEエンドポイントはこのログから新しいイベントだけを返す。
+
+- イベントIDは cache.incr による連番で、ブラウザの Last-Event-ID で再開できる
+- WSGI のワーカーを占有しないよう、接続を保持せずにその時点の新しいイベントだけを返して終了する。
+  ブラウザ側（EventSource）は retry の間隔で自動的に再接続する（短い間隔のポーリング）
+- イベントログは全ワーカーで共有する必要があるため、共有キャッシュ（locmem 以外）の場合のみ有効にできる
+  （DASHBOARD_LIVE_UPDATES。無効の場合はイベントを発行せず、エンドポイントは 204 を返す）
+"""
+import json
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+EVENT_SEQ_KEY = 'dashboard_events:seq'
+EVENT_KEY = 'dashboard_events:{}'
+
+# 1回の読み出しで返す最大イベント数
+MAX_EVENTS_PER_READ = 100
+
+
+def get_event_ttl():
+    """イベントをキャッシュに保持する秒数"""
+    return getattr(settings, 'DASHBOARD_EVENT_TTL', 300)
+
+
+def get_poll_interval():
+    """ブラウザが新しいイベントを確認する間隔（秒）"""
+    return getattr(settings, 'DASHBOARD_EVENT_POLL_INTERVAL', 5)
+
+
+def is_live_enabled():
+    """リアルタイム更新を使うか（共有キャッシュの場合のみ settings で有効になる）"""
+    return getattr(settings, 'DASHBOARD_LIVE_UPDATES', False)
+
+
+def publish_event(event_type, data):
+    """イベントを発行し、採番したイベントIDを返す"""
+    try:
+        event_id = cache.incr(EVENT_SEQ_KEY)
+    except ValueError:
+        cache.add(EVENT_SEQ_KEY, 0, None)
+        event_id = cache.incr(EVENT_SEQ_KEY)
+
+    cache.set(EVENT_KEY.format(event_id), {
+        'id': event_id,
+        'type': event_type,
+        'data': data,
+    }, get_event_ttl())
+    return event_id
+
+
+def get_latest_event_id():
+    return cache.get(EVENT_SEQ_KEY, 0)
+
+
+def get_events_since(last_id):
+    """
+    指定IDより新しいイベントを古い順に返す
+    期限切れで欠けたイベントは飛ばす
+    """
+    latest_id = get_latest_event_id()
+    if last_id >= latest_id:
+        return []
+
+    first_id = max(last_id + 1, latest_id - MAX_EVENTS_PER_READ + 1)
+    keys = [EVENT_KEY.format(event_id) for event_id in range(first_id, latest_id + 1)]
+    found = cache.get_many(keys)
+    return [found[key] for key in keys if key in found]
+
+
+def format_sse(event):
+    """イベントをSSEの形式に変換"""
+    payload = json.dumps(event['data'], cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+def render_events(last_id, poll_interval=None):
+    """指定IDより新しいイベントをSSEの形式で返す（次に確認するまでの間隔を retry で指定）"""
+    if poll_interval is None:
+        poll_interval = get_poll_interval()
+
+    # キャッシュがクリアされて連番が戻った場合は最初から読み直す
+    if last_id > get_latest_event_id():
+        last_id = 0
+
+    # 再接続までの待ち時間（ミリ秒）
+    chunks = [f'retry: {int(poll_interval * 1000)}\n\n']
+    chunks.extend(format_sse(event) for event in get_events_since(last_id))
+    return ''.join(chunks)
+
+
+@staff_member_required
+def dashboard_events(request):
+    """ダッシュボード更新イベントのSSEエンドポイント（新しいイベントを返してすぐに終了する）"""
+    if not is_live_enabled():
+        # EventSource は 204 を受け取ると再接続しない
+        return HttpResponse(status=204)
+
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_id)
+    except (TypeError, ValueError):
+        # 指定がなければ接続以降のイベントのみ配信
+        last_id = get_latest_event_id()
+
+    response = HttpResponse(render_events(last_id), content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
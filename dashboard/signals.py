@@ -0,0 +1,145 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from bookings.models import Booking, Customer, Schedule
+from bookings.signals import booking_status_bulk_changed, get_previous_state
+from emails.models import EmailLog
+from .summary import invalidate_dashboard_summary
+from .live import is_live_enabled, publish_event
+from functools import partial
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _invalidate_summary():
+    try:
+        invalidate_dashboard_summary()
+    except Exception as e:
+        logger.error(f"ダッシュボードキャッシュ無効化エラー: {str(e)}")
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def dashboard_data_changed_handler(sender, **kwargs):
+    """予約・予定・顧客の変更時にダッシュボード集計キャッシュを無効化"""
+    # トランザクション確定前に無効化すると、変更前の集計が新しいバージョンでキャッシュされる場合がある
+    transaction.on_commit(_invalidate_summary)
+
+
+def _publish_on_commit(event_type, data, extra=None):
+    """
+    トランザクション確定後にイベントを発行（リアルタイム更新が無効の場合は何もしない）
+    extra: 発行時に data に加える項目を返す関数（関連するデータの取得を保存処理から外すため、確定後に実行する）
+    """
+    if not is_live_enabled():
+        return
+
+    def publish():
+        try:
+            if extra is not None:
+                data.update(extra())
+            publish_event(event_type, data)
+        except Exception as e:
+            logger.error(f"ダッシュボードイベント発行エラー: {event_type} - {str(e)}")
+
+    transaction.on_commit(publish)
+
+
+def _booking_event_data(instance):
+    return {
+        'booking_id': instance.pk,
+        'date': instance.booking_date,
+        'time': instance.booking_time.strftime('%H:%M'),
+        'status': instance.status,
+    }
+
+
+def _booking_names(booking_id):
+    """予約のお客様名・サービス名（確定後に1回のクエリで取得。予約が削除されていれば None）"""
+    names = Booking.objects.filter(pk=booking_id).values('customer__name', 'service__name').first() or {}
+    return {'customer': names.get('customer__name'), 'service': names.get('service__name')}
+
+
+@receiver(post_save, sender=Booking)
+def booking_event_handler(sender, instance, created, **kwargs):
+    """予約の作成・ステータス変更・キャンセルをダッシュボードに通知"""
+    data = _booking_event_data(instance)
+    # 変更前の予約日・ステータス（カレンダーの移動元を更新するため。bookings/signals.py で記録）
+    previous = get_previous_state(instance)
+
+    if created or previous is None:
+        event_type = 'booking_created'
+    else:
+        data['previous_date'] = previous['booking_date']
+        data['previous_status'] = previous['status']
+        if previous['status'] == instance.status:
+            event_type = 'booking_updated'
+        elif instance.status == 'cancelled':
+            event_type = 'booking_cancelled'
+        else:
+            event_type = 'booking_status_changed'
+
+    _publish_on_commit(event_type, data, partial(_booking_names, instance.pk))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted_handler(sender, instance, **kwargs):
+    _publish_on_commit('booking_deleted', {
+        'booking_id': instance.pk,
+        'date': instance.booking_date,
+        'status': instance.status,
+    })
+
+
+@receiver(booking_status_bulk_changed)
+def booking_bulk_event_handler(sender, changes, new_status, **kwargs):
+    """一括操作でのステータス変更をダッシュボードに通知（集計キャッシュの無効化は1回、イベントは日付ごとに1件）"""
+    transaction.on_commit(_invalidate_summary)
+
+    counts = {}
+    for booking, old_status in changes:
+        counts[booking.booking_date] = counts.get(booking.booking_date, 0) + 1
+    for booking_date, count in sorted(counts.items()):
+        _publish_on_commit('booking_status_changed', {
+            'date': booking_date,
+            'status': new_status,
+            'count': count,
+        })
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_event_handler(sender, instance, created, **kwargs):
+    """予定の追加・変更をダッシュボードに通知"""
+    previous = get_previous_state(instance)
+    _publish_on_commit('schedule_changed', {
+        'schedule_id': instance.pk,
+        'date': instance.schedule_date,
+        'previous_date': previous['schedule_date'] if previous else None,
+        'title': instance.title,
+        'is_active': instance.is_active,
+    })
+
+
+@receiver(post_delete, sender=Schedule)
+def schedule_deleted_handler(sender, instance, **kwargs):
+    _publish_on_commit('schedule_deleted', {
+        'schedule_id': instance.pk,
+        'date': instance.schedule_date,
+    })
+
+
+@receiver(post_save, sender=EmailLog)
+def email_failed_handler(sender, instance, created, **kwargs):
+    """メール送信失敗をダッシュボードに通知"""
+    if instance.status == 'failed':
+        _publish_on_commit('email_failed', {
+            'email_log_id': instance.pk,
+            'booking_id': instance.booking_id,
+            'recipient': instance.recipient_email,
+            'subject': instance.subject,
+        })
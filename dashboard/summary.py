@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from bookings.models import Booking, Customer, Schedule
+from bookings.utils.cache_versions import get_version, bump_version
+from datetime import timedelta
+
+# 予約・予定・顧客の変更時に上げるバージョン名
+DASHBOARD_VERSION = 'dashboard_summary'
+
+
+def get_dashboard_cache_timeout():
+    """ダッシュボード集計のキャッシュ有効期間（秒）"""
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60)
+
+
+def get_dashboard_version():
+    return get_version(DASHBOARD_VERSION)
+
+
+def invalidate_dashboard_summary():
+    """ダッシュボード集計キャッシュを無効化"""
+    bump_version(DASHBOARD_VERSION)
+
+
+def _booking_rows(queryset):
+    """テンプレート表示に必要な項目だけを辞書で取得"""
+    return list(queryset.values(
+        'id', 'booking_date', 'booking_time', 'status', 'customer__name', 'service__name'
+    ))
+
+
+def build_dashboard_summary(today):
+    """ダッシュボードホームの統計・予約一覧を集計（キャッシュなし）"""
+    today_bookings = _booking_rows(Booking.objects.filter(
+        booking_date=today,
+        status__in=['pending', 'confirmed']
+    ).order_by('booking_time'))
+
+    upcoming_bookings = _booking_rows(Booking.objects.filter(
+        booking_date__gte=today,
+        booking_date__lte=today + timedelta(days=7),
+        status__in=['pending', 'confirmed']
+    ).order_by('booking_date', 'booking_time')[:10])
+
+    stats = {
+        'today_bookings': len(today_bookings),
+        'today_schedules': Schedule.objects.filter(schedule_date=today, is_active=True).count(),
+        'pending_bookings': Booking.objects.filter(status='pending').count(),
+        'total_customers': Customer.objects.count(),
+        'this_month_bookings': Booking.objects.filter(
+            booking_date__year=today.year,
+            booking_date__month=today.month
+        ).count(),
+    }
+
+    return {
+        'today_bookings': today_bookings,
+        'upcoming_bookings': upcoming_bookings,
+        'stats': stats,
+    }
+
+
+def get_dashboard_summary(today=None):
+    """
+    ダッシュボード集計をキャッシュから取得
+    キーに日付（Asia/Tokyo）とバージョンを含めるため、日付が変わるか
+    予約・予定・顧客が変更されると自動的に再計算される
+    """
+    if today is None:
+        today = timezone.localdate()
+
+    version = get_dashboard_version()
+    cache_key = f'dashboard_summary:{today.isoformat()}:v{version}'
+
+    summary = cache.get(cache_key)
+    if summary is None:
+        summary = build_dashboard_summary(today)
+        cache.set(cache_key, summary, get_dashboard_cache_timeout())
+
+    summary = dict(summary)
+    summary['version'] = version
+    return summary
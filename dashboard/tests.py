@@ -1,3 +1,354 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from bookings.models import Booking, BookingSettings, BusinessHours, Customer, Schedule, Service, Therapist
+from dashboard.analytics import UNASSIGNED_LABEL, compute_utilisation
+from dashboard.summary import get_dashboard_version
+from dashboard.live import get_events_since, get_latest_event_id
+from emails.models import EmailLog, EmailTemplate
+from bookings.tests import PerformanceTestMixin
+
+
+class DashboardPerformanceTests(PerformanceTestMixin, TestCase):
+    """管理画面の一覧・カレンダー・売上のクエリ数（件数に比例して増えないこと）"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff_user)
+        self.today = self.perf_data['today']
+
+    def assertPageQueries(self, max_queries, name, url, params=None):
+        with self.assertMaxQueries(max_queries, name):
+            response = self.client.get(url, params or {})
+            if response.streaming:
+                # CSVエクスポートは読み出し時にクエリが発行される
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_home(self):
+        self.assertPageQueries(8, 'dashboard_home', reverse('dashboard:home'))
+        self.assertPageQueries(2, 'dashboard_api_summary', reverse('dashboard:api_summary'))
+
+    def test_booking_list(self):
+        url = reverse('dashboard:booking_list')
+        self.assertPageQueries(12, 'dashboard_booking_list', url)
+        self.assertPageQueries(12, 'dashboard_booking_list_filtered', url, {'status': 'pending'})
+
+    def test_booking_detail(self):
+        booking = Booking.objects.filter(booking_date=self.today).first()
+        self.assertPageQueries(4, 'dashboard_booking_detail', reverse('dashboard:booking_detail', args=[booking.id]))
+
+    def test_customer_list(self):
+        url = reverse('dashboard:customer_list')
+        self.assertPageQueries(5, 'dashboard_customer_list', url)
+        # 常連客（5回以上）の絞り込み・件数は保持している実績の列から求める
+        response = self.assertPageQueries(5, 'dashboard_customer_list_vip', url, {'segment': 'vip'})
+        stats = response.context['customer_stats']
+        self.assertEqual(stats['total_customers'], stats['vip_customers'])
+        self.assertTrue(all(customer.active_booking_count >= 5 for customer in response.context['customers']))
+        # 名前・電話番号の検索は全文検索インデックスから
+        response = self.assertPageQueries(5, 'dashboard_customer_list_search', url, {'search': '顧客123'})
+        self.assertEqual(response.context['customer_stats']['total_customers'], 11)
+        response = self.assertPageQueries(5, 'dashboard_customer_list_search_phone', url, {'search': '090-0000-0123'})
+        self.assertEqual([customer.phone for customer in response.context['customers']], ['09000000123'])
+
+    def test_calendar(self):
+        self.assertPageQueries(8, 'dashboard_calendar', reverse('dashboard:calendar'))
+        self.assertPageQueries(8, 'dashboard_api_calendar_month', reverse('dashboard:api_calendar_month'), {
+            'year': self.today.year, 'month': self.today.month,
+        })
+        self.assertPageQueries(4, 'dashboard_api_calendar_day', reverse('dashboard:api_calendar_day'), {
+            'date': self.today.isoformat(),
+        })
+
+    def test_week(self):
+        self.assertPageQueries(4, 'dashboard_week', reverse('dashboard:week_calendar'))
+
+    def test_sales(self):
+        self.assertPageQueries(20, 'dashboard_sales', reverse('dashboard:sales_dashboard'))
+
+    def test_sales_selected_month(self):
+        # 過去12ヶ月の集計で年をまたいでも、CSVエクスポートのリンクと日別売上は選択月のまま
+        response = self.client.get(reverse('dashboard:sales_dashboard'), {'year': 2026, 'month': 10})
+        self.assertEqual((response.context['selected_year'], response.context['selected_month']), (2026, 10))
+        self.assertEqual(len(response.context['daily_sales']), 31)
+        self.assertContains(response, '?year=2026&month=10')
+
+    def test_utilisation(self):
+        self.assertPageQueries(6, 'dashboard_utilisation', reverse('dashboard:utilisation'))
+        self.assertPageQueries(6, 'dashboard_api_utilisation', reverse('dashboard:api_utilisation'))
+
+    def test_schedule_list(self):
+        self.assertPageQueries(4, 'dashboard_schedule_list', reverse('dashboard:schedule_list'))
+        schedule = Schedule.objects.filter(schedule_date__gte=self.today).first()
+        self.assertPageQueries(5, 'dashboard_schedule_detail', reverse('dashboard:schedule_detail', args=[schedule.id]))
+
+    def test_available_times_api(self):
+        date = self.today + datetime.timedelta(days=7)
+        service = self.perf_data['services'][1]
+        self.assertPageQueries(6, 'dashboard_api_available_times', reverse('dashboard:api_available_times'), {
+            'date': date.isoformat(), 'service_id': service.id,
+        })
+        self.assertPageQueries(6, 'dashboard_api_schedule_times', reverse('dashboard:api_schedule_times'), {
+            'date': date.isoformat(),
+        })
+
+    def test_admin_changelists(self):
+        self.client.force_login(User.objects.create_superuser('perf-admin', password='password'))
+        for name, max_queries in [('booking', 11), ('customer', 7)]:
+            url = reverse(f'admin:bookings_{name}_changelist')
+            self.assertPageQueries(max_queries, f'admin_{name}_changelist', url)
+        # 予約回数（集計）での並び替え
+        response = self.assertPageQueries(7, 'admin_customer_changelist_by_count', url, {'o': '-6'})
+        counts = [customer.active_booking_count for customer in response.context['cl'].result_list]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        # 検索は全文検索インデックスから
+        response = self.assertPageQueries(7, 'admin_customer_changelist_search', url, {'q': '顧客123'})
+        self.assertEqual(len(response.context['cl'].result_list), 11)
+        response = self.assertPageQueries(
+            11, 'admin_booking_changelist_search', reverse('admin:bookings_booking_changelist'), {'q': 'customer123@'}
+        )
+        self.assertTrue(all(booking.customer.email.startswith('customer123@') for booking in response.context['cl'].result_list))
+
+    @override_settings(DASHBOARD_LIVE_UPDATES=True)
+    def test_admin_bulk_confirm(self):
+        self.client.force_login(User.objects.create_superuser('perf-admin', password='password'))
+        EmailTemplate.objects.create(
+            name='ステータス変更', template_type='booking_status_changed',
+            subject='ご予約のステータス変更 {{ booking.booking_date }}',
+            body_text='{{ customer_name }} 様 {{ old_status }} -> {{ new_status }}',
+        )
+        ids = list(Booking.objects.filter(status='pending').values_list('id', flat=True)[:200])
+        self.assertEqual(len(ids), 200)
+        dates = set(Booking.objects.filter(id__in=ids).values_list('booking_date', flat=True))
+        last_event_id = get_latest_event_id()
+
+        # 管理画面の一覧の組み立て（2回）と、メールの登録（SQLiteの変数上限による分割）以外は件数によらず一定
+        # （顧客の利用実績は対象の顧客分をまとめて UPDATE 1回。実績・メールの受信側はそれぞれセーブポイント内で実行）
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertMaxQueries(24, 'admin_booking_bulk_confirm'):
+                response = self.client.post(reverse('admin:bookings_booking_changelist'), {
+                    'action': 'mark_as_confirmed', '_selected_action': ids,
+                })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Booking.objects.filter(id__in=ids, status='confirmed').count(), 200)
+
+        # 通知メールはまとめて送信待ちに登録される
+        email_logs = EmailLog.objects.filter(booking_id__in=ids, template__template_type='booking_status_changed')
+        self.assertEqual(email_logs.count(), 200)
+        self.assertFalse(email_logs.exclude(status='pending').exists())
+        self.assertIn('pending -> confirmed', email_logs.first().body_text)
+
+        # ダッシュボードへの通知は日付ごとに1件
+        events = get_events_since(last_event_id)
+        self.assertEqual({event['data']['date'] for event in events}, dates)
+        self.assertEqual(sum(event['data']['count'] for event in events), 200)
+
+    def test_exports(self):
+        self.assertPageQueries(3, 'dashboard_export_bookings', reverse('dashboard:export_bookings'))
+        self.assertPageQueries(3, 'dashboard_export_customers', reverse('dashboard:export_customers'))
+        self.assertPageQueries(3, 'dashboard_export_sales', reverse('dashboard:export_sales'))
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+    def test_perf(self):
+        response = self.client.get(reverse('dashboard:home'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+$')
+
+        response = self.assertPageQueries(2, 'dashboard_perf', reverse('dashboard:perf'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(response.context['summary'][0]['name'], 'dashboard:home')
+
+
+@override_settings(DASHBOARD_LIVE_UPDATES=True)
+class PreviousStateTests(TestCase):
+    """変更前の状態は保存1回につき1回だけ取得し、空き時間・実績・ダッシュボード・メールで共有する"""
+
+    def setUp(self):
+        service = Service.objects.create(name='ボディ60分', duration_minutes=60, price=6500)
+        customer = Customer.objects.create(name='変更前', email='previous@example.com', phone='090-0000-0000')
+        self.day = datetime.date(2026, 10, 19)
+        self.booking = Booking.objects.create(
+            customer=customer, service=service, booking_date=self.day, booking_time=datetime.time(10, 0)
+        )
+        EmailTemplate.objects.create(
+            name='ステータス変更', template_type='booking_status_changed',
+            subject='ご予約のステータス変更', body_text='{{ old_status }} -> {{ new_status }}',
+        )
+
+    def save_and_count_lookups(self, instance):
+        """保存し、保存前の状態を取得した SELECT の数とダッシュボードへの通知を返す"""
+        table = instance._meta.db_table
+        last_event_id = get_latest_event_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                instance.save()
+        lookups = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}" WHERE "{table}"."id" =' in query['sql']
+        ]
+        return len(lookups), get_events_since(last_event_id)
+
+    def test_booking_status_change(self):
+        self.booking.status = 'confirmed'
+        self.booking.booking_date = self.day + datetime.timedelta(days=1)
+        lookups, events = self.save_and_count_lookups(self.booking)
+        self.assertEqual(lookups, 1)
+
+        event = next(event for event in events if event['type'] == 'booking_status_changed')
+        self.assertEqual((event['data']['previous_date'], event['data']['previous_status']), (self.day, 'pending'))
+        email_log = EmailLog.objects.get(booking=self.booking, template__template_type='booking_status_changed')
+        self.assertIn('pending -> confirmed', email_log.body_text)
+        self.assertEqual(Customer.objects.get().confirmed_booking_count, 1)
+
+    def test_summary_invalidated_on_commit(self):
+        # 確定前にバージョンを上げると、確定前の集計が新しいバージョンでキャッシュされる
+        version = get_dashboard_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.status = 'confirmed'
+            self.booking.save()
+            self.assertEqual(get_dashboard_version(), version)
+        self.assertNotEqual(get_dashboard_version(), version)
+
+    def test_schedule_date_change(self):
+        schedule = Schedule.objects.create(
+            title='研修', schedule_type='training', schedule_date=self.day,
+            start_time=datetime.time(12, 0), end_time=datetime.time(13, 0)
+        )
+        schedule.schedule_date = self.day + datetime.timedelta(days=1)
+        lookups, events = self.save_and_count_lookups(schedule)
+        self.assertEqual(lookups, 1)
+        event = next(event for event in events if event['type'] == 'schedule_changed')
+        self.assertEqual(event['data']['previous_date'], self.day)
+
+
+class LiveEventTests(TestCase):
+    """リアルタイム更新のエンドポイント（接続を保持せず、新しいイベントだけを返してすぐに終了する）"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('live', password='x', is_staff=True)
+        self.client.force_login(self.user)
+        self.url = reverse('dashboard:events')
+
+    @override_settings(DASHBOARD_LIVE_UPDATES=True, DASHBOARD_EVENT_POLL_INTERVAL=5)
+    def test_returns_new_events(self):
+        last_event_id = get_latest_event_id()
+        service = Service.objects.create(name='ボディ60分', duration_minutes=60, price=6500)
+        customer = Customer.objects.create(name='通知', email='live@example.com', phone='090-0000-0000')
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(
+                customer=customer, service=service,
+                booking_date=datetime.date(2026, 10, 19), booking_time=datetime.time(10, 0)
+            )
+
+        response = self.client.get(self.url, {'last_event_id': last_event_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        content = response.content.decode()
+        self.assertTrue(content.startswith('retry: 5000\n\n'))
+        self.assertIn('event: booking_created', content)
+        self.assertIn(f'"booking_id": {booking.pk}', content)
+        self.assertIn('"customer": "通知"', content)
+
+        # ブラウザの再接続（Last-Event-ID）では、それ以降のイベントだけを返す
+        response = self.client.get(
+            self.url, {'last_event_id': last_event_id}, HTTP_LAST_EVENT_ID=str(get_latest_event_id())
+        )
+        self.assertEqual(response.content.decode(), 'retry: 5000\n\n')
+
+    @override_settings(DASHBOARD_LIVE_UPDATES=True)
+    def test_booking_names_loaded_after_commit(self):
+        service = Service.objects.create(name='ボディ60分', duration_minutes=60, price=6500)
+        customer = Customer.objects.create(name='通知', email='live@example.com', phone='090-0000-0000')
+        booking = Booking.objects.create(
+            customer=customer, service=service,
+            booking_date=datetime.date(2026, 10, 19), booking_time=datetime.time(10, 0)
+        )
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.notes = '更新'
+        last_event_id = get_latest_event_id()
+
+        # 保存中はお客様・サービスを取得せず、確定後のイベント発行時に取得する
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                booking.save()
+        tables = ('"bookings_customer"', '"bookings_service"')
+        self.assertFalse([query for query in queries.captured_queries if any(table in query['sql'] for table in tables)])
+
+        for callback in callbacks:
+            callback()
+        event = get_events_since(last_event_id)[-1]
+        self.assertEqual(event['type'], 'booking_updated')
+        self.assertEqual((event['data']['customer'], event['data']['service']), ('通知', 'ボディ60分'))
+
+    @override_settings(DASHBOARD_LIVE_UPDATES=False)
+    def test_disabled(self):
+        # 共有キャッシュがない場合はイベントを発行せず、EventSource が再接続しないよう 204 を返す
+        last_event_id = get_latest_event_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.create(
+                title='研修', schedule_type='training', schedule_date=datetime.date(2026, 10, 19),
+                start_time=datetime.time(12, 0), end_time=datetime.time(13, 0)
+            )
+        self.assertEqual(get_events_since(last_event_id), [])
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+
+
+class UtilisationTests(TestCase):
+    """稼働率の集計（施術時間も営業時間内に限定し、100%を超えないこと）"""
+
+    def setUp(self):
+        self.monday = datetime.date(2026, 10, 19)
+        self.sunday = self.monday - datetime.timedelta(days=1)
+        BusinessHours.objects.create(weekday=0, open_time=datetime.time(10, 0), close_time=datetime.time(20, 0))
+        BusinessHours.objects.create(weekday=6, is_open=False)
+        self.therapist = Therapist.objects.create(name='稼働', display_name='稼働')
+        self.service = Service.objects.create(name='ボディ60分', duration_minutes=60, price=6500)
+        self.customer = Customer.objects.create(name='稼働', email='utilisation@example.com', phone='090-0000-0000')
+        self.buffer = BookingSettings.get_current_settings().treatment_buffer_minutes
+
+    def book(self, date, time, therapist=None):
+        return Booking.objects.create(
+            customer=self.customer, service=self.service, therapist=therapist,
+            booking_date=date, booking_time=time, status='confirmed'
+        )
+
+    def rows(self, date):
+        return {row['therapist_id']: row for row in compute_utilisation(date, date)}
+
+    def test_closed_day(self):
+        self.book(self.sunday, datetime.time(12, 0), self.therapist)
+        row = self.rows(self.sunday)[self.therapist.id]
+        self.assertEqual(row['open_minutes'], 0)
+        self.assertEqual((row['booked_minutes'], row['buffer_minutes'], row['idle_minutes']), (0, 0, 0))
+        self.assertEqual(row['utilisation'], 0)
+
+    def test_booking_past_close(self):
+        # 19:30〜20:30 の予約は閉店までの30分だけ数え、インターバルは数えない
+        self.book(self.monday, datetime.time(19, 30), self.therapist)
+        row = self.rows(self.monday)[self.therapist.id]
+        self.assertEqual((row['booked_minutes'], row['buffer_minutes'], row['idle_minutes']), (30, 0, 570))
+        self.assertEqual(row['utilisation'], 5.0)
+
+        # 営業時間を埋める予約があっても100%を超えない
+        for hour in range(10, 20):
+            self.book(self.monday, datetime.time(hour, 0), self.therapist)
+        row = self.rows(self.monday)[self.therapist.id]
+        self.assertEqual((row['booked_minutes'], row['idle_minutes']), (600, 0))
+        self.assertEqual(row['utilisation'], 100.0)
+
+    def test_unassigned_bookings(self):
+        self.book(self.monday, datetime.time(10, 0))
+        rows = self.rows(self.monday)
+        self.assertEqual(list(rows), [self.therapist.id, None])
+        unassigned = rows[None]
+        self.assertEqual(unassigned['therapist_name'], UNASSIGNED_LABEL)
+        self.assertEqual((unassigned['booked_minutes'], unassigned['buffer_minutes']), (60, self.buffer))
+        # 指名なしの予約は施術者の稼働には含めない
+        self.assertEqual(rows[self.therapist.id]['booked_minutes'], 0)
+        self.assertEqual(rows[self.therapist.id]['idle_minutes'], 600)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, exports, live
 
 app_name = 'dashboard'
 
@@ -14,6 +14,13 @@ urlpatterns = [
     
     # ★ 新規追加: 売上ダッシュボード
     path('dashboard/sales/', views.sales_dashboard, name='sales_dashboard'),
+    
+    # 施術者稼働率
+    path('dashboard/utilisation/', views.utilisation_view, name='utilisation'),
+    
+    # リクエストの計測結果（PROFILING_ENABLED=True のとき）
+    path('dashboard/perf/', views.perf_view, name='perf'),
+    
     # 予約管理機能
     path('dashboard/booking/create/', views.booking_create_dashboard, name='booking_create'),
     
@@ -27,7 +34,19 @@ urlpatterns = [
     path('dashboard/maintenance/', views.maintenance_settings, name='maintenance_settings'),
     path('dashboard/api/toggle-maintenance/', views.toggle_maintenance, name='toggle_maintenance'),
     
+    # CSVエクスポート（一覧画面と同じ絞り込み条件を引き継ぐ）
+    path('dashboard/export/bookings.csv', exports.export_bookings_csv, name='export_bookings'),
+    path('dashboard/export/customers.csv', exports.export_customers_csv, name='export_customers'),
+    path('dashboard/export/sales.csv', exports.export_sales_csv, name='export_sales'),
+    
     # API エンドポイント
     path('dashboard/api/available-times/', views.get_available_times_api, name='api_available_times'),
     path('dashboard/api/schedule-times/', views.get_schedule_times_api, name='api_schedule_times'),
+    path('dashboard/api/calendar/', views.calendar_month_api, name='api_calendar_month'),
+    path('dashboard/api/calendar/day/', views.calendar_day_api, name='api_calendar_day'),
+    path('dashboard/api/utilisation/', views.utilisation_api, name='api_utilisation'),
+    path('dashboard/api/summary/', views.dashboard_summary_api, name='api_summary'),
+    
+    # リアルタイム更新（Server-Sent Events）
+    path('dashboard/events/', live.dashboard_events, name='events'),
 ]
\ No newline at end of file
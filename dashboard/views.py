@@ -2,81 +2,73 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db.models import Count, Prefetch, Q
 from django.http import JsonResponse
 from bookings.models import Booking, Customer, Service, Schedule, BusinessHours, Therapist, BookingSettings, MaintenanceMode
+from .filters import filter_bookings, filter_customers, parse_selected_month, month_range
+from .calendar_summary import build_month_summary, get_day_detail
+from .analytics import compute_utilisation, summarise_by_therapist
+from .summary import get_dashboard_summary, get_dashboard_cache_timeout
+from .live import get_latest_event_id, is_live_enabled
+from bookings.utils.customer_stats import REPEAT_MIN_BOOKINGS, VIP_MIN_BOOKINGS
+from bookings.utils.profiling import get_recent_profiles, summarise_profiles, is_profiling_enabled, get_sample_rate
 from datetime import datetime, timedelta
 import calendar
 
 @staff_member_required
 def dashboard_home(request):
-    """ダッシュボードホーム"""
-    today = timezone.now().date()
-    
-    # 今日の予約
-    today_bookings = Booking.objects.filter(
-        booking_date=today,
-        status__in=['pending', 'confirmed']
-    ).order_by('booking_time')
-    
-    # 今日の予定
-    try:
-        today_schedules = Schedule.objects.filter(
-            schedule_date=today,
-            is_active=True
-        ).order_by('start_time')
-    except:
-        today_schedules = []
-    
-    # 統計情報
-    stats = {
-        'today_bookings': today_bookings.count(),
-        'today_schedules': len(today_schedules),
-        'pending_bookings': Booking.objects.filter(status='pending').count(),
-        'total_customers': Customer.objects.count(),
-        'this_month_bookings': Booking.objects.filter(
-            booking_date__year=today.year,
-            booking_date__month=today.month
-        ).count(),
-    }
+    """ダッシュボードホーム（集計はキャッシュから取得）"""
+    # Asia/Tokyo の日付で「今日」を判定する
+    today = timezone.localdate()
     
-    # 最近の予約（今後1週間）
-    upcoming_bookings = Booking.objects.filter(
-        booking_date__gte=today,
-        booking_date__lte=today + timedelta(days=7),
-        status__in=['pending', 'confirmed']
-    ).order_by('booking_date', 'booking_time')[:10]
+    # 統計情報・今日の予約・今後1週間の予約
+    summary = get_dashboard_summary(today)
     
     context = {
         'title': 'ダッシュボード - GRACE SPA管理画面',
         'today': today,
-        'today_bookings': today_bookings,
-        'today_schedules': today_schedules,
-        'upcoming_bookings': upcoming_bookings,
-        'stats': stats,
+        'today_bookings': summary['today_bookings'],
+        'upcoming_bookings': summary['upcoming_bookings'],
+        'stats': summary['stats'],
+        # テンプレートのフラグメントキャッシュ用
+        'cache_timeout': get_dashboard_cache_timeout(),
+        'cache_version': summary['version'],
+        # この時点以降の更新イベントを受信する（リアルタイム更新が有効な場合のみ）
+        'live_updates': is_live_enabled(),
+        'latest_event_id': get_latest_event_id(),
     }
     return render(request, 'dashboard/home.html', context)
 
+
+@staff_member_required
+def dashboard_summary_api(request):
+    """ダッシュボードホームAPI：統計と予約一覧を返す（更新イベント受信時に使用）"""
+    summary = get_dashboard_summary()
+
+    def serialize(rows):
+        return [{
+            'id': row['id'],
+            'date': row['booking_date'].strftime('%m/%d'),
+            'time': row['booking_time'].strftime('%H:%M'),
+            'customer': row['customer__name'],
+            'service': row['service__name'],
+            'status': row['status'],
+        } for row in rows]
+
+    return JsonResponse({
+        'stats': summary['stats'],
+        'today_bookings': serialize(summary['today_bookings']),
+        'upcoming_bookings': serialize(summary['upcoming_bookings']),
+    })
+
 @staff_member_required
 def booking_list(request):
     """予約一覧"""
-    # フィルター処理
+    # フィルター処理（CSVエクスポートと共通）
     status_filter = request.GET.get('status', '')
     date_filter = request.GET.get('date', '')
     
-    bookings = Booking.objects.all()
-    
-    if status_filter:
-        bookings = bookings.filter(status=status_filter)
-    
-    if date_filter:
-        try:
-            filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-            bookings = bookings.filter(booking_date=filter_date)
-        except ValueError:
-            pass
-    
-    bookings = bookings.order_by('-booking_date', '-booking_time')
+    bookings = filter_bookings(request.GET)
     
     booking_stats = {
         'total_bookings': bookings.count(),
@@ -91,7 +83,8 @@ def booking_list(request):
     
     context = {
         'title': '予約一覧 - GRACE SPA管理画面',
-        'bookings': bookings,
+        # 一覧表示で顧客・サービスを行ごとに取得しない
+        'bookings': bookings.select_related('customer', 'service'),
         'booking_stats': booking_stats,  # ★ 統計データを追加
         'status_choices': Booking.STATUS_CHOICES,
         'current_status': status_filter,
@@ -102,7 +95,7 @@ def booking_list(request):
 @staff_member_required
 def booking_detail(request, booking_id):
     """予約詳細"""
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.select_related('customer', 'service', 'therapist'), id=booking_id)
     
     if request.method == 'POST':
         action = request.POST.get('action')
@@ -135,6 +128,8 @@ def booking_detail(request, booking_id):
     context = {
         'title': f'予約詳細 - {booking.customer.name}様',
         'booking': booking,
+        # この顧客の予約履歴（サービスを行ごとに取得しない）
+        'customer_bookings': list(booking.customer.booking_set.select_related('service')),
     }
     return render(request, 'dashboard/booking_detail.html', context)
 
@@ -143,123 +138,78 @@ def customer_list(request):
     """顧客一覧"""
     search = request.GET.get('search', '')
     
-    customers = Customer.objects.all()
-    
-    if search:
-        customers = customers.filter(
-            Q(name__icontains=search) |
-            Q(email__icontains=search) |
-            Q(phone__icontains=search)
-        )
-    
-    # 予約回数を追加
-    customers = customers.order_by('-created_at')
+    # 検索処理（CSVエクスポートと共通）
+    customers = filter_customers(request.GET)
     
     # ★ 新規追加: 顧客統計の計算
-    customer_stats = {
-        'total_customers': customers.count(),
-        'male_customers': customers.filter(gender='male').count(),
-        'female_customers': customers.filter(gender='female').count(),
-        'unset_gender_customers': customers.filter(Q(gender__isnull=True) | Q(gender='')).count(),
-        'first_visit_customers': customers.filter(is_first_visit=True).count(),
-        'repeat_customers': customers.filter(is_first_visit=False).count(),
-    }
+    # 予約回数別（リピーター（2回以上）、常連客（5回以上））も顧客の実績の列から求め、すべて1回の集計で取得する
+    customer_stats = customers.aggregate(
+        total_customers=Count('pk'),
+        male_customers=Count('pk', filter=Q(gender='male')),
+        female_customers=Count('pk', filter=Q(gender='female')),
+        unset_gender_customers=Count('pk', filter=Q(gender__isnull=True) | Q(gender='')),
+        first_visit_customers=Count('pk', filter=Q(is_first_visit=True)),
+        repeat_customers=Count('pk', filter=Q(is_first_visit=False)),
+        repeat_customers_with_bookings=Count('pk', filter=Q(active_booking_count__gte=REPEAT_MIN_BOOKINGS)),
+        vip_customers=Count('pk', filter=Q(active_booking_count__gte=VIP_MIN_BOOKINGS)),
+    )
     
-    # 予約回数別の統計（リピーター（2回以上）、常連客（5回以上）を計算）
-    # 注意：booking_count はプロパティなので、直接フィルターできない
-    # ここではPythonでカウントする
-    repeat_customers_count = 0
-    vip_customers_count = 0
-    
-    for customer in customers:
-        booking_count = customer.booking_count
-        if booking_count >= 2:
-            repeat_customers_count += 1
-        if booking_count >= 5:
-            vip_customers_count += 1
-    
-    customer_stats['repeat_customers_with_bookings'] = repeat_customers_count
-    customer_stats['vip_customers'] = vip_customers_count
+    # 最新の予約・申込状況の表示用に、予約は行ごとのクエリを避けるため一括取得する
+    customers = customers.prefetch_related(
+        Prefetch('booking_set', queryset=Booking.objects.only('id', 'customer_id', 'booking_date', 'booking_time', 'status'))
+    )
 
     context = {
         'title': '顧客一覧 - GRACE SPA管理画面',
         'customers': customers,
         'customer_stats': customer_stats,  # ★ 統計データを追加
         'search_query': search,
+        'segment': request.GET.get('segment', ''),
     }
     return render(request, 'dashboard/customer_list.html', context)
 
-@staff_member_required
-def calendar_view(request):
-    """カレンダー表示"""
-    # 現在の年月を取得
-    year = int(request.GET.get('year', timezone.now().year))
-    month = int(request.GET.get('month', timezone.now().month))
-    
-    # 月の最初と最後の日を取得
+def _get_month_bounds(year, month):
+    """月の最初と最後の日を取得"""
     first_day = datetime(year, month, 1).date()
     if month == 12:
         last_day = datetime(year + 1, 1, 1).date() - timedelta(days=1)
     else:
         last_day = datetime(year, month + 1, 1).date() - timedelta(days=1)
+    return first_day, last_day
+
+@staff_member_required
+def calendar_view(request):
+    """カレンダー表示（日別件数のみ表示し、詳細はクリック時にAPIから取得）"""
+    # 現在の年月を取得
+    year = int(request.GET.get('year', timezone.now().year))
+    month = int(request.GET.get('month', timezone.now().month))
     
-    # その月の予約を取得
-    bookings = Booking.objects.filter(
-        booking_date__gte=first_day,
-        booking_date__lte=last_day,
-        status__in=['pending', 'confirmed']
-    ).order_by('booking_date', 'booking_time')
-    
-    # その月の予定を取得
-    try:
-        schedules = Schedule.objects.filter(
-            schedule_date__gte=first_day,
-            schedule_date__lte=last_day,
-            is_active=True
-        ).order_by('schedule_date', 'start_time')
-    except:
-        schedules = []
-    
-    # 日付ごとに予約をグループ化
-    bookings_by_date = {}
-    for booking in bookings:
-        date_str = booking.booking_date.strftime('%Y-%m-%d')
-        if date_str not in bookings_by_date:
-            bookings_by_date[date_str] = []
-        bookings_by_date[date_str].append(booking)
+    first_day, last_day = _get_month_bounds(year, month)
     
-    # 日付ごとに予定をグループ化
-    schedules_by_date = {}
-    for schedule in schedules:
-        date_str = schedule.schedule_date.strftime('%Y-%m-%d')
-        if date_str not in schedules_by_date:
-            schedules_by_date[date_str] = []
-        schedules_by_date[date_str].append(schedule)
+    # 日別件数・月次統計・施術者別稼働率を集計（予約オブジェクトは読み込まない）
+    summary = build_month_summary(first_day, last_day)
     
     # カレンダーのデータを作成
     cal = calendar.monthcalendar(year, month)
+    today = timezone.now().date()
+    empty_counts = {'bookings': 0, 'pending': 0, 'confirmed': 0, 'schedules': 0}
     
-    # カレンダーデータに予約・予定情報を追加
     calendar_data = []
     for week in cal:
         week_data = []
         for day in week:
             if day == 0:
-                week_data.append({'day': 0, 'bookings': [], 'schedules': []})
+                week_data.append({'day': 0, 'counts': empty_counts})
             else:
                 day_date = datetime(year, month, day).date()
                 day_str = day_date.strftime('%Y-%m-%d')
-                day_bookings = bookings_by_date.get(day_str, [])
-                day_schedules = schedules_by_date.get(day_str, [])
-                is_today = day_date == timezone.now().date()
                 
                 week_data.append({
                     'day': day,
                     'date': day_date,
                     'date_str': day_str,
-                    'bookings': day_bookings,
-                    'schedules': day_schedules,
-                    'is_today': is_today
+                    'counts': summary['days'].get(day_str, empty_counts),
+                    'is_today': day_date == today
                 })
         calendar_data.append(week_data)
     
@@ -280,16 +230,53 @@ def calendar_view(request):
         'year': year,
         'month': month,
         'month_name': calendar.month_name[month],
-        'bookings_by_date': bookings_by_date,
-        'schedules_by_date': schedules_by_date,
+        'month_stats': summary['stats'],
+        'therapist_utilisation': summary['therapists'],
         'prev_year': prev_year,
         'prev_month': prev_month,
         'next_year': next_year,
         'next_month': next_month,
-        'today': timezone.now().date(),
+        'today': today,
+        'live_updates': is_live_enabled(),
+        'latest_event_id': get_latest_event_id(),
     }
     return render(request, 'dashboard/calendar.html', context)
 
+@staff_member_required
+def calendar_month_api(request):
+    """月カレンダーAPI：日別件数・月次統計・施術者別稼働率を返す"""
+    try:
+        year = int(request.GET.get('year', timezone.now().year))
+        month = int(request.GET.get('month', timezone.now().month))
+        first_day, last_day = _get_month_bounds(year, month)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid year or month'}, status=400)
+    
+    summary = build_month_summary(first_day, last_day)
+    return JsonResponse({
+        'year': year,
+        'month': month,
+        **summary,
+    })
+
+@staff_member_required
+def calendar_day_api(request):
+    """月カレンダーAPI：指定日の予約・予定の概要を返す"""
+    date_str = request.GET.get('date')
+    
+    if not date_str:
+        return JsonResponse({'error': 'Date is required'}, status=400)
+    
+    try:
+        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Invalid date format'}, status=400)
+    
+    return JsonResponse({
+        'date': date_str,
+        **get_day_detail(target_date),
+    })
+
 @staff_member_required
 def week_view(request):
     """週単位カレンダー表示"""
@@ -318,7 +305,7 @@ def week_view(request):
         booking_date__gte=week_start,
         booking_date__lte=week_end,
         status__in=['pending', 'confirmed', 'completed']
-    ).order_by('booking_date', 'booking_time')
+    ).select_related('customer', 'service').order_by('booking_date', 'booking_time')
     
     # その週の予定を取得
     try:
@@ -417,6 +404,78 @@ def week_view(request):
     }
     return render(request, 'dashboard/week_calendar.html', context)
 
+def _get_utilisation_range(params, today):
+    """稼働率集計の期間を取得（デフォルトは今月）"""
+    default_start = today.replace(day=1)
+    default_end = _get_month_bounds(today.year, today.month)[1]
+    
+    start_str = params.get('start', '')
+    end_str = params.get('end', '')
+    start_date = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else default_start
+    end_date = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else default_end
+    return start_date, end_date
+
+@staff_member_required
+def utilisation_view(request):
+    """施術者稼働率ページ"""
+    today = timezone.now().date()
+    
+    try:
+        start_date, end_date = _get_utilisation_range(request.GET, today)
+        rows = compute_utilisation(start_date, end_date)
+    except ValueError as e:
+        messages.error(request, f'集計期間が正しくありません: {e}')
+        start_date = today.replace(day=1)
+        end_date = _get_month_bounds(today.year, today.month)[1]
+        rows = compute_utilisation(start_date, end_date)
+    
+    context = {
+        'title': '施術者稼働率 - GRACE SPA管理画面',
+        'start_date': start_date,
+        'end_date': end_date,
+        'summary': summarise_by_therapist(rows),
+        # 日別の内訳は1ヶ月以内の場合のみ表示
+        'daily_rows': rows if (end_date - start_date).days < 31 else None,
+    }
+    return render(request, 'dashboard/utilisation.html', context)
+
+@staff_member_required
+def utilisation_api(request):
+    """施術者稼働率API"""
+    today = timezone.now().date()
+    
+    try:
+        start_date, end_date = _get_utilisation_range(request.GET, today)
+        rows = compute_utilisation(start_date, end_date)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    for row in rows:
+        row['date'] = row['date'].strftime('%Y-%m-%d')
+    
+    return JsonResponse({
+        'start': start_date.strftime('%Y-%m-%d'),
+        'end': end_date.strftime('%Y-%m-%d'),
+        'therapists': summarise_by_therapist(rows),
+        'days': rows,
+    })
+
+@staff_member_required
+def perf_view(request):
+    """直近のリクエストの計測結果（ProfilingMiddleware）"""
+    profiles = get_recent_profiles()
+    
+    context = {
+        'title': 'パフォーマンス - GRACE SPA管理画面',
+        'profiling_enabled': is_profiling_enabled(),
+        'sample_rate': get_sample_rate(),
+        'profile_count': len(profiles),
+        'summary': summarise_profiles(profiles),
+        # 処理時間の長いリクエスト（重複SQLの確認用）
+        'slowest': sorted(profiles, key=lambda profile: -profile['total_ms'])[:20],
+    }
+    return render(request, 'dashboard/perf.html', context)
+
 # ===== 新規追加: 予約・予定管理機能 =====
 
 @staff_member_required
@@ -512,7 +571,7 @@ def schedule_detail(request, schedule_id):
     try:
         from .forms import ScheduleForm
         
-        schedule = get_object_or_404(Schedule, id=schedule_id)
+        schedule = get_object_or_404(Schedule.objects.select_related('therapist'), id=schedule_id)
         
         if request.method == 'POST':
             form = ScheduleForm(request.POST, instance=schedule)
@@ -560,7 +619,7 @@ def schedule_list(request):
         if type_filter:
             schedules = schedules.filter(schedule_type=type_filter)
         
-        schedules = schedules.order_by('-schedule_date', 'start_time')
+        schedules = schedules.select_related('therapist').order_by('-schedule_date', 'start_time')
         
         # Schedule.SCHEDULE_TYPE_CHOICESを安全に取得
         try:
@@ -659,7 +718,7 @@ def get_available_times_api(request):
     existing_bookings = Booking.objects.filter(
         booking_date=booking_date,
         status__in=['pending', 'confirmed']
-    )
+    ).select_related('customer', 'service')
     
     if therapist_id:
         existing_bookings = existing_bookings.filter(therapist_id=therapist_id)
@@ -801,7 +860,7 @@ def get_schedule_times_api(request):
     existing_bookings = Booking.objects.filter(
         booking_date=target_date,
         status__in=['pending', 'confirmed']
-    )
+    ).select_related('customer', 'service')
     
     if therapist_id:
         existing_bookings = existing_bookings.filter(therapist_id=therapist_id)
@@ -966,18 +1025,10 @@ def sales_dashboard(request):
     
     today = timezone.now().date()
     
-    # ★ 新機能: URL パラメータから年月を取得
-    year = int(request.GET.get('year', today.year))
-    month = int(request.GET.get('month', today.month))
-    
-    # 選択された年月の月初日を計算
-    try:
-        selected_month = datetime(year, month, 1).date()
-    except ValueError:
-        # 無効な年月の場合は現在月を使用
-        selected_month = today.replace(day=1)
-        year = today.year
-        month = today.month
+    # ★ 新機能: URL パラメータから年月を取得（CSVエクスポートと共通）
+    selected_month = parse_selected_month(request.GET, today)
+    year = selected_month.year
+    month = selected_month.month
     
     current_month = selected_month
     
@@ -988,13 +1039,14 @@ def sales_dashboard(request):
             month_start = current_month
         else:
             # 前月を計算
+            # （選択月の year / month は CSVエクスポートのリンクと日別売上で使うため上書きしない）
             if current_month.month - i <= 0:
-                year = current_month.year - 1
-                month = 12 + (current_month.month - i)
+                loop_year = current_month.year - 1
+                loop_month = 12 + (current_month.month - i)
             else:
-                year = current_month.year
-                month = current_month.month - i
-            month_start = current_month.replace(year=year, month=month, day=1)
+                loop_year = current_month.year
+                loop_month = current_month.month - i
+            month_start = current_month.replace(year=loop_year, month=loop_month, day=1)
         
         # 翌月の1日を計算
         if month_start.month == 12:
@@ -1027,16 +1079,22 @@ def sales_dashboard(request):
     daily_sales = []
     days_in_selected_month = calendar.monthrange(year, month)[1]
     
-    for day in range(1, days_in_selected_month + 1):
-        target_date = selected_month.replace(day=day)
-        
-        daily_revenue = Booking.objects.filter(
-            booking_date=target_date,
+    # 日ごとに問い合わせず、選択月をまとめて日別に集計する
+    daily_totals = {
+        row['booking_date']: row
+        for row in Booking.objects.filter(
+            booking_date__gte=selected_month,
+            booking_date__lt=month_range(selected_month)[1],
             status='completed'
-        ).aggregate(
+        ).values('booking_date').annotate(
             total=Sum('service__price'),
             count=Count('id')
-        )
+        ).order_by()
+    }
+    
+    for day in range(1, days_in_selected_month + 1):
+        target_date = selected_month.replace(day=day)
+        daily_revenue = daily_totals.get(target_date, {'total': 0, 'count': 0})
         
         daily_sales.append({
             'date': target_date.strftime('%m/%d'),
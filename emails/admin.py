@@ -3,6 +3,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.http import HttpResponseRedirect
 from django.contrib import messages
+from django.db.models import F
 from django.utils import timezone
 from .models import EmailTemplate, EmailLog, MailSettings
 from .utils import send_test_email
@@ -105,13 +106,9 @@ class EmailLogAdmin(admin.ModelAdmin):
     booking_link.short_description = '関連予約'
     
     def retry_failed_emails(self, request, queryset):
-        failed_emails = queryset.filter(status='failed')
-        count = 0
-        for email_log in failed_emails:
-            email_log.status = 'retry'
-            email_log.retry_count += 1
-            email_log.save()
-            count += 1
+        count = queryset.filter(status='failed').update(
+            status='retry', retry_count=F('retry_count') + 1, updated_at=timezone.now()
+        )
         
         self.message_user(
             request,
@@ -121,13 +118,8 @@ class EmailLogAdmin(admin.ModelAdmin):
     retry_failed_emails.short_description = '失敗したメールを再送信待ちにする'
     
     def mark_as_sent(self, request, queryset):
-        pending_emails = queryset.filter(status='pending')
-        count = 0
-        for email_log in pending_emails:
-            email_log.status = 'sent'
-            email_log.sent_at = timezone.now()
-            email_log.save()
-            count += 1
+        now = timezone.now()
+        count = queryset.filter(status='pending').update(status='sent', sent_at=now, updated_at=now)
         
         self.message_user(
             request,
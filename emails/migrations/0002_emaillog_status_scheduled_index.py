@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emails', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(fields=['status', 'scheduled_at'], name='emaillog_status_sched_idx'),
+        ),
+    ]
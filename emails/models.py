@@ -62,6 +62,10 @@ class EmailLog(models.Model):
         verbose_name = 'メール送信ログ'
         verbose_name_plural = 'メール送信ログ'
         ordering = ['-created_at']
+        indexes = [
+            # 送信待ちメールの取得（send_emails / process_pending_emails）
+            models.Index(fields=['status', 'scheduled_at'], name='emaillog_status_sched_idx'),
+        ]
     
     def __str__(self):
         return f'{self.recipient_email} - {self.subject} ({self.get_status_display()})'
@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from bookings.models import Booking
-from .utils import send_booking_confirmation_email, send_admin_new_booking_email, send_booking_status_changed_email
+from bookings.signals import booking_status_bulk_changed, get_previous_state
+from .utils import (
+    send_booking_confirmation_email, send_admin_new_booking_email, send_booking_status_changed_email,
+    enqueue_booking_status_changed_emails
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,33 +29,27 @@ def booking_created_handler(sender, instance, created, **kwargs):
             logger.error(f"予約作成メール送信エラー: {instance} - {str(e)}")
 
 
-@receiver(pre_save, sender=Booking)
-def booking_status_changed_handler(sender, instance, **kwargs):
-    """予約ステータス変更時の処理"""
-    if instance.pk:  # 既存の予約の場合
-        try:
-            old_booking = Booking.objects.get(pk=instance.pk)
-            if old_booking.status != instance.status:
-                # ステータスが変更された場合
-                instance._old_status = old_booking.status
-                instance._status_changed = True
-            else:
-                instance._status_changed = False
-        except Booking.DoesNotExist:
-            instance._status_changed = False
-    else:
-        instance._status_changed = False
-
-
 @receiver(post_save, sender=Booking)
 def booking_status_updated_handler(sender, instance, created, **kwargs):
-    """予約ステータス更新後の処理"""
-    if not created and getattr(instance, '_status_changed', False):
+    """予約ステータス更新後の処理（変更前のステータスは bookings/signals.py で記録）"""
+    previous = get_previous_state(instance)
+    if not created and previous and previous['status'] != instance.status:
         try:
-            old_status = getattr(instance, '_old_status', None)
-            if old_status:
-                send_booking_status_changed_email(instance, old_status, instance.status)
-                logger.info(f"ステータス変更メール送信完了: {instance} ({old_status} -> {instance.status})")
+            old_status = previous['status']
+            send_booking_status_changed_email(instance, old_status, instance.status)
+            logger.info(f"ステータス変更メール送信完了: {instance} ({old_status} -> {instance.status})")
                 
         except Exception as e:
-            logger.error(f"ステータス変更メール送信エラー: {instance} - {str(e)}")
\ No newline at end of file
+            logger.error(f"ステータス変更メール送信エラー: {instance} - {str(e)}")
+
+
+@receiver(booking_status_bulk_changed)
+def booking_status_bulk_changed_handler(sender, changes, new_status, **kwargs):
+    """一括操作でのステータス変更後の処理（通知メールをまとめて送信待ちに登録）"""
+    try:
+        # 失敗しても一括操作のトランザクションを壊さないよう、セーブポイント内で登録する
+        with transaction.atomic():
+            email_logs = enqueue_booking_status_changed_emails(changes, new_status)
+        logger.info(f"ステータス変更メール登録完了: {len(email_logs)}件 (-> {new_status})")
+    except Exception as e:
+        logger.error(f"ステータス変更メール登録エラー: {len(changes)}件 - {str(e)}")
@@ -15,9 +15,9 @@ def get_mail_settings():
     return MailSettings.get_settings()
 
 
-def create_email_context(booking=None, customer=None, **extra_context):
-    """メールテンプレート用のコンテキストを作成"""
-    mail_settings = get_mail_settings()
+def create_email_context(booking=None, customer=None, mail_settings=None, **extra_context):
+    """メールテンプレート用のコンテキストを作成（mail_settings を渡すと設定を取得し直さない）"""
+    mail_settings = mail_settings or get_mail_settings()
     
     context = {
         'mail_settings': mail_settings,
@@ -309,6 +309,48 @@ def send_booking_status_changed_email(booking, old_status, new_status):
     return send_email_now(email_log)
 
 
+def enqueue_booking_status_changed_emails(changes, new_status):
+    """
+    複数の予約のステータス変更通知メールをまとめて送信待ちに登録（管理画面の一括操作用）
+    テンプレート・メール設定の取得と EmailLog の登録はそれぞれ1回で行い、送信は send_emails コマンドに任せる
+
+    changes: 予約と変更前のステータスの組のリスト（予約は customer・service・therapist を取得済みのもの）
+    戻り値: 登録した EmailLog のリスト
+    """
+    mail_settings = get_mail_settings()
+    if not changes or not mail_settings.enable_customer_notifications:
+        return []
+    
+    template = EmailTemplate.objects.filter(template_type='booking_status_changed', is_active=True).first()
+    if template is None:
+        logger.error("メールテンプレートが見つかりません: booking_status_changed")
+        return []
+    
+    subject_template = Template(template.subject)
+    body_text_template = Template(template.body_text)
+    body_html_template = Template(template.body_html) if template.body_html else None
+    
+    now = timezone.now()
+    email_logs = []
+    for booking, old_status in changes:
+        context = Context(create_email_context(
+            booking=booking, mail_settings=mail_settings, old_status=old_status, new_status=new_status
+        ))
+        email_logs.append(EmailLog(
+            template=template,
+            recipient_email=booking.customer.email,
+            recipient_name=booking.customer.name,
+            subject=subject_template.render(context),
+            body_text=body_text_template.render(context),
+            body_html=body_html_template.render(context) if body_html_template else '',
+            booking=booking,
+            scheduled_at=now,
+            status='pending'
+        ))
+    
+    return EmailLog.objects.bulk_create(email_logs)
+
+
 def send_test_email(recipient_email):
     """テストメール送信"""
     mail_settings = get_mail_settings()
@@ -22,6 +22,8 @@ DJANGO_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # runserver でも静的ファイルを WhiteNoise から配信する（本番と同じヘッダーで確認できる）
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
 ]
 
@@ -39,7 +41,11 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    # 他のミドルウェアの処理時間も含めて計測するため先頭に置く（PROFILING_ENABLED=False なら読み込まれない）
+    'bookings.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # 静的ファイルの配信（Cache-Control・gzip/brotli）。できるだけ前に置き、以降のミドルウェアを通さない
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,11 +81,112 @@ WSGI_APPLICATION = 'grace_spa_project.wsgi.application'
 # Database
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # 標準の SQLite バックエンド + トランザクション開始方法の設定（bookings/sqlite_backend）
+        'ENGINE': 'bookings.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+# SQLite の接続ごとの設定（bookings/db.py で接続時に適用）
+# 同時予約・メール送信バッチ・管理画面の書き込みが重なった際の "database is locked" を防ぐ
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ミリ秒
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),  # バイト
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -20000)),  # 負の値はKB単位（約20MB）
+    'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
+# トランザクション開始時に書き込みロックを取得し、ロック待ちを busy_timeout の範囲で待機する
+SQLITE_TRANSACTION_MODE = os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+
+# ===========================================
+# キャッシュ設定（環境変数から選択）
+# ===========================================
+# CACHE_BACKEND:
+#   locmem    - プロセスごとのメモリ（開発用。レート制限などはワーカー単位になる）
+#   file      - ファイルキャッシュ（同一サーバーの全ワーカーで共有）
+#   memcached - memcached（pymemcache が必要）
+#   redis     - Redis（redis-py が必要）
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem').lower()
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHE_DEFAULT_LOCATIONS = {
+    'locmem': 'grace-spa',
+    'file': str(BASE_DIR / 'cache'),
+    'memcached': '127.0.0.1:11211',
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(f'CACHE_BACKEND の値が不正です: {CACHE_BACKEND}')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'grace_spa'),
+    }
+}
+
+# LocMem・ファイルキャッシュの上限件数（既定の300件ではレート制限のカウンタが削除されるため拡張）
+if CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+    }
+
+# 公開ページ（トップページ・セラピスト紹介）のキャッシュ有効期間（秒）
+# サービス・施術者・予約設定の変更時には自動で無効化される（website/cache.py）
+PUBLIC_PAGE_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_PAGE_CACHE_TIMEOUT', 600))
+
+# サービス・施術者の一覧（カタログ）を各ワーカーで使い回す最長時間（秒）
+# 変更時はキャッシュのバージョンで読み込み直すが、locmem ではバージョンが他のワーカーに伝わらないため
+# この時間を過ぎると読み込み直す（bookings/utils/catalog.py）
+CATALOG_SNAPSHOT_MAX_AGE = int(os.environ.get('CATALOG_SNAPSHOT_MAX_AGE', 60))
+
+# ダッシュボード・カレンダーのリアルタイム更新（dashboard/live.py）
+# イベントはキャッシュを通じて全ワーカーに配信するため、共有キャッシュ（locmem 以外）の場合のみ有効にできる
+DASHBOARD_LIVE_UPDATES = (
+    CACHE_BACKEND != 'locmem' and os.environ.get('DASHBOARD_LIVE_UPDATES', 'True').lower() == 'true'
+)
+# ブラウザが新しいイベントを確認する間隔（秒）。1回の確認はワーカーを占有せずにすぐ終了する
+DASHBOARD_EVENT_POLL_INTERVAL = int(os.environ.get('DASHBOARD_EVENT_POLL_INTERVAL', 5))
+
+# ===========================================
+# セッション設定
+# ===========================================
+# SESSION_BACKEND:
+#   db             - データベース（従来どおり）
+#   cached_db      - 読み込みはキャッシュ、書き込みはキャッシュとデータベース
+#   cache          - キャッシュのみ（キャッシュから削除されるとセッションも消える）
+#   signed_cookies - 署名付きCookie（サーバー側に書き込みなし）
+# 共有キャッシュを使う場合は cached_db、LocMem の場合は db を既定とする
+# （LocMem で cached_db を使うとワーカー間でセッションの内容が食い違うため）
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_BACKEND = os.environ.get(
+    'SESSION_BACKEND',
+    'db' if CACHE_BACKEND == 'locmem' else 'cached_db'
+).lower()
+
+if SESSION_BACKEND not in SESSION_ENGINES:
+    raise ValueError(f'SESSION_BACKEND の値が不正です: {SESSION_BACKEND}')
+
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -108,6 +215,29 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# 静的ファイルのビルド（python manage.py collectstatic）
+#   ファイル名に内容のハッシュを付け（例: css/site.3f2a1b9c.css）、gzip・brotli 圧縮版も作成する
+#   ハッシュ付きのファイルは WhiteNoise が Cache-Control: max-age=315360000, immutable で配信するため、
+#   2回目以降の訪問ではブラウザのキャッシュが使われる
+# ハッシュ付きのファイル名は collectstatic の実行後にのみ使える（既定では DEBUG=False のときのみ有効）
+STATIC_MANIFEST = os.environ.get('STATIC_MANIFEST', str(not DEBUG)).lower() == 'true'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'whitenoise.storage.CompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+# collectstatic を実行していない環境（開発・テスト）では static/ などから直接配信する
+WHITENOISE_USE_FINDERS = not STATIC_MANIFEST
+WHITENOISE_AUTOREFRESH = not STATIC_MANIFEST
+# ハッシュの付いていないファイルのキャッシュ期間（秒）
+WHITENOISE_MAX_AGE = int(os.environ.get('WHITENOISE_MAX_AGE', 0 if DEBUG else 3600))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -160,4 +290,20 @@ EMAIL_USE_LOCALTIME = True
 SITE_URL = os.environ.get('SITE_URL', 'https://gracespa.com')
 
 # 予約設定
-BOOKING_REQUIRES_APPROVAL = os.environ.get('BOOKING_REQUIRES_APPROVAL', 'True').lower() == 'true'
\ No newline at end of file
+BOOKING_REQUIRES_APPROVAL = os.environ.get('BOOKING_REQUIRES_APPROVAL', 'True').lower() == 'true'
+# 予約フォームの入力途中データの保存先
+#   session - セッションに保存（既定）
+#   token   - 署名付きトークンをフォームに埋め込み、セッションを使用しない
+BOOKING_WIZARD_MODE = os.environ.get('BOOKING_WIZARD_MODE', 'session').lower()
+BOOKING_TOKEN_MAX_AGE = int(os.environ.get('BOOKING_TOKEN_MAX_AGE', 3600))  # 秒
+# 空き時間API（予約フォームのステップ2）をブラウザでキャッシュする期間（秒）
+# 期間経過後は ETag で確認し、予約・予定・設定が変わっていなければ 304 を返す
+AVAILABLE_TIMES_MAX_AGE = int(os.environ.get('AVAILABLE_TIMES_MAX_AGE', 30))
+
+# プロファイリング（bookings.middleware.ProfilingMiddleware）
+# 計測結果は Server-Timing ヘッダーと /dashboard/perf/（スタッフのみ）で確認できる
+# 本番環境では PROFILING_SAMPLE_RATE を 0.01 程度にすると負荷をほぼ増やさずに常時計測できる
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 1.0))  # 計測するリクエストの割合（0〜1）
+PROFILING_HISTORY_SIZE = int(os.environ.get('PROFILING_HISTORY_SIZE', 500))  # 集計する直近のリクエスト数
+PROFILING_TTL = int(os.environ.get('PROFILING_TTL', 3600))  # 計測結果の保存期間（秒）
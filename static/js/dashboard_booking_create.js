@@ -0,0 +1,276 @@
+document.addEventListener('DOMContentLoaded', function () {
+    let currentDate = new Date();
+    let selectedDate = null;
+    let selectedTime = null;
+
+    // 営業時間情報（デフォルト値）
+    const businessHours = {
+        0: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 月
+        1: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 火
+        2: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 水
+        3: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 木
+        4: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 金
+        5: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 土
+        6: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' } // 日
+    };
+
+    // カレンダー初期化
+    updateCalendar();
+
+    // イベントリスナー
+    document.getElementById('prevMonth').addEventListener('click', () => {
+        currentDate.setMonth(currentDate.getMonth() - 1);
+        updateCalendar();
+    });
+
+    document.getElementById('nextMonth').addEventListener('click', () => {
+        currentDate.setMonth(currentDate.getMonth() + 1);
+        updateCalendar();
+    });
+
+    // サービス・施術者選択の変更を監視
+    const serviceSelect = document.querySelector('select[name="service"]');
+    const therapistSelect = document.querySelector('select[name="therapist"]');
+
+    if (serviceSelect) {
+        serviceSelect.addEventListener('change', () => {
+            if (selectedDate) {
+                loadAvailableTimes(selectedDate);
+            }
+        });
+    }
+
+    if (therapistSelect) {
+        therapistSelect.addEventListener('change', () => {
+            if (selectedDate) {
+                loadAvailableTimes(selectedDate);
+            }
+        });
+    }
+
+    function updateCalendar() {
+        const year = currentDate.getFullYear();
+        const month = currentDate.getMonth();
+
+        // 月名を更新
+        const monthNames = ['1月', '2月', '3月', '4月', '5月', '6月',
+            '7月', '8月', '9月', '10月', '11月', '12月'];
+        document.getElementById('currentMonth').textContent = `${year}年${monthNames[month]}`;
+
+        // カレンダーの日付を生成
+        const firstDay = new Date(year, month, 1);
+        const lastDay = new Date(year, month + 1, 0);
+        const startDate = new Date(firstDay);
+        startDate.setDate(startDate.getDate() - firstDay.getDay());
+
+        const calendarDays = document.getElementById('calendarDays');
+        calendarDays.innerHTML = '';
+
+        const today = new Date();
+        today.setHours(0, 0, 0, 0);
+
+        for (let i = 0; i < 42; i++) {
+            const date = new Date(startDate);
+            date.setDate(startDate.getDate() + i);
+
+            const dayElement = document.createElement('div');
+            dayElement.className = 'calendar-day';
+            dayElement.textContent = date.getDate();
+
+            // クラスの設定
+            if (date.getMonth() !== month) {
+                dayElement.classList.add('other-month');
+            } else if (date < today) {
+                dayElement.classList.add('disabled');
+            } else if (date.getTime() === today.getTime()) {
+                dayElement.classList.add('today');
+            }
+
+           // ✅ 修正：営業日チェック（土曜日を有効にする）
+            const dayOfWeek = date.getDay();
+            const businessHour = businessHours[dayOfWeek];
+            if (!businessHour || !businessHour.is_open) {
+            dayElement.classList.add('disabled');
+            }
+
+            // クリックイベント
+            if (!dayElement.classList.contains('disabled') && !dayElement.classList.contains('other-month')) {
+                dayElement.addEventListener('click', () => selectDate(date, dayElement));
+            }
+
+            calendarDays.appendChild(dayElement);
+        }
+    }
+
+    function selectDate(date, element) {
+        // 前の選択をクリア
+        document.querySelectorAll('.calendar-day.selected').forEach(el => {
+            el.classList.remove('selected');
+        });
+
+        // 新しい選択を設定
+        element.classList.add('selected');
+        selectedDate = date;
+
+        // ✅ 修正：正常動作しているstep2_datetime.htmlと同じ方法を採用
+        const year = date.getFullYear();
+        const month = String(date.getMonth() + 1).padStart(2, '0');
+        const day = String(date.getDate()).padStart(2, '0');
+        const dateString = `${year}-${month}-${day}`;
+
+        // 隠しフィールドに設定
+        document.getElementById('id_booking_date').value = dateString;
+
+        // デバッグ用ログ
+        console.log('選択された日付:', date);
+        console.log('送信される日付文字列:', dateString);
+
+        // 利用可能時間を読み込み
+        loadAvailableTimes(date);
+    }
+
+    function loadAvailableTimes(date) {
+        const therapistSelect = document.querySelector('select[name="therapist"]');
+        const serviceSelect = document.querySelector('select[name="service"]');
+
+        const therapistId = therapistSelect ? therapistSelect.value : '';
+        const serviceId = serviceSelect ? serviceSelect.value : '';
+
+           // ✅ 修正：同じ方法で日付文字列を作成
+        const year = date.getFullYear();
+        const month = String(date.getMonth() + 1).padStart(2, '0');
+        const day = String(date.getDate()).padStart(2, '0');
+        const dateStr = `${year}-${month}-${day}`;
+
+        const url = `/dashboard/api/available-times/?date=${dateStr}&service_id=${serviceId}&therapist_id=${therapistId}`;
+
+        fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                displayTimeslots(data.time_slots);
+            })
+            .catch(error => {
+                console.error('Error loading times:', error);
+                // エラー時はローカルで時間スロットを生成
+                displayLocalTimeslots(date);
+            });
+    }
+
+    function displayLocalTimeslots(date) {
+        const dayOfWeek = date.getDay();
+        const businessHour = businessHours[dayOfWeek];
+
+        if (!businessHour || !businessHour.is_open) {
+            const timeSlotsContainer = document.getElementById('timeSlots');
+            timeSlotsContainer.innerHTML = '<p class="no-times">この日は営業していません。</p>';
+            return;
+        }
+
+        const timeSlotsContainer = document.getElementById('timeSlots');
+        timeSlotsContainer.innerHTML = '';
+
+        // 営業時間内の時間スロットを10分刻みで生成
+        const openTime = parseTime(businessHour.open_time);
+        const lastBookingTime = parseTime(businessHour.last_booking_time);
+
+        let currentTime = openTime;
+
+        while (currentTime <= lastBookingTime) {
+            const timeStr = formatTime(currentTime);
+
+            const timeSlot = document.createElement('div');
+            timeSlot.className = 'time-slot available';
+            timeSlot.textContent = timeStr;
+            timeSlot.addEventListener('click', () => selectTime(timeStr, timeSlot));
+
+            timeSlotsContainer.appendChild(timeSlot);
+
+            currentTime += 10; // 10分刻み
+        }
+    }
+
+    function displayTimeslots(timeSlots) {
+        const timeSlotsContainer = document.getElementById('timeSlots');
+        timeSlotsContainer.innerHTML = '';
+
+        if (timeSlots.length === 0) {
+            timeSlotsContainer.innerHTML = '<p class="no-times">この日は予約可能な時間がありません。</p>';
+            return;
+        }
+
+        timeSlots.forEach(timeData => {
+            const timeSlot = document.createElement('div');
+            timeSlot.className = 'time-slot';
+            timeSlot.textContent = timeData.time;
+
+            // ステータスに応じてクラスを設定
+            if (timeData.status === 'available') {
+                timeSlot.classList.add('available');
+                timeSlot.addEventListener('click', () => selectTime(timeData.time, timeSlot));
+            } else if (timeData.status === 'booking_conflict') {
+                timeSlot.classList.add('booking-conflict');
+                timeSlot.title = `既存予約: ${timeData.conflict_info || ''}`;
+                // 管理者なので重複も選択可能
+                timeSlot.addEventListener('click', () => selectTime(timeData.time, timeSlot));
+            } else if (timeData.status === 'schedule_conflict') {
+                timeSlot.classList.add('schedule-conflict');
+                timeSlot.title = `予定: ${timeData.conflict_info || ''}`;
+                // 管理者なので重複も選択可能
+                timeSlot.addEventListener('click', () => selectTime(timeData.time, timeSlot));
+            } else {
+                timeSlot.classList.add('outside-hours');
+                timeSlot.title = '営業時間外';
+            }
+
+            timeSlotsContainer.appendChild(timeSlot);
+        });
+    }
+
+    function selectTime(time, element) {
+        // 営業時間外は選択不可
+        if (element.classList.contains('outside-hours')) {
+            return;
+        }
+
+        // 前の選択をクリア
+        document.querySelectorAll('.time-slot.selected').forEach(el => {
+            el.classList.remove('selected');
+        });
+
+        // 新しい選択を設定
+        element.classList.add('selected');
+        selectedTime = time;
+
+        // 隠しフィールドに設定
+        document.getElementById('id_booking_time').value = time;
+
+        // 送信ボタンを有効化
+        updateSubmitButton();
+    }
+
+    function updateSubmitButton() {
+        const submitBtn = document.getElementById('submitBtn');
+        submitBtn.disabled = false; // 管理者なので基本的に有効
+    }
+
+    // ユーティリティ関数
+    function parseTime(timeStr) {
+        const [hours, minutes] = timeStr.split(':').map(Number);
+        return hours * 60 + minutes;
+    }
+
+    function formatTime(minutes) {
+        const hours = Math.floor(minutes / 60);
+        const mins = minutes % 60;
+        return `${hours.toString().padStart(2, '0')}:${mins.toString().padStart(2, '0')}`;
+    }
+
+    // フォーム送信時のバリデーション
+    document.getElementById('bookingForm').addEventListener('submit', function (e) {
+        if (!selectedDate || !selectedTime) {
+            e.preventDefault();
+            alert('日付と時間を選択してください。');
+            return false;
+        }
+    });
+});
@@ -0,0 +1,387 @@
+document.addEventListener('DOMContentLoaded', function() {
+    let currentDate = new Date();
+    let selectedDate = null;
+    let selectedStartTime = null;
+    let selectedEndTime = null;
+
+    // カレンダー初期化
+    updateCalendar();
+
+    // イベントリスナー
+    document.getElementById('prevMonth').addEventListener('click', () => {
+        currentDate.setMonth(currentDate.getMonth() - 1);
+        updateCalendar();
+    });
+
+    document.getElementById('nextMonth').addEventListener('click', () => {
+        currentDate.setMonth(currentDate.getMonth() + 1);
+        updateCalendar();
+    });
+
+    // 施術者選択の変更を監視
+    const therapistSelect = document.querySelector('select[name="therapist"]');
+    if (therapistSelect) {
+        therapistSelect.addEventListener('change', () => {
+            if (selectedDate) {
+                loadTimeSlots();
+                if (selectedStartTime) {
+                    updateEndTimeSlots();
+                }
+            }
+        });
+    }
+
+    function updateCalendar() {
+        const year = currentDate.getFullYear();
+        const month = currentDate.getMonth();
+
+        // 月名を更新
+        const monthNames = ['1月', '2月', '3月', '4月', '5月', '6月', 
+                           '7月', '8月', '9月', '10月', '11月', '12月'];
+        document.getElementById('currentMonth').textContent = `${year}年${monthNames[month]}`;
+
+        // カレンダーの日付を生成
+        const firstDay = new Date(year, month, 1);
+        const lastDay = new Date(year, month + 1, 0);
+        const startDate = new Date(firstDay);
+        startDate.setDate(startDate.getDate() - firstDay.getDay());
+
+        const calendarDays = document.getElementById('calendarDays');
+        calendarDays.innerHTML = '';
+
+        const today = new Date();
+        today.setHours(0, 0, 0, 0);
+
+        for (let i = 0; i < 42; i++) {
+            const date = new Date(startDate);
+            date.setDate(startDate.getDate() + i);
+
+            const dayElement = document.createElement('div');
+            dayElement.className = 'calendar-day';
+            dayElement.textContent = date.getDate();
+
+// ✅ 修正: 過去の日付チェックを追加
+        // クラスの設定
+        if (date.getMonth() !== month) {
+            dayElement.classList.add('other-month');
+        } else if (date < today) {
+            // ✅ 追加: 過去の日付をdisabledに設定
+            dayElement.classList.add('disabled');
+        } else if (date.getTime() === today.getTime()) {
+            dayElement.classList.add('today');
+        }
+
+        // 既存の選択状態を復元
+        if (selectedDate && date.toDateString() === selectedDate.toDateString()) {
+            dayElement.classList.add('selected');
+        }
+
+        // ✅ 修正: disabledの日付はクリック不可に変更
+        // クリックイベント（過去の日付は選択不可にする）
+        if (!dayElement.classList.contains('other-month') && !dayElement.classList.contains('disabled')) {
+            dayElement.addEventListener('click', () => selectDate(date, dayElement));
+        }
+
+        calendarDays.appendChild(dayElement);
+    }
+}
+
+       // ✅ 追加: 過去の日付が選択された場合のバリデーション
+        function selectDate(date, element) {
+       // 過去の日付チェック
+        const today = new Date();
+        today.setHours(0, 0, 0, 0);
+
+        if (date < today) {
+          alert('過去の日付は選択できません。');
+        return;
+    }
+
+    // 前の選択をクリア
+    document.querySelectorAll('.calendar-day.selected').forEach(el => {
+        el.classList.remove('selected');
+    });
+
+    // 新しい選択を設定
+    element.classList.add('selected');
+    selectedDate = date;
+
+    // ローカル時間で日付文字列を作成
+    const year = date.getFullYear();
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    const dateString = `${year}-${month}-${day}`;
+
+    // 隠しフィールドに設定
+    document.getElementById('id_schedule_date').value = dateString;
+
+    // デバッグ用ログ
+    console.log('選択された日付:', date);
+    console.log('送信される日付文字列:', dateString);
+
+    // 時間選択を初期化
+    loadTimeSlots();
+
+    // 選択状態をリセット
+    selectedStartTime = null;
+    selectedEndTime = null;
+    document.getElementById('id_start_time').value = '';
+    document.getElementById('id_end_time').value = '';
+    updateEndTimeSlots();
+    updateSubmitButton();
+}
+
+    function loadTimeSlots() {
+        const therapistSelect = document.querySelector('select[name="therapist"]');
+        const therapistId = therapistSelect ? therapistSelect.value : '';
+        // 日付をローカル時間で文字列化する関数
+    function formatDateLocal(date) {
+        const year = date.getFullYear();
+        const month = String(date.getMonth() + 1).padStart(2, '0');
+        const day = String(date.getDate()).padStart(2, '0');
+        return `${year}-${month}-${day}`;
+    }
+        const dateStr = formatDateLocal(selectedDate);
+        const url = `/dashboard/api/schedule-times/?date=${dateStr}&therapist_id=${therapistId}`;
+
+        fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                displayStartTimeSlots(data.time_slots);
+            })
+            .catch(error => {
+                console.error('Error loading times:', error);
+                // エラー時はローカルで時間スロットを生成
+                displayLocalStartTimeSlots();
+            });
+    }
+
+    function displayLocalStartTimeSlots() {
+        const startTimeSlotsContainer = document.getElementById('startTimeSlots');
+        startTimeSlotsContainer.innerHTML = '';
+
+        // 6:00から22:00まで10分刻みで時間を生成
+        const startHour = 6;
+        const endHour = 22;
+
+        for (let hour = startHour; hour < endHour; hour++) {
+            for (let minute = 0; minute < 60; minute += 10) {
+                const timeStr = `${hour.toString().padStart(2, '0')}:${minute.toString().padStart(2, '0')}`;
+
+                const timeSlot = document.createElement('div');
+                timeSlot.className = 'time-slot available';
+                timeSlot.textContent = timeStr;
+                timeSlot.addEventListener('click', () => selectStartTime(timeStr, timeSlot));
+
+                startTimeSlotsContainer.appendChild(timeSlot);
+            }
+        }
+    }
+
+    function displayStartTimeSlots(timeSlots) {
+        const startTimeSlotsContainer = document.getElementById('startTimeSlots');
+        startTimeSlotsContainer.innerHTML = '';
+
+        timeSlots.forEach(timeData => {
+            const timeSlot = document.createElement('div');
+            timeSlot.className = 'time-slot';
+            timeSlot.textContent = timeData.time;
+
+            // ステータスに応じてクラスを設定
+            if (timeData.status === 'available') {
+                timeSlot.classList.add('available');
+            } else if (timeData.status === 'booking_conflict') {
+                timeSlot.classList.add('booking-conflict');
+                timeSlot.title = `予約: ${timeData.conflict_info || ''}`;
+            } else if (timeData.status === 'schedule_conflict') {
+                timeSlot.classList.add('schedule-conflict');
+                timeSlot.title = `予定: ${timeData.conflict_info || ''}`;
+            } else {
+                timeSlot.classList.add('disabled');
+            }
+
+            // 管理者なので重複も選択可能
+            timeSlot.addEventListener('click', () => selectStartTime(timeData.time, timeSlot));
+
+            startTimeSlotsContainer.appendChild(timeSlot);
+        });
+    }
+
+    function selectStartTime(time, element) {
+        // 前の選択をクリア
+        document.querySelectorAll('#startTimeSlots .time-slot.selected').forEach(el => {
+            el.classList.remove('selected');
+        });
+
+        // 新しい選択を設定
+        element.classList.add('selected');
+        selectedStartTime = time;
+
+        // 隠しフィールドに設定
+        document.getElementById('id_start_time').value = time;
+
+        // 終了時間の選択肢を更新
+        updateEndTimeSlots();
+
+        // 終了時間の選択をリセット
+        selectedEndTime = null;
+        document.getElementById('id_end_time').value = '';
+        updateSubmitButton();
+    }
+
+    function updateEndTimeSlots() {
+        const endTimeSlotsContainer = document.getElementById('endTimeSlots');
+        endTimeSlotsContainer.innerHTML = '';
+
+        if (!selectedStartTime) {
+            const noStartTimeMessage = document.createElement('p');
+            noStartTimeMessage.className = 'no-start-time';
+            noStartTimeMessage.textContent = 'まず開始時間をお選びください';
+            endTimeSlotsContainer.appendChild(noStartTimeMessage);
+            return;
+        }
+
+        const therapistSelect = document.querySelector('select[name="therapist"]');
+        const therapistId = therapistSelect ? therapistSelect.value : '';
+
+        // 日付をローカル時間で文字列化する関数
+        function formatDateLocal(date) {
+        const year = date.getFullYear();
+        const month = String(date.getMonth() + 1).padStart(2, '0');
+        const day = String(date.getDate()).padStart(2, '0');
+        return `${year}-${month}-${day}`;
+        }
+        const dateStr = formatDateLocal(selectedDate);
+        const url = `/dashboard/api/schedule-times/?date=${dateStr}&therapist_id=${therapistId}&start_time=${selectedStartTime}`;
+
+        fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                displayEndTimeSlots(data.time_slots);
+            })
+            .catch(error => {
+                console.error('Error loading end times:', error);
+                // エラー時はローカルで時間スロットを生成
+                displayLocalEndTimeSlots();
+            });
+    }
+
+    function displayLocalEndTimeSlots() {
+        const endTimeSlotsContainer = document.getElementById('endTimeSlots');
+        endTimeSlotsContainer.innerHTML = '';
+
+        // 開始時間より後の時間を生成
+        const [startHour, startMinute] = selectedStartTime.split(':').map(Number);
+        const startTimeMinutes = startHour * 60 + startMinute;
+
+        const endHour = 22;
+
+        for (let hour = 6; hour <= endHour; hour++) {
+            for (let minute = 0; minute < 60; minute += 10) {
+                const currentTimeMinutes = hour * 60 + minute;
+
+                // 開始時間より後の時間のみ表示
+                if (currentTimeMinutes > startTimeMinutes) {
+                    const timeStr = `${hour.toString().padStart(2, '0')}:${minute.toString().padStart(2, '0')}`;
+
+                    const timeSlot = document.createElement('div');
+                    timeSlot.className = 'time-slot available';
+                    timeSlot.textContent = timeStr;
+                    timeSlot.addEventListener('click', () => selectEndTime(timeStr, timeSlot));
+
+                    endTimeSlotsContainer.appendChild(timeSlot);
+                }
+            }
+        }
+    }
+
+    function displayEndTimeSlots(timeSlots) {
+        const endTimeSlotsContainer = document.getElementById('endTimeSlots');
+        endTimeSlotsContainer.innerHTML = '';
+
+        // 開始時間より後の時間のみフィルタリング
+        const [startHour, startMinute] = selectedStartTime.split(':').map(Number);
+        const startTimeMinutes = startHour * 60 + startMinute;
+
+        timeSlots.forEach(timeData => {
+            const [hour, minute] = timeData.time.split(':').map(Number);
+            const currentTimeMinutes = hour * 60 + minute;
+
+            // 開始時間より後の時間のみ表示
+            if (currentTimeMinutes > startTimeMinutes) {
+                const timeSlot = document.createElement('div');
+                timeSlot.className = 'time-slot';
+                timeSlot.textContent = timeData.time;
+
+                // ステータスに応じてクラスを設定
+                if (timeData.status === 'available') {
+                    timeSlot.classList.add('available');
+                } else if (timeData.status === 'booking_conflict') {
+                    timeSlot.classList.add('booking-conflict');
+                    timeSlot.title = `予約: ${timeData.conflict_info || ''}`;
+                } else if (timeData.status === 'schedule_conflict') {
+                    timeSlot.classList.add('schedule-conflict');
+                    timeSlot.title = `予定: ${timeData.conflict_info || ''}`;
+                } else {
+                    timeSlot.classList.add('disabled');
+                }
+
+                // 管理者なので重複も選択可能
+                timeSlot.addEventListener('click', () => selectEndTime(timeData.time, timeSlot));
+
+                endTimeSlotsContainer.appendChild(timeSlot);
+            }
+        });
+    }
+
+    function selectEndTime(time, element) {
+        // 前の選択をクリア
+        document.querySelectorAll('#endTimeSlots .time-slot.selected').forEach(el => {
+            el.classList.remove('selected');
+        });
+
+        // 新しい選択を設定
+        element.classList.add('selected');
+        selectedEndTime = time;
+
+        // 隠しフィールドに設定
+        document.getElementById('id_end_time').value = time;
+
+        // 送信ボタンを有効化
+        updateSubmitButton();
+    }
+
+    function updateSubmitButton() {
+        const submitBtn = document.getElementById('submitBtn');
+        // 日付、開始時間、終了時間がすべて選択されているかチェック
+        if (selectedDate && selectedStartTime && selectedEndTime) {
+            submitBtn.disabled = false;
+        } else {
+            submitBtn.disabled = true;
+        }
+    }
+
+    // フォーム送信時のバリデーション
+    document.getElementById('scheduleForm').addEventListener('submit', function(e) {
+        if (!selectedDate || !selectedStartTime || !selectedEndTime) {
+            e.preventDefault();
+            alert('日付、開始時間、終了時間をすべて選択してください。');
+            return false;
+        }
+
+        // 時間の妥当性チェック
+        const [startHour, startMinute] = selectedStartTime.split(':').map(Number);
+        const [endHour, endMinute] = selectedEndTime.split(':').map(Number);
+        const startMinutes = startHour * 60 + startMinute;
+        const endMinutes = endHour * 60 + endMinute;
+
+        if (startMinutes >= endMinutes) {
+            e.preventDefault();
+            alert('終了時間は開始時間より後に設定してください。');
+            return false;
+        }
+    });
+
+    // 初期状態では送信ボタンを無効化
+    updateSubmitButton();
+});
@@ -0,0 +1,272 @@
+document.addEventListener('DOMContentLoaded', function() {
+    let currentDate = new Date();
+    let selectedDate = null;
+    let selectedStartTime = null;
+    let selectedEndTime = null;
+
+    // 既存の値を取得
+    const existingDate = document.getElementById('id_schedule_date').value;
+    const existingStartTime = document.getElementById('id_start_time').value;
+    const existingEndTime = document.getElementById('id_end_time').value;
+
+    // 既存の値がある場合は設定
+    if (existingDate) {
+        selectedDate = new Date(existingDate);
+        currentDate = new Date(selectedDate);
+    }
+    if (existingStartTime) {
+        selectedStartTime = existingStartTime;
+    }
+    if (existingEndTime) {
+        selectedEndTime = existingEndTime;
+    }
+
+    // カレンダー初期化
+    updateCalendar();
+
+    // 既存の値がある場合は時間スロットも初期化
+    if (selectedDate) {
+        loadTimeSlots();
+        if (selectedStartTime) {
+            updateEndTimeSlots();
+        }
+    }
+
+    // イベントリスナー
+    document.getElementById('prevMonth').addEventListener('click', () => {
+        currentDate.setMonth(currentDate.getMonth() - 1);
+        updateCalendar();
+    });
+
+    document.getElementById('nextMonth').addEventListener('click', () => {
+        currentDate.setMonth(currentDate.getMonth() + 1);
+        updateCalendar();
+    });
+
+    function updateCalendar() {
+        const year = currentDate.getFullYear();
+        const month = currentDate.getMonth();
+
+        // 月名を更新
+        const monthNames = ['1月', '2月', '3月', '4月', '5月', '6月', 
+                           '7月', '8月', '9月', '10月', '11月', '12月'];
+        document.getElementById('currentMonth').textContent = `${year}年${monthNames[month]}`;
+
+        // カレンダーの日付を生成
+        const firstDay = new Date(year, month, 1);
+        const lastDay = new Date(year, month + 1, 0);
+        const startDate = new Date(firstDay);
+        startDate.setDate(startDate.getDate() - firstDay.getDay());
+
+        const calendarDays = document.getElementById('calendarDays');
+        calendarDays.innerHTML = '';
+
+        const today = new Date();
+        today.setHours(0, 0, 0, 0);
+
+        for (let i = 0; i < 42; i++) {
+            const date = new Date(startDate);
+            date.setDate(startDate.getDate() + i);
+
+            const dayElement = document.createElement('div');
+            dayElement.className = 'calendar-day';
+            dayElement.textContent = date.getDate();
+
+            // クラスの設定
+            if (date.getMonth() !== month) {
+                dayElement.classList.add('other-month');
+            } else if (date.getTime() === today.getTime()) {
+                dayElement.classList.add('today');
+            }
+
+            // 既存の選択状態を復元
+            if (selectedDate && date.toDateString() === selectedDate.toDateString()) {
+                dayElement.classList.add('selected');
+            }
+
+            // クリックイベント（過去の日付も選択可能にする）
+            if (!dayElement.classList.contains('other-month')) {
+                dayElement.addEventListener('click', () => selectDate(date, dayElement));
+            }
+
+            calendarDays.appendChild(dayElement);
+        }
+    }
+
+    function selectDate(date, element) {
+        // 前の選択をクリア
+        document.querySelectorAll('.calendar-day.selected').forEach(el => {
+            el.classList.remove('selected');
+        });
+
+        // 新しい選択を設定
+        element.classList.add('selected');
+        selectedDate = date;
+
+        // 隠しフィールドに設定
+        const year = date.getFullYear();
+        const month = String(date.getMonth() + 1).padStart(2, '0');
+        const day = String(date.getDate()).padStart(2, '0');
+        const dateString = `${year}-${month}-${day}`;
+        document.getElementById('id_schedule_date').value = dateString;
+
+        // 時間選択を初期化
+        loadTimeSlots();
+
+        // 時間の選択をリセット（日付が変更された場合）
+        if (!existingStartTime || !existingEndTime) {
+            selectedStartTime = null;
+            selectedEndTime = null;
+            document.getElementById('id_start_time').value = '';
+            document.getElementById('id_end_time').value = '';
+            updateEndTimeSlots();
+        }
+        updateSubmitButton();
+    }
+
+    function loadTimeSlots() {
+        const startTimeSlotsContainer = document.getElementById('startTimeSlots');
+        startTimeSlotsContainer.innerHTML = '';
+
+        // 6:00から22:00まで30分刻みで時間を生成
+        const startHour = 6;
+        const endHour = 22;
+
+        for (let hour = startHour; hour < endHour; hour++) {
+            for (let minute = 0; minute < 60; minute += 30) {
+                const timeStr = `${hour.toString().padStart(2, '0')}:${minute.toString().padStart(2, '0')}`;
+
+                const timeSlot = document.createElement('div');
+                timeSlot.className = 'time-slot';
+                timeSlot.textContent = timeStr;
+
+                // 既存の選択状態を復元
+                if (selectedStartTime === timeStr) {
+                    timeSlot.classList.add('selected');
+                }
+
+                timeSlot.addEventListener('click', () => selectStartTime(timeStr, timeSlot));
+
+                startTimeSlotsContainer.appendChild(timeSlot);
+            }
+        }
+    }
+
+    function selectStartTime(time, element) {
+        // 前の選択をクリア
+        document.querySelectorAll('#startTimeSlots .time-slot.selected').forEach(el => {
+            el.classList.remove('selected');
+        });
+
+        // 新しい選択を設定
+        element.classList.add('selected');
+        selectedStartTime = time;
+
+        // 隠しフィールドに設定
+        document.getElementById('id_start_time').value = time;
+
+        // 終了時間の選択肢を更新
+        updateEndTimeSlots();
+
+        // 終了時間の選択をリセット（開始時間が変更された場合）
+        if (!existingEndTime) {
+            selectedEndTime = null;
+            document.getElementById('id_end_time').value = '';
+        }
+        updateSubmitButton();
+    }
+
+    function updateEndTimeSlots() {
+        const endTimeSlotsContainer = document.getElementById('endTimeSlots');
+        endTimeSlotsContainer.innerHTML = '';
+
+        if (!selectedStartTime) {
+            const noStartTimeMessage = document.createElement('p');
+            noStartTimeMessage.className = 'no-start-time';
+            noStartTimeMessage.textContent = 'まず開始時間をお選びください';
+            endTimeSlotsContainer.appendChild(noStartTimeMessage);
+            return;
+        }
+
+        // 開始時間より後の時間を生成
+        const [startHour, startMinute] = selectedStartTime.split(':').map(Number);
+        const startTimeMinutes = startHour * 60 + startMinute;
+
+        const endHour = 22;
+
+        for (let hour = 6; hour <= endHour; hour++) {
+            for (let minute = 0; minute < 60; minute += 30) {
+                const currentTimeMinutes = hour * 60 + minute;
+
+                // 開始時間より後の時間のみ表示
+                if (currentTimeMinutes > startTimeMinutes) {
+                    const timeStr = `${hour.toString().padStart(2, '0')}:${minute.toString().padStart(2, '0')}`;
+
+                    const timeSlot = document.createElement('div');
+                    timeSlot.className = 'time-slot';
+                    timeSlot.textContent = timeStr;
+
+                    // 既存の選択状態を復元
+                    if (selectedEndTime === timeStr) {
+                        timeSlot.classList.add('selected');
+                    }
+
+                    timeSlot.addEventListener('click', () => selectEndTime(timeStr, timeSlot));
+
+                    endTimeSlotsContainer.appendChild(timeSlot);
+                }
+            }
+        }
+    }
+
+    function selectEndTime(time, element) {
+        // 前の選択をクリア
+        document.querySelectorAll('#endTimeSlots .time-slot.selected').forEach(el => {
+            el.classList.remove('selected');
+        });
+
+        // 新しい選択を設定
+        element.classList.add('selected');
+        selectedEndTime = time;
+
+        // 隠しフィールドに設定
+        document.getElementById('id_end_time').value = time;
+
+        // 送信ボタンを有効化
+        updateSubmitButton();
+    }
+
+    function updateSubmitButton() {
+        const updateBtn = document.getElementById('updateBtn');
+        // 日付、開始時間、終了時間がすべて選択されているかチェック
+        if (selectedDate && selectedStartTime && selectedEndTime) {
+            updateBtn.disabled = false;
+        } else {
+            updateBtn.disabled = true;
+        }
+    }
+
+    // フォーム送信時のバリデーション
+    document.getElementById('scheduleEditForm').addEventListener('submit', function(e) {
+        if (!selectedDate || !selectedStartTime || !selectedEndTime) {
+            e.preventDefault();
+            alert('日付、開始時間、終了時間をすべて選択してください。');
+            return false;
+        }
+
+        // 時間の妥当性チェック
+        const [startHour, startMinute] = selectedStartTime.split(':').map(Number);
+        const [endHour, endMinute] = selectedEndTime.split(':').map(Number);
+        const startMinutes = startHour * 60 + startMinute;
+        const endMinutes = endHour * 60 + endMinute;
+
+        if (startMinutes >= endMinutes) {
+            e.preventDefault();
+            alert('終了時間は開始時間より後に設定してください。');
+            return false;
+        }
+    });
+
+    // 初期状態での送信ボタン状態を設定
+    updateSubmitButton();
+});
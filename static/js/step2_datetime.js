@@ -0,0 +1,282 @@
+// グローバル変数
+let currentDate = new Date();
+let selectedDate = null;
+let selectedTime = null;
+
+// 営業時間設定
+const businessHours = {
+    0: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 日
+    1: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 月
+    2: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 火
+    3: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 水
+    4: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 木
+    5: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }, // 金
+    6: { is_open: true, open_time: '09:00:00', close_time: '20:00:00', last_booking_time: '19:00:00' }  // 土
+};
+
+// 直前予約制限時間（分）
+const minAdvanceMinutes = 20;
+
+document.addEventListener('DOMContentLoaded', function() {
+    generateCalendar();
+
+    // カレンダーナビゲーション
+    document.getElementById('prevMonth').addEventListener('click', function() {
+        currentDate.setMonth(currentDate.getMonth() - 1);
+        generateCalendar();
+    });
+
+    document.getElementById('nextMonth').addEventListener('click', function() {
+        currentDate.setMonth(currentDate.getMonth() + 1);
+        generateCalendar();
+    });
+
+    // 施術者選択の変更監視
+    const therapistRadios = document.querySelectorAll('input[name="therapist"]');
+    therapistRadios.forEach(radio => {
+        radio.addEventListener('change', function() {
+            if (selectedDate) {
+                loadAvailableTimes(selectedDate);
+            }
+        });
+    });
+
+    // 当日の場合は5分ごとに時間スロットを更新
+    if (selectedDate && isToday(selectedDate)) {
+        setInterval(() => {
+            if (selectedDate && isToday(selectedDate)) {
+                loadAvailableTimes(selectedDate);
+            }
+        }, 300000); // 5分ごと
+    }
+});
+
+function isToday(date) {
+    const today = new Date();
+    return date.toDateString() === today.toDateString();
+}
+
+function generateCalendar() {
+    const year = currentDate.getFullYear();
+    const month = currentDate.getMonth();
+
+    const monthNames = ['1月', '2月', '3月', '4月', '5月', '6月', 
+                       '7月', '8月', '9月', '10月', '11月', '12月'];
+    document.getElementById('currentMonth').textContent = `${year}年${monthNames[month]}`;
+
+    const firstDay = new Date(year, month, 1);
+    const lastDay = new Date(year, month + 1, 0);
+    const startDate = new Date(firstDay);
+    startDate.setDate(startDate.getDate() - firstDay.getDay());
+
+    const calendarDays = document.getElementById('calendarDays');
+    calendarDays.innerHTML = '';
+
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+
+    for (let i = 0; i < 42; i++) {
+        const date = new Date(startDate);
+        date.setDate(startDate.getDate() + i);
+
+        const dayElement = document.createElement('div');
+        dayElement.className = 'calendar-day';
+        dayElement.textContent = date.getDate();
+
+        if (date.getMonth() !== month) {
+            dayElement.classList.add('other-month');
+        } else if (date < today) {
+            dayElement.classList.add('past');
+        } else if (date.getTime() === today.getTime()) {
+            dayElement.classList.add('today');
+
+            // 当日の営業時間チェック
+            if (!isDateAvailableForBooking(date)) {
+                dayElement.classList.add('business-closed');
+                dayElement.title = '本日の営業時間は終了しました';
+            }
+        }
+
+        // クリックイベント設定
+        if (!dayElement.classList.contains('other-month') && 
+            !dayElement.classList.contains('past') && 
+            !dayElement.classList.contains('business-closed')) {
+            dayElement.addEventListener('click', () => selectDate(date, dayElement));
+        }
+
+        calendarDays.appendChild(dayElement);
+    }
+}
+
+function isDateAvailableForBooking(date) {
+    const now = new Date();
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+
+    // 当日以外は予約可能
+    if (date.getTime() !== today.getTime()) {
+        return true;
+    }
+
+    // 当日の場合：営業時間外チェック
+    const weekday = date.getDay();
+    const businessHour = businessHours[weekday];
+
+    if (!businessHour || !businessHour.is_open) {
+        return false;
+    }
+
+    // 営業時間外チェック
+    const currentTime = now.getHours() * 60 + now.getMinutes();
+    const lastBookingTime = parseTimeToMinutes(businessHour.last_booking_time);
+
+    // 最終予約受付時間 + 直前制限時間を過ぎている場合は予約不可
+    if (currentTime >= lastBookingTime - minAdvanceMinutes) {
+        return false;
+    }
+
+    return true;
+}
+
+function parseTimeToMinutes(timeString) {
+    if (!timeString) return 0;
+    const [hours, minutes] = timeString.split(':').map(Number);
+    return hours * 60 + minutes;
+}
+
+function selectDate(date, element) {
+    // 前の選択をクリア
+    document.querySelectorAll('.calendar-day.selected').forEach(el => {
+        el.classList.remove('selected');
+    });
+
+    // 新しい選択を設定
+    element.classList.add('selected');
+    selectedDate = date;
+
+    // タイムゾーンを考慮した日付文字列を作成
+    const year = date.getFullYear();
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    const dateString = `${year}-${month}-${day}`;
+
+    // 隠しフィールドに設定
+    document.getElementById('bookingDate').value = dateString;
+
+    // デバッグ用ログ
+    console.log('選択された日付:', date);
+    console.log('送信される日付文字列:', dateString);
+
+    // 時間選択をリセット
+    selectedTime = null;
+    document.getElementById('bookingTime').value = '';
+
+    // 利用可能時間を読み込み
+    loadAvailableTimes(date);
+
+    updateSubmitButton();
+}
+
+function loadAvailableTimes(date) {
+    // 施術者IDを取得（関数内で毎回取得することでスコープ問題を解決）
+    const therapistRadio = document.querySelector('input[name="therapist"]:checked');
+    const therapistId = therapistRadio ? therapistRadio.value : '';
+    const serviceId = document.getElementById('serviceId').value;
+
+    const timeSlotsContainer = document.getElementById('timeSlotsContainer');
+    timeSlotsContainer.innerHTML = '<p class="loading-message">利用可能時間を読み込み中...</p>';
+
+    // タイムゾーンを考慮した日付文字列を作成
+    const year = date.getFullYear();
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    const dateStr = `${year}-${month}-${day}`;
+
+    const url = `/booking/api/available-times/?date=${dateStr}&service_id=${serviceId}&therapist_id=${therapistId}`;
+
+    fetch(url)
+        .then(response => response.json())
+        .then(data => {
+            displayTimeSlots(data.available_times, date);
+        })
+        .catch(error => {
+            console.error('Error loading times:', error);
+            timeSlotsContainer.innerHTML = '<p class="error-message">時間の読み込みに失敗しました。再度お試しください。</p>';
+        });
+}
+
+function displayTimeSlots(availableTimes, selectedDate) {
+    const timeSlotsContainer = document.getElementById('timeSlotsContainer');
+
+    if (!availableTimes || availableTimes.length === 0) {
+        if (isToday(selectedDate)) {
+            timeSlotsContainer.innerHTML = '<p class="no-times">本日は予約可能な時間がありません。<br><small>制限時間：現在時刻の20分後以降から予約可能です。</small></p>';
+        } else {
+            timeSlotsContainer.innerHTML = '<p class="no-times">この日は予約可能な時間がありません。</p>';
+        }
+        return;
+    }
+
+    const timeSlotsGrid = document.createElement('div');
+    timeSlotsGrid.className = 'time-slots-grid';
+
+    let hasAvailableSlots = false;
+
+    availableTimes.forEach(timeData => {
+        const timeSlot = document.createElement('div');
+        timeSlot.className = 'time-slot';
+
+        // timeDataがオブジェクトの場合とstringの場合両方に対応
+        let timeString, isAvailable;
+        if (typeof timeData === 'object') {
+            timeString = timeData.time || timeData.display;
+            isAvailable = timeData.available !== false;
+        } else {
+            timeString = timeData;
+            isAvailable = true;
+        }
+
+        timeSlot.textContent = timeString;
+
+        if (isAvailable) {
+            timeSlot.addEventListener('click', () => selectTime(timeString, timeSlot));
+            hasAvailableSlots = true;
+        } else {
+            timeSlot.classList.add('unavailable');
+        }
+
+        timeSlotsGrid.appendChild(timeSlot);
+    });
+
+    timeSlotsContainer.innerHTML = '';
+
+    // 当日で利用可能時間がない場合のメッセージ
+    if (!hasAvailableSlots && isToday(selectedDate)) {
+        const messageDiv = document.createElement('div');
+        messageDiv.innerHTML = '<p class="no-times">本日は予約可能な時間がありません。<br><small>制限時間：現在時刻の20分後以降から予約可能です。</small></p>';
+        timeSlotsContainer.appendChild(messageDiv);
+    } else {
+        timeSlotsContainer.appendChild(timeSlotsGrid);
+    }
+}
+
+function selectTime(time, element) {
+    // 前の選択をクリア
+    document.querySelectorAll('.time-slot.selected').forEach(el => {
+        el.classList.remove('selected');
+    });
+
+    // 新しい選択を設定
+    element.classList.add('selected');
+    selectedTime = time;
+
+    // 隠しフィールドに設定
+    document.getElementById('bookingTime').value = time;
+
+    updateSubmitButton();
+}
+
+function updateSubmitButton() {
+    const submitBtn = document.getElementById('submitBtn');
+    submitBtn.disabled = !(selectedDate && selectedTime);
+}
@@ -0,0 +1,173 @@
+// グローバル変数
+let currentDate = new Date();
+let selectedDate = null;
+let selectedTime = null;
+
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('Step 2 English page loaded successfully');
+
+    // カレンダー初期化
+    generateCalendar();
+
+    // ボタンイベント
+    document.getElementById('prevMonth').addEventListener('click', function() {
+        currentDate.setMonth(currentDate.getMonth() - 1);
+        generateCalendar();
+    });
+
+    document.getElementById('nextMonth').addEventListener('click', function() {
+        currentDate.setMonth(currentDate.getMonth() + 1);
+        generateCalendar();
+    });
+});
+
+function generateCalendar() {
+    const year = currentDate.getFullYear();
+    const month = currentDate.getMonth();
+
+    const monthNames = ['January', 'February', 'March', 'April', 'May', 'June', 
+                       'July', 'August', 'September', 'October', 'November', 'December'];
+
+    document.getElementById('currentMonth').textContent = `${monthNames[month]} ${year}`;
+
+    const firstDay = new Date(year, month, 1);
+    const lastDay = new Date(year, month + 1, 0);
+    const startDate = new Date(firstDay);
+    startDate.setDate(startDate.getDate() - firstDay.getDay());
+
+    const calendarDays = document.getElementById('calendarDays');
+    calendarDays.innerHTML = '';
+
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+
+    for (let i = 0; i < 42; i++) {
+        const date = new Date(startDate);
+        date.setDate(startDate.getDate() + i);
+
+        const dayElement = document.createElement('div');
+        dayElement.className = 'calendar-day';
+        dayElement.textContent = date.getDate();
+
+        if (date.getMonth() !== month) {
+            dayElement.classList.add('other-month');
+        } else if (date < today) {
+            dayElement.classList.add('past');
+        } else if (date.getTime() === today.getTime()) {
+            dayElement.classList.add('today');
+        }
+
+        // 選択可能な日付にクリックイベントを追加
+        if (!dayElement.classList.contains('other-month') && 
+            !dayElement.classList.contains('past')) {
+            dayElement.addEventListener('click', () => selectDate(date, dayElement));
+        }
+
+        // 選択状態を復元
+        if (selectedDate && date.toDateString() === selectedDate.toDateString()) {
+            dayElement.classList.add('selected');
+        }
+
+        calendarDays.appendChild(dayElement);
+    }
+}
+
+function selectDate(date, element) {
+    console.log('Date selected:', date);
+
+    // 前の選択を解除
+    document.querySelectorAll('.calendar-day.selected').forEach(el => {
+        el.classList.remove('selected');
+    });
+
+    // 新しい選択を設定
+    element.classList.add('selected');
+    selectedDate = date;
+
+    // 隠しフィールドに設定
+    const year = date.getFullYear();
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    document.getElementById('bookingDate').value = `${year}-${month}-${day}`;
+
+    // 時間選択をリセット
+    selectedTime = null;
+    const bookingTimeField = document.getElementById('bookingTime');
+    if (bookingTimeField) {
+        bookingTimeField.value = '';
+    }
+
+    // 利用可能時間を読み込み
+    loadAvailableTimes(date);
+
+    updateSubmitButton();
+}
+
+function loadAvailableTimes(date) {
+    const timeSlotsContainer = document.getElementById('timeSlotsContainer');
+
+    // テスト用のモック時間スロット
+    const mockTimes = [];
+    for (let hour = 9; hour < 20; hour++) {
+        for (let minute = 0; minute < 60; minute += 30) {
+            mockTimes.push({
+                time: `${hour.toString().padStart(2, '0')}:${minute.toString().padStart(2, '0')}`,
+                available: true
+            });
+        }
+    }
+
+    displayTimeSlots(mockTimes, date);
+}
+
+function displayTimeSlots(availableTimes, date) {
+    const timeSlotsContainer = document.getElementById('timeSlotsContainer');
+
+    const timeSlotsGrid = document.createElement('div');
+    timeSlotsGrid.className = 'time-slots-grid';
+
+    availableTimes.forEach(timeData => {
+        const timeSlot = document.createElement('div');
+        timeSlot.className = 'time-slot';
+        timeSlot.textContent = timeData.time;
+
+        if (timeData.available) {
+            timeSlot.addEventListener('click', () => selectTime(timeData.time, timeSlot));
+        } else {
+            timeSlot.classList.add('unavailable');
+        }
+
+        timeSlotsGrid.appendChild(timeSlot);
+    });
+
+    timeSlotsContainer.innerHTML = '';
+    timeSlotsContainer.appendChild(timeSlotsGrid);
+}
+
+function selectTime(time, element) {
+    console.log('Time selected:', time);
+
+    // 前の選択を解除
+    document.querySelectorAll('.time-slot.selected').forEach(el => {
+        el.classList.remove('selected');
+    });
+
+    // 新しい選択を設定
+    element.classList.add('selected');
+    selectedTime = time;
+
+    // 隠しフィールドに設定
+    const bookingTimeField = document.getElementById('bookingTime');
+    if (bookingTimeField) {
+        bookingTimeField.value = time;
+    }
+
+    updateSubmitButton();
+}
+
+function updateSubmitButton() {
+    const submitBtn = document.getElementById('submitBtn');
+    if (submitBtn) {
+        submitBtn.disabled = !(selectedDate && selectedTime);
+    }
+}
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WebsiteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'website'
+    
+    def ready(self):
+        # シグナルをインポート（公開ページのキャッシュ無効化）
+        import website.signals
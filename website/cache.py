@@ -0,0 +1,99 @@
+# website/cache.py
+# 公開ページ（トップページ・セラピスト紹介）の表示結果をキャッシュする
+#
+# ページ内容は全訪問者で同じため、描画結果をビューと言語ごとにキャッシュし、
+# サービス・施術者・予約設定の変更時にバージョンを上げて無効化する（website/signals.py）
+# キャッシュから返す場合もミドルウェア（メンテナンスモード・セキュリティヘッダー）は通常どおり通る
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from bookings.utils.cache_versions import get_version, bump_version
+
+PUBLIC_PAGES_VERSION = 'public_pages'
+PAGE_KEY = 'public_page:{name}:{language}:{version}'
+# 最後に無効化した日時（削除された場合も Last-Modified が新しくなるようにする）
+INVALIDATED_AT_KEY = 'public_pages:invalidated_at'
+
+
+def get_public_page_cache_timeout():
+    """公開ページのキャッシュ有効期間（秒）"""
+    return getattr(settings, 'PUBLIC_PAGE_CACHE_TIMEOUT', 600)
+
+
+def invalidate_public_pages():
+    """公開ページのキャッシュを無効化"""
+    cache.set(INVALIDATED_AT_KEY, int(time.time()), None)
+    bump_version(PUBLIC_PAGES_VERSION)
+
+
+def set_last_modified(response, objects):
+    """表示したオブジェクトの最終更新日時を Last-Modified ヘッダーに設定"""
+    updated = [obj.updated_at for obj in objects if obj is not None and obj.updated_at]
+    if updated:
+        response['Last-Modified'] = http_date(max(updated).timestamp())
+    return response
+
+
+def _has_user_state(request):
+    """ログイン中・メッセージ表示待ちなど、訪問者ごとに表示が変わる可能性があるか"""
+    return settings.SESSION_COOKIE_NAME in request.COOKIES or CookieStorage.cookie_name in request.COOKIES
+
+
+def _build_page(response):
+    content = response.content
+    last_modified = max(
+        parse_http_date_safe(response.get('Last-Modified', '')) or 0,
+        cache.get(INVALIDATED_AT_KEY) or 0,
+    ) or int(time.time())
+    return {
+        'content': content,
+        'content_type': response['Content-Type'],
+        # テンプレートの変更（デプロイ）でも変わるよう、ETag は内容から作成する
+        'etag': '"%s"' % hashlib.md5(content).hexdigest(),
+        'last_modified': last_modified,
+    }
+
+
+def _page_response(request, page):
+    response = get_conditional_response(request, etag=page['etag'], last_modified=page['last_modified'])
+    if response is None:
+        response = HttpResponse(page['content'], content_type=page['content_type'])
+    response['ETag'] = page['etag']
+    response['Last-Modified'] = http_date(page['last_modified'])
+    # ブラウザには毎回確認させ、変更がなければ 304 を返す
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def cache_public_page(view):
+    """
+    公開ページのビューをキャッシュするデコレーター
+    Cookie（セッション・メッセージ）を持たない訪問者には、DBにアクセスせずキャッシュから返す
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or _has_user_state(request):
+            return view(request, *args, **kwargs)
+
+        key = PAGE_KEY.format(
+            name=view.__name__, language=kwargs.get('language', 'ja'), version=get_version(PUBLIC_PAGES_VERSION)
+        )
+        page = cache.get(key)
+        if page is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming or response.cookies:
+                return response
+            page = _build_page(response)
+            cache.set(key, page, get_public_page_cache_timeout())
+        return _page_response(request, page)
+
+    return wrapper
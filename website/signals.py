@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from bookings.models import BookingSettings, Service, Therapist
+from .cache import invalidate_public_pages
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _invalidate():
+    try:
+        invalidate_public_pages()
+    except Exception as e:
+        logger.error(f"公開ページキャッシュ無効化エラー: {str(e)}")
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Therapist)
+@receiver(post_delete, sender=Therapist)
+@receiver(post_save, sender=BookingSettings)
+@receiver(post_delete, sender=BookingSettings)
+def public_page_data_changed_handler(sender, **kwargs):
+    """サービス・施術者・予約設定（施術者指名の可否）の変更時に公開ページのキャッシュを無効化"""
+    # トランザクション確定前に無効化すると、変更前の内容が再びキャッシュされる場合がある
+    transaction.on_commit(_invalidate)
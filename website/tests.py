@@ -1,3 +1,64 @@
+from django.conf import settings
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from bookings.models import Service, Therapist
+from bookings.tests import PerformanceTestMixin
+
+
+class PublicPagePerformanceTests(PerformanceTestMixin, TestCase):
+    """公開ページのクエリ数"""
+
+    def test_pages(self):
+        for name, max_queries in [
+            ('home', 0),
+            ('home_en', 1),
+            ('therapists', 2),
+            ('therapists_en', 2),
+        ]:
+            with self.assertMaxQueries(max_queries, f'website_{name}'):
+                response = self.client.get(reverse(f'website:{name}'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_cached_pages(self):
+        for name in ['home', 'home_en', 'therapists', 'therapists_en']:
+            url = reverse(f'website:{name}')
+            first = self.client.get(url)
+            with self.assertMaxQueries(0, f'website_{name}_cached'):
+                response = self.client.get(url)
+            self.assertEqual(response.content, first.content)
+            self.assertEqual(response['ETag'], first['ETag'])
+            # セキュリティヘッダーはキャッシュから返す場合も付与される
+            self.assertEqual(response['X-Frame-Options'], first['X-Frame-Options'])
+
+            with self.assertMaxQueries(0, f'website_{name}_not_modified'):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(response.status_code, 304)
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_invalidated_on_change(self):
+        url = reverse('website:therapists')
+        first = self.client.get(url)
+        therapist = Therapist.objects.filter(is_active=True).first()
+        therapist.display_name = '変更後の表示名'
+        with self.captureOnCommitCallbacks(execute=True):
+            therapist.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '変更後の表示名')
+
+        url = reverse('website:home_en')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.filter(is_active=True).first().delete()
+        with self.assertMaxQueries(1, 'website_home_en_invalidated'):
+            self.client.get(url)
+
+    def test_session_visitors_bypass_cache(self):
+        url = reverse('website:therapists')
+        self.client.get(url)
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'unknown'
+        response = self.client.get(url)
+        self.assertNotIn('ETag', response)
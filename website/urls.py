@@ -8,7 +8,7 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('therapists/', views.therapists, name='therapists'),
     
-    # ★ 英語版URL追加
-    path('en/', views.home_en, name='home_en'),
-    path('en/therapists/', views.therapists_en, name='therapists_en'),
+    # 英語版URL（同じビューで、テンプレートを英語版に切り替える）
+    path('en/', views.home, {'language': 'en'}, name='home_en'),
+    path('en/therapists/', views.therapists, {'language': 'en'}, name='therapists_en'),
 ]